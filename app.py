@@ -1,30 +1,86 @@
 import asyncio
 import base64
+import hashlib
 import json
 import os
-from collections import deque
-from typing import Dict
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
 
 import dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
-from twilio.rest import Client
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from twilio.request_validator import RequestValidator
 from twilio.twiml.voice_response import Connect, VoiceResponse
 
+# Load .env before importing the services, whose singletons read their settings on import
+dotenv.load_dotenv()
+
+from functions.function_manifest import fixed_phrases
 from logger_config import get_logger
+from services.call_control import drain_actions
 from services.call_context import CallContext
+from services.call_events import TranscriptPublisher, call_event_bus, format_sse
+from services.call_setup import call_setup_store
+from services.call_store import call_store
+from services.connection_manager import connection_manager
+from services.inbound_audio import InboundAudioQueue
 from services.llm_service import LLMFactory
+from services.playback_tracker import PlaybackTracker
+from services.speculation import SpeculativeCompleter, speculation_stats
 from services.stream_service import StreamService
+from services.telephony import ENDED_CALL_STATUSES, telephony_client
 from services.transcription_service import TranscriptionService
+from services.tts_cache import tts_cache
+from services.tts_pipeline import TTSPipeline
 from services.tts_service import TTSFactory
+from services.whatsapp_outbox import whatsapp_outbox
+from services.turn_manager import TurnManager
+from services.vad import VoiceActivityDetector
 
-dotenv.load_dotenv()
-app = FastAPI()
 logger = get_logger("App")
 
-# Global dictionary to store call contexts for each server instance (should be replaced with a database in production)
-global call_contexts
-call_contexts = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open keep-alive connections to providers before the first call needs them
+    await connection_manager.warm_up()
+
+    # Synthesize fixed phrases in the background so they play from the TTS cache
+    tts_service = TTSFactory.get_tts_service(os.getenv("TTS_SERVICE", "deepgram"))
+    phrases = fixed_phrases() + [os.getenv("INITIAL_MESSAGE")]
+    prewarm_task = asyncio.create_task(tts_service.prewarm(phrases))
+
+    # Deliver WhatsApp messages queued by calls, including those left from a previous run
+    whatsapp_outbox.on('status', update_whatsapp_status)
+    whatsapp_outbox.start()
+
+    yield
+
+    prewarm_task.cancel()
+    await tts_cache.flush()
+    await whatsapp_outbox.stop()
+    # Let hangups and transfers requested by calls go out
+    await drain_actions()
+    call_store.close()
+    await call_setup_store.close()
+    await connection_manager.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+def update_whatsapp_status(call_sid: str, message_id: int, status: str, error: str):
+    call_context = call_store.get(call_sid)
+    if not call_context or call_context.whatsapp_message_id != message_id:
+        return
+    call_context.whatsapp_status = status
+    call_context.whatsapp_error = error
+    if status == "failed":
+        # Let the agent offer to send it again
+        call_context.whatsapp_sent = False
+    call_store.put(call_context)
 
 # First route that gets called by Twilio when call is initiated
 @app.post("/incoming")
@@ -40,10 +96,13 @@ async def incoming_call() -> HTMLResponse:
 @app.get("/call_recording/{call_sid}")
 async def get_call_recording(call_sid: str):
     """Get the recording URL for a specific call."""
-    recording = get_twilio_client().calls(call_sid).recordings.list()
+    try:
+        recording = await telephony_client.list_recordings(call_sid)
+    except Exception as e:
+        logger.error(f"Error fetching call recording: {str(e)}")
+        return {"error": f"Failed to fetch call recording: {str(e)}"}
     if recording:
-        print({"recording_url": f"https://api.twilio.com/{recording[0].uri}"})
-        return {"recording_url": f"https://api.twilio.com/{recording[0].uri}"}
+        return {"recording_url": f"https://api.twilio.com{recording[0]['uri']}"}
     if not recording:
         return {"error": "Recording not found"}
     
@@ -62,57 +121,141 @@ async def websocket_endpoint(websocket: WebSocket):
     stream_service = StreamService(websocket)
     transcription_service = TranscriptionService()
     tts_service = TTSFactory.get_tts_service(tts_service_name)
+    tts_pipeline = TTSPipeline(tts_service)
+    speculator = None
+    if os.getenv("SPECULATION_ENABLED") == "true":
+        speculator = SpeculativeCompleter(llm_service)
     
-    marks = deque()
-    interaction_count = 0
+    playback = PlaybackTracker()
+    # Sentence completed by each outstanding mark, and the sentences heard per interaction
+    mark_sentences = {}
+    spoken_sentences = {}
+    turns = TurnManager()
+    # Pushes transcript changes to the call's event stream once the call is known
+    transcript_publisher = None
+    # Interaction 0 is the greeting
+    interaction_count = 1
 
     await transcription_service.connect()
 
-    async def process_media(msg):
-        await transcription_service.send(base64.b64decode(msg['media']['payload']))
-
     async def handle_transcription(text):
         nonlocal interaction_count
         if not text:
             return
-        logger.info(f"Interaction {interaction_count} – STT -> LLM: {text}")
-        await llm_service.completion(text, interaction_count)
+        icount = interaction_count
         interaction_count += 1
+        logger.info(f"Interaction {icount} – STT -> LLM: {text}")
+        if speculator is not None:
+            completion = speculator.completion(text, icount)
+        else:
+            completion = llm_service.completion(text, icount)
+        if not await turns.run(icount, completion):
+            logger.info(f"Interaction {icount} was interrupted")
+        publish_transcript()
+
+    def publish_transcript():
+        if transcript_publisher is not None:
+            transcript_publisher.sync(llm_service.user_context)
 
     async def handle_llm_reply(llm_reply, icount):
+        if turns.is_cancelled(icount):
+            return
         logger.info(f"Interaction {icount}: LLM -> TTS: {llm_reply['partialResponse']}")
-        await tts_service.generate(llm_reply, icount)
-
-    async def handle_speech(response_index, audio, label, icount):
-        logger.info(f"Interaction {icount}: TTS -> TWILIO: {label}")
-        await stream_service.buffer(response_index, audio)
+        publish_transcript()
+        task = await tts_pipeline.submit(llm_reply, icount)
+        turns.track(icount, task)
+        playback.hold(task)
 
-    async def handle_audio_sent(mark_label):
-        marks.append(mark_label)
+    async def handle_speech(response_index, audio, label, icount, is_final=True):
+        if turns.is_cancelled(icount):
+            return
+        tag = None
+        if is_final:
+            logger.info(f"Interaction {icount}: TTS -> TWILIO: {label}")
+            tag = (icount, label)
+        await stream_service.buffer(response_index, audio, is_final, tag)
+
+    async def handle_audio_sent(mark_label, tag=None):
+        playback.sent(mark_label)
+        if tag is not None:
+            mark_sentences[mark_label] = tag
+
+    async def handle_mark(mark_label):
+        playback.acknowledged(mark_label)
+        if tag := mark_sentences.pop(mark_label, None):
+            icount, sentence = tag
+            spoken_sentences.setdefault(icount, []).append(sentence)
+
+    async def interrupt():
+        interrupted = {icount for icount, _ in mark_sentences.values()}
+        interrupted.update(turns.cancel_all())
+        if speculator is not None:
+            speculator.cancel()
+
+        # Twilio acknowledges cleared marks too, so later acks do not mean the audio was heard
+        mark_sentences.clear()
+        # Audio dropped before it was sent will never be acknowledged
+        playback.discard(await stream_service.clear())
+
+        # reset states
+        stream_service.reset()
+        llm_service.reset()
+
+        for icount in sorted(interrupted):
+            llm_service.truncate_reply(icount, " ".join(spoken_sentences.get(icount, [])))
+        publish_transcript()
 
     async def handle_utterance(text, stream_sid):
         try:
-            if len(marks) > 0 and text.strip():
+            if playback.playing and text.strip():
                 logger.info("Intruption detected, clearing system.")
-                await websocket.send_json({
-                    "streamSid": stream_sid,
-                    "event": "clear"
-                })
-                
-                # reset states
-                stream_service.reset()
-                llm_service.reset()
+                await interrupt()
 
         except Exception as e:
             logger.error(f"Error while handling utterance: {e}")
             e.print_stack()
 
+    async def handle_speculation(text):
+        # Only draft while the previous reply is no longer being generated
+        if not turns.tasks:
+            speculator.speculate(text)
+
+    async def handle_speech_start():
+        transcription_service.resume_turn()
+        if playback.playing:
+            logger.info("VAD -> Caller started speaking over playback, clearing system.")
+            await interrupt()
+
+    async def handle_speech_end(duration_ms):
+        logger.info(f"VAD -> Caller stopped speaking after {duration_ms}ms")
+        await transcription_service.end_turn()
+
+    if os.getenv("EVENT_DISPATCH") == "queue":
+        # Keep the Deepgram callbacks from waiting on LLM completions; only the
+        # latest interim transcript matters for interruption detection
+        transcription_service.use_queue('transcription', policy='block')
+        transcription_service.use_queue('utterance', maxsize=1, policy='coalesce')
+        transcription_service.use_queue('speculation', maxsize=1, policy='coalesce')
+
     transcription_service.on('utterance', handle_utterance)
     transcription_service.on('transcription', handle_transcription)
+    if speculator is not None:
+        transcription_service.on('speculation', handle_speculation)
     llm_service.on('llmreply', handle_llm_reply)
     tts_service.on('speech', handle_speech)
     stream_service.on('audiosent', handle_audio_sent)
 
+    vad = None
+    if os.getenv("VAD_ENABLED") == "true":
+        vad = VoiceActivityDetector()
+        # Ending the turn can start a completion, which must not hold up the inbound audio
+        vad.use_queue('speech_end', policy='drop_oldest')
+        vad.on('speech_start', handle_speech_start)
+        vad.on('speech_end', handle_speech_end)
+
+    inbound_audio = InboundAudioQueue(transcription_service, vad)
+    inbound_audio.start()
+
     # Queue for incoming WebSocket messages
     message_queue = asyncio.Queue()
 
@@ -125,6 +268,7 @@ async def websocket_endpoint(websocket: WebSocket):
             logger.info("WebSocket disconnected")
 
     async def message_processor():
+        nonlocal transcript_publisher
         while True:
             msg = await message_queue.get()
             if msg['event'] == 'start':
@@ -134,35 +278,44 @@ async def websocket_endpoint(websocket: WebSocket):
                 call_context = CallContext()
 
                 if os.getenv("RECORD_CALLS") == "true":
-                    get_twilio_client().calls(call_sid).recordings.create({"recordingChannels": "dual"})
+                    asyncio.create_task(start_recording(call_sid))
 
                 # Decide if the call the call was initiated from the UI or is an inbound
-                if call_sid not in call_contexts:
+                if call_sid in call_store:
+                    # Call from UI, reuse the existing context
+                    call_context = call_store.get(call_sid)
+                elif setup := await claim_call_setup(call_sid):
+                    # Call from UI started by another worker
+                    call_context = CallContext.from_dict(setup)
+                    call_store.put(call_context)
+                else:
                     # Inbound call
                     call_context.system_message = os.environ.get("SYSTEM_MESSAGE")
                     call_context.initial_message = os.environ.get("INITIAL_MESSAGE")
                     call_context.call_sid = call_sid
-                    call_contexts[call_sid] = call_context
-                else:
-                    # Call from UI, reuse the existing context
-                    call_context = call_contexts[call_sid]
+                    call_context.start_time = datetime.now().isoformat()
+                    call_store.put(call_context)
+                    asyncio.create_task(lookup_caller(call_context))
                 
+                call_context.playback = playback
                 llm_service.set_call_context(call_context)
 
                 stream_service.set_stream_sid(stream_sid)
                 transcription_service.set_stream_sid(stream_sid)
 
+                transcript_publisher = TranscriptPublisher(call_event_bus, call_sid)
+                publish_transcript()
+                call_event_bus.publish(call_sid, "status", {"status": call_context.current_status()})
+
                 logger.info(f"Twilio -> Starting Media Stream for {stream_sid}")
                 await tts_service.generate({
                     "partialResponseIndex": None,
                     "partialResponse": call_context.initial_message
-                }, 1)
+                }, 0)
             elif msg['event'] == 'media':
-                asyncio.create_task(process_media(msg))
+                inbound_audio.push(msg['media']['payload'])
             elif msg['event'] == 'mark':
-                label = msg['mark']['name']
-                if label in marks:
-                    marks.remove(label)
+                await handle_mark(msg['mark']['name'])
             elif msg['event'] == 'stop':
                 logger.info(f"Twilio -> Media stream {stream_sid} ended.")
                 break
@@ -176,10 +329,54 @@ async def websocket_endpoint(websocket: WebSocket):
     except asyncio.CancelledError:
         logger.info("Tasks cancelled")
     finally:
+        turns.cancel_all()
+        tts_pipeline.cancel()
+        if speculator is not None:
+            speculator.cancel()
+            logger.info(f"Speculation: {speculator.stats.as_dict()}")
+        if llm_service.memory is not None:
+            llm_service.memory.cancel()
+            logger.info(f"Conversation memory: {llm_service.memory.stats()}")
+        await stream_service.close()
+        playback.close()
+        call_context = llm_service.context
+        if call_context.call_sid:
+            call_context.playback = None
+            call_context.end_time = call_context.end_time or datetime.now().isoformat()
+            publish_transcript()
+            call_event_bus.publish(call_context.call_sid, "status", {"status": call_context.current_status()})
+            call_event_bus.publish(call_context.call_sid, "end", call_context.summary())
+            call_store.finish(call_context.call_sid)
+        if queue_stats := transcription_service.queue_stats():
+            logger.info(f"Transcription event queues: {queue_stats}")
+        await inbound_audio.close()
+        if vad is not None:
+            await vad.close_queues()
+        logger.info(f"Inbound audio: {inbound_audio.stats()}")
+        if trim_stats := tts_service.trim_stats():
+            logger.info(f"TTS silence trimmed: {trim_stats}")
+        await transcription_service.close_queues()
         await transcription_service.disconnect()
 
-def get_twilio_client():
-    return Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+async def claim_call_setup(call_sid: str):
+    try:
+        return await call_setup_store.claim(call_sid)
+    except Exception as e:
+        logger.error(f"Error fetching setup of call {call_sid}: {str(e)}")
+        return None
+
+async def lookup_caller(call_context: CallContext):
+    try:
+        call = await telephony_client.fetch_call(call_context.call_sid)
+        call_context.user_phone = call_context.user_phone or call.get("from")
+    except Exception as e:
+        logger.error(f"Error fetching caller of call {call_context.call_sid}: {str(e)}")
+
+async def start_recording(call_sid: str):
+    try:
+        await telephony_client.start_recording(call_sid, recording_channels="dual")
+    except Exception as e:
+        logger.error(f"Error starting recording for call {call_sid}: {str(e)}")
 
 # API route to initiate a call via UI
 @app.post("/start_call")
@@ -196,22 +393,31 @@ async def start_call(request: Dict[str, str]):
         return {"error": "Missing 'to_number' in request"}
 
     try:
-        client = get_twilio_client()
         logger.info(f"Initiating call to {to_number} via {service_url}")
-        call = client.calls.create(
+        call = await telephony_client.create_call(
             to=to_number,
             from_=os.getenv("APP_NUMBER"),
-            url=f"{service_url}"
+            url=f"{service_url}",
+            # Status changes are pushed to /status_callback instead of polled
+            status_callback=f"https://{os.getenv('SERVER')}/status_callback",
+            status_callback_event=["initiated", "ringing", "answered", "completed"],
+            status_callback_method="POST"
         )
-        call_sid = call.sid
+        call_sid = call["sid"]
         call_context = CallContext()
-        call_contexts[call_sid] = call_context
-        
 
         # Set custom system and initial messages for this call if provided
         call_context.system_message = system_message or os.getenv("SYSTEM_MESSAGE")
         call_context.initial_message = initial_message or os.getenv("Config.INITIAL_MESSAGE")
         call_context.call_sid = call_sid
+        call_context.user_phone = to_number
+        call_context.start_time = datetime.now().isoformat()
+        call_store.put(call_context)
+        try:
+            # The media stream may be accepted by another worker
+            await call_setup_store.publish(call_sid, call_context.to_dict())
+        except Exception as e:
+            logger.error(f"Error sharing setup of call {call_sid}: {str(e)}")
 
         return {"call_sid": call_sid}
     except Exception as e:
@@ -223,23 +429,90 @@ async def start_call(request: Dict[str, str]):
 # API route to get the status of a call
 @app.get("/call_status/{call_sid}")
 async def get_call_status(call_sid: str):
-    """Get the status of a call."""
+    """Get the status of a call, from the status callbacks if they are recent enough."""
+    call_context = call_store.get(call_sid)
+    if call_context and call_status_is_fresh(call_context):
+        return {"status": call_context.current_status(), "cached": True}
+
     try:
-        client = get_twilio_client()
-        call = client.calls(call_sid).fetch()
-        return {"status": call.status}
+        call = await telephony_client.fetch_call(call_sid)
+        if call_context:
+            apply_call_status(call_context, call["status"])
+        return {"status": call["status"], "cached": False}
     except Exception as e:
         logger.error(f"Error fetching call status: {str(e)}")
         return {"error": f"Failed to fetch call status: {str(e)}"}
 
+def call_status_is_fresh(call_context: CallContext) -> bool:
+    # A final status never changes, and a connected media stream means the call is in progress
+    if call_context.final_status or call_context.playback is not None:
+        return True
+    if call_context.status_updated_at is None:
+        return False
+    max_age = float(os.getenv("CALL_STATUS_MAX_AGE_SECONDS", 30))
+    return time.time() - call_context.status_updated_at < max_age
+
+def apply_call_status(call_context: CallContext, status: str, sequence: Optional[int] = None):
+    """Record a call status in the call store and push it to the call's event stream."""
+    if not call_context.update_status(status, sequence):
+        return
+    call_sid = call_context.call_sid
+    call_event_bus.publish(call_sid, "status", {"status": call_context.current_status()})
+
+    if status in ENDED_CALL_STATUSES and call_context.playback is None:
+        # No media stream will finish this call, e.g. it was not answered
+        call_context.end_time = call_context.end_time or datetime.now().isoformat()
+        call_store.put(call_context)
+        call_event_bus.publish(call_sid, "end", call_context.summary())
+        call_store.finish(call_sid)
+    else:
+        call_store.put(call_context)
+
+def valid_twilio_signature(request: Request, params: Dict[str, str]) -> bool:
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN", "")
+    # On whenever the auth token to check signatures with is configured
+    validate = os.getenv("TWILIO_VALIDATE_CALLBACKS", "true" if auth_token else "false")
+    if validate.lower() != "true":
+        return True
+    validator = RequestValidator(auth_token)
+    # Behind a proxy the request URL differs from the one Twilio signed
+    url = f"https://{os.getenv('SERVER')}{request.url.path}"
+    return validator.validate(url, params, request.headers.get("x-twilio-signature", ""))
+
+# Webhook called by Twilio when the status of a call changes
+@app.post("/status_callback")
+async def status_callback(request: Request):
+    """Update the cached status of a call."""
+    # Twilio posts form encoded parameters, and signs the empty ones too
+    form = parse_qs((await request.body()).decode("utf-8"), keep_blank_values=True)
+    params = {key: values[0] for key, values in form.items()}
+    if not valid_twilio_signature(request, params):
+        logger.warning("Rejected status callback with an invalid signature")
+        return Response(status_code=403)
+
+    call_sid = params.get("CallSid")
+    status = params.get("CallStatus")
+    if not call_sid or not status:
+        return Response(status_code=400)
+
+    call_context = call_store.get(call_sid)
+    if not call_context:
+        # Not a call of this server, or one that was evicted; /call_status asks Twilio
+        logger.info(f"Status callback for unknown call {call_sid}: {status}")
+        return Response(status_code=204)
+
+    sequence = params.get("SequenceNumber")
+    logger.info(f"Twilio -> Call {call_sid} is {status}")
+    apply_call_status(call_context, status, int(sequence) if sequence and sequence.isdigit() else None)
+    return Response(status_code=204)
+
 # API route to end a call
 @app.post("/end_call")
 async def end_call(request: Dict[str, str]):
     """Get the status of a call."""
     try:
         call_sid = request.get("call_sid")
-        client = get_twilio_client()
-        client.calls(call_sid).update(status='completed')
+        await telephony_client.end_call(call_sid)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Error ending call {str(e)}")
@@ -249,7 +522,7 @@ async def end_call(request: Dict[str, str]):
 @app.get("/transcript/{call_sid}")
 async def get_transcript(call_sid: str):
     """Get the entire transcript for a specific call."""
-    call_context = call_contexts.get(call_sid)
+    call_context = call_store.get(call_sid)
 
     if not call_context:
         logger.info(f"[GET] Call not found for call SID: {call_sid}")
@@ -263,9 +536,9 @@ async def get_all_transcripts():
     """Get a list of all current call transcripts."""
     try:
         transcript_list = []
-        for call_sid, context in call_contexts.items():
+        for context in call_store.list():
             transcript_list.append({
-                "call_sid": call_sid,
+                "call_sid": context.call_sid,
                 "transcript": context.user_context,
             })
         return {"transcripts": transcript_list}
@@ -273,6 +546,145 @@ async def get_all_transcripts():
         logger.error(f"Error fetching all transcripts: {str(e)}")
         return {"error": f"Failed to fetch all transcripts: {str(e)}"}
 
+def encode_cursor(call_context: CallContext) -> str:
+    key = json.dumps([call_context.start_time or "", call_context.call_sid])
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    start_time, call_sid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return str(start_time), str(call_sid)
+
+def cacheable_json(request: Request, content: Any) -> Response:
+    """JSON response with an ETag, answered with 304 Not Modified if the client has it already."""
+    body = json.dumps(content, default=str).encode("utf-8")
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+# API route to list calls a page at a time
+@app.get("/transcripts")
+async def list_transcripts(
+    request: Request,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    status: Optional[str] = None,
+    view: str = "summary"
+):
+    """Get a page of calls, newest first, filtered by start time and status."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except Exception:
+        return {"error": "Invalid cursor"}
+    if view not in ("summary", "full"):
+        return {"error": "view must be 'summary' or 'full'"}
+
+    limit = max(1, min(limit, 100))
+    calls = call_store.page(limit + 1, after=after, since=since, until=until, status=status)
+    transcripts = []
+    for call_context in calls[:limit]:
+        entry = call_context.summary()
+        if view == "full":
+            entry["transcript"] = call_context.user_context
+        transcripts.append(entry)
+
+    return cacheable_json(request, {
+        "transcripts": transcripts,
+        "next_cursor": encode_cursor(calls[limit - 1]) if len(calls) > limit else None
+    })
+
+# API route to get the full transcript of one call
+@app.get("/transcripts/{call_sid}")
+async def get_call_transcript(request: Request, call_sid: str):
+    """Get the summary and the entire transcript of a call."""
+    call_context = call_store.get(call_sid)
+    if not call_context:
+        return {"error": "Call not found"}
+
+    content = call_context.summary()
+    content["transcript"] = call_context.user_context
+    return cacheable_json(request, content)
+
+# API route to follow a call live
+@app.get("/events/{call_sid}")
+async def get_call_events(request: Request, call_sid: str):
+    """Stream transcript changes and status changes of a call as server-sent events."""
+    call_context = call_store.get(call_sid)
+    if not call_context:
+        # Also the answer of workers that do not handle the call, the client falls back to polling
+        return JSONResponse({"error": "Call not found"}, status_code=404)
+
+    keepalive = float(os.getenv("CALL_EVENTS_KEEPALIVE_SECONDS", 15))
+    # Subscribe before taking the snapshot so no change is missed in between
+    queue = call_event_bus.subscribe(call_sid)
+
+    async def stream():
+        try:
+            snapshot = call_context.summary()
+            snapshot["transcript"] = call_context.user_context
+            yield format_sse("snapshot", snapshot)
+            if call_context.end_time and call_context.playback is None:
+                # Already over, there is nothing more to follow
+                yield format_sse("end", call_context.summary())
+                return
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+                if event == "end":
+                    return
+        finally:
+            call_event_bus.unsubscribe(call_sid, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# API route to monitor the shared outbound HTTP connection pool
+@app.get("/http_pool_stats")
+async def get_http_pool_stats():
+    """Get usage counters for the shared outbound HTTP connection pool."""
+    return connection_manager.stats()
+
+# API route to monitor the synthesized audio cache
+@app.get("/tts_cache_stats")
+async def get_tts_cache_stats():
+    """Get hit and size counters for the synthesized audio cache."""
+    return tts_cache.stats()
+
+# API route to monitor WhatsApp deliveries
+@app.get("/whatsapp_outbox_stats")
+async def get_whatsapp_outbox_stats():
+    """Get the number of WhatsApp messages in the outbox by delivery status."""
+    return await whatsapp_outbox.stats()
+
+# API route to monitor the call store
+@app.get("/call_store_stats")
+async def get_call_store_stats():
+    """Get the number of stored, active and evicted calls."""
+    return call_store.stats()
+
+# API route to monitor live call event subscribers
+@app.get("/call_events_stats")
+async def get_call_events_stats():
+    """Get the number of event stream subscribers and events dropped for slow ones."""
+    return call_event_bus.stats()
+
+# API route to monitor speculative LLM generation
+@app.get("/speculation_stats")
+async def get_speculation_stats():
+    """Get hit rate and time saved by speculative LLM generation."""
+    return speculation_stats.as_dict()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,77 @@
+"""
+Microbenchmarks for services/audio.py.
+
+Run from the repository root:
+    python benchmarks/audio_bench.py [--seconds 10] [--repeat 20]
+
+Each operation is timed on a clip of the given length and reported as the best
+time per run and as a multiple of real time. Where audioop is available (Python
+before 3.13) it is timed alongside as a reference.
+"""
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import audio  # noqa: E402
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+
+def bench(name, func, repeat, seconds):
+    number = 10
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{name:<28} {best * 1e6:>10.1f} us  {seconds / best:>10.0f}x real time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mulaw audio helpers")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the test clip")
+    parser.add_argument("--repeat", type=int, default=20, help="timing repetitions per operation")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    length = audio.ms_to_bytes(args.seconds * 1000)
+    mulaw = rng.integers(0, 256, length, dtype=np.uint8).tobytes()
+    pcm = audio.decode(mulaw)
+    pcm_bytes = pcm.tobytes()
+    pcm_16k = audio.resample(pcm, audio.SAMPLE_RATE, 16000)
+    half = len(mulaw) // 2
+
+    print(f"{args.seconds:g}s of 8kHz mulaw ({length} bytes), best of {args.repeat}\n")
+    cases = [
+        ("decode", lambda: audio.decode(mulaw)),
+        ("encode", lambda: audio.encode(pcm)),
+        ("rms", lambda: audio.rms(mulaw)),
+        ("peak", lambda: audio.peak(mulaw)),
+        ("frame_rms_dbfs (20ms)", lambda: audio.frame_rms_dbfs(mulaw, 160)),
+        ("apply_gain", lambda: audio.apply_gain(mulaw, -6)),
+        ("concat (50 chunks)", lambda: audio.concat(memoryview(mulaw)[i:i + length // 50] for i in range(0, length, length // 50))),
+        ("crossfade (10ms)", lambda: audio.crossfade(mulaw[:half], mulaw[half:], 10)),
+        ("resample 8k -> 16k", lambda: audio.resample(pcm, audio.SAMPLE_RATE, 16000)),
+        ("pcm16_to_mulaw (16k)", lambda: audio.pcm16_to_mulaw(pcm_16k.tobytes(), 16000)),
+    ]
+    if audioop is not None:
+        cases += [
+            ("audioop.ulaw2lin", lambda: audioop.ulaw2lin(mulaw, 2)),
+            ("audioop.lin2ulaw", lambda: audioop.lin2ulaw(pcm_bytes, 2)),
+            ("audioop.rms", lambda: audioop.rms(audioop.ulaw2lin(mulaw, 2), 2)),
+            ("audioop.ratecv 8k -> 16k", lambda: audioop.ratecv(pcm_bytes, 2, 1, audio.SAMPLE_RATE, 16000, None)),
+        ]
+
+    for name, func in cases:
+        bench(name, func, args.repeat, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,13 @@
-import os
-from twilio.rest import Client
-import asyncio
+from services.call_control import hang_up, start_action
+from services.telephony import ENDED_CALL_STATUSES
 
 async def end_call(context, args):
-    # Retrieve the Twilio credentials from environment variables
-    account_sid = os.environ['TWILIO_ACCOUNT_SID']
-    auth_token = os.environ['TWILIO_AUTH_TOKEN']
-    client = Client(account_sid, auth_token)
-    call_sid = context.call_sid
+    # A status callback may already have reported the end of the call
+    if context.final_status in ENDED_CALL_STATUSES:
+        return f"Call already ended with status: {context.final_status}"
 
-    # Fetch the call
-    call = client.calls(call_sid).fetch()
+    # Hung up in the background once the goodbye has been played, so a barge-in cannot stop it
+    if not start_action(context.call_sid, hang_up(context)):
+        return "The call is already ending."
 
-    # Check if the call is already completed
-    if call.status in ['completed', 'failed', 'busy', 'no-answer', 'canceled']:
-        return f"Call already ended with status: {call.status}"
-
-    # Wait for 5 seconds before ending the call to ensure the goodbye goes through
-    await asyncio.sleep(5)
-
-    # End the call
-    call = client.calls(call_sid).update(status='completed')
-
-    return f"Call ended successfully. Final status: {call.status}"
\ No newline at end of file
+    return "Ending the call once the goodbye has been played."
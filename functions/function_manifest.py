@@ -5,6 +5,8 @@ tools = [
             "name": "transfer_call",
             "description": "Transfers the current call to another number",
             "say": "Please hold while I transfer your call.",
+            # Only starts the transfer, which runs in the background; never cut off
+            "timeout": None,
             "parameters": {
                 "type": "object",
                 "properties": {},
@@ -18,6 +20,8 @@ tools = [
             "name": "end_call",
             "description": "Ends the current call",
             "say": "Well then, thank you so much for your time. It was a pleasure speaking with you. Have a great day!",
+            # Only starts the hangup, which runs in the background; never cut off
+            "timeout": None,
             "parameters": {
                 "type": "object",
                 "properties": {},
@@ -31,6 +35,7 @@ tools = [
             "name": "send_whatsapp",
             "description": "Sends a WhatsApp message to the user's number",
             "say": "Great, I'll send you the appointment details over WhatsApp.",
+            "timeout": 5,
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -45,3 +50,16 @@ tools = [
         "type": "function"
     }
 ]
+
+# Fixed replies the agent speaks around tool calls
+responses = {
+    "whatsapp_already_sent": "I've already sent you the confirmation message. Is there anything else I can help you with?",
+    "whatsapp_sent": "I've sent you the confirmation. Is there anything else I can assist you with?",
+    "whatsapp_queued": "I'm sending you the confirmation on WhatsApp, it should reach you shortly. Is there anything else I can assist you with?",
+    "goodbye": "Thank you for your time. Looking forward to meeting you!"
+}
+
+
+def fixed_phrases():
+    """Return every phrase that is spoken verbatim, for pre-populating the TTS cache."""
+    return [tool['function']['say'] for tool in tools] + list(responses.values())
@@ -1,29 +1,12 @@
 import os
-from twilio.rest import Client
-import asyncio
+
+from services.call_control import redirect, start_action
 
 async def transfer_call(context, args):
-    # Retrieve the active call using the CallSid
-    account_sid = os.environ['TWILIO_ACCOUNT_SID']
-    auth_token = os.environ['TWILIO_AUTH_TOKEN']
     transfer_number = os.environ['TRANSFER_NUMBER']
 
-    client = Client(account_sid, auth_token)
-    call_sid = context.call_sid
-
-    # Wait for 10 seconds before transferring the call
-    await asyncio.sleep(8)
-
-    try:
-        call = client.calls(call_sid).fetch()
-        
-        # Update the call with the transfer number
-        call = client.calls(call_sid).update(
-            url=f'http://twimlets.com/forward?PhoneNumber={transfer_number}',
-            method='POST'
-        )
-            
-        return f"Call transferred."
+    # Forwarded in the background once the announcement has been played, so a barge-in cannot stop it
+    if not start_action(context.call_sid, redirect(context, f'http://twimlets.com/forward?PhoneNumber={transfer_number}')):
+        return "Error transferring call: the call is already ending or being transferred."
 
-    except Exception as e:
-        return f"Error transferring call: {str(e)}"
\ No newline at end of file
+    return "Transferring the call once the announcement has been played."
@@ -0,0 +1,230 @@
+"""
+Vectorized helpers for the 8kHz mulaw audio exchanged with Twilio.
+
+Mulaw is converted to and from 16-bit PCM through lookup tables. Inputs may be any
+bytes-like object (bytes, bytearray, memoryview); they are wrapped with
+np.frombuffer instead of being copied.
+"""
+from functools import lru_cache
+from typing import Iterable, Union
+
+import numpy as np
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+SAMPLE_RATE = 8000
+# 8kHz mulaw is one byte per sample
+BYTES_PER_MS = SAMPLE_RATE // 1000
+# Mulaw code of a zero sample
+MULAW_SILENCE = 0xFF
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32639
+
+
+def _build_mulaw_decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = ((codes >> 4) & 0x07).astype(np.int32)
+    mantissa = (codes & 0x0F).astype(np.int32)
+    magnitude = (((mantissa << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    return np.where(sign, -magnitude, magnitude).astype(np.int16)
+
+
+def _build_mulaw_encode_table() -> np.ndarray:
+    # Indexed by the unsigned 16-bit view of a PCM16 sample. Follows the 14-bit
+    # G.711 reference encoder, so results match audioop.lin2ulaw.
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.minimum(np.abs(samples), MULAW_CLIP >> 2) + (MULAW_BIAS >> 2), 0x1FFF)
+    # frexp returns the bit length of an integer as its exponent
+    segment = np.frexp((magnitude >> 6).astype(np.float64))[1]
+    mantissa = (magnitude >> (segment + 1)) & 0x0F
+    return (((segment << 4) | mantissa) ^ mask).astype(np.uint8)
+
+
+MULAW_DECODE_TABLE = _build_mulaw_decode_table()
+MULAW_ENCODE_TABLE = _build_mulaw_encode_table()
+
+
+def ms_to_bytes(ms: float) -> int:
+    return int(ms * BYTES_PER_MS)
+
+
+def bytes_to_ms(length: int) -> float:
+    return length / BYTES_PER_MS
+
+
+def as_mulaw_array(audio: BytesLike) -> np.ndarray:
+    """Returns a read-only uint8 view of mulaw audio, without copying it."""
+    return np.frombuffer(audio, dtype=np.uint8)
+
+
+def decode(audio: BytesLike) -> np.ndarray:
+    """
+    Decodes mulaw audio to PCM16.
+
+    Args:
+        audio (BytesLike): Mulaw audio.
+
+    Returns:
+        np.ndarray: int16 samples.
+    """
+    # take() is faster than fancy indexing for table lookups
+    return MULAW_DECODE_TABLE.take(as_mulaw_array(audio))
+
+
+def encode(samples: np.ndarray) -> bytes:
+    """
+    Encodes PCM16 samples as mulaw.
+
+    Args:
+        samples (np.ndarray): int16 samples.
+
+    Returns:
+        bytes: Mulaw audio.
+    """
+    samples = np.asarray(samples, dtype=np.int16)
+    return MULAW_ENCODE_TABLE.take(samples.view(np.uint16)).tobytes()
+
+
+def decode_pcm16(pcm: BytesLike) -> np.ndarray:
+    """Returns a view of little-endian PCM16 bytes as int16 samples."""
+    return np.frombuffer(pcm, dtype="<i2")
+
+
+def to_float(samples: np.ndarray) -> np.ndarray:
+    return samples.astype(np.float32) / 32768.0
+
+
+def from_float(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(samples * 32768.0), -32768, 32767).astype(np.int16)
+
+
+def rms(audio: BytesLike) -> float:
+    """Root mean square level of mulaw audio, relative to full scale."""
+    if not len(audio):
+        return 0.0
+    samples = decode(audio).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples)) / 32768.0)
+
+
+def peak(audio: BytesLike) -> float:
+    """Peak level of mulaw audio, relative to full scale."""
+    if not len(audio):
+        return 0.0
+    samples = decode(audio)
+    return float(np.max(np.abs(samples.astype(np.int32))) / 32768.0)
+
+
+def to_dbfs(level: float) -> float:
+    return float(20 * np.log10(max(level, 1.0 / 32768.0)))
+
+
+def frame_rms_dbfs(audio: BytesLike, frame_bytes: int) -> np.ndarray:
+    """
+    Measures the level of consecutive frames of mulaw audio.
+
+    Args:
+        audio (BytesLike): Mulaw audio; a trailing partial frame is ignored.
+        frame_bytes (int): Frame length in bytes.
+
+    Returns:
+        np.ndarray: RMS level of each frame in dBFS.
+    """
+    codes = as_mulaw_array(audio)
+    frames = len(codes) // frame_bytes
+    samples = MULAW_DECODE_TABLE.take(codes[:frames * frame_bytes].reshape(frames, frame_bytes)).astype(np.float32)
+    level = np.sqrt(np.mean(samples * samples, axis=1))
+    return 20 * np.log10(np.maximum(level, 1.0) / 32768.0)
+
+
+@lru_cache(maxsize=64)
+def gain_table(gain_db: float) -> np.ndarray:
+    """Mulaw to mulaw lookup table applying a fixed gain."""
+    factor = 10 ** (gain_db / 20)
+    samples = MULAW_DECODE_TABLE.astype(np.float32) * factor
+    samples = np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+    return MULAW_ENCODE_TABLE.take(samples.view(np.uint16))
+
+
+def apply_gain(audio: BytesLike, gain_db: float) -> bytes:
+    """
+    Changes the level of mulaw audio, clipping at full scale.
+
+    Args:
+        audio (BytesLike): Mulaw audio.
+        gain_db (float): Gain in dB, negative to attenuate.
+
+    Returns:
+        bytes: Mulaw audio.
+    """
+    # Rounded so that the table cache is shared by nearby gains
+    return gain_table(round(gain_db, 1)).take(as_mulaw_array(audio)).tobytes()
+
+
+def concat(chunks: Iterable[BytesLike]) -> bytes:
+    """Joins mulaw chunks with a single copy."""
+    return b"".join(chunks)
+
+
+def crossfade(first: BytesLike, second: BytesLike, duration_ms: float = 10) -> bytes:
+    """
+    Joins two mulaw clips, overlapping the end of the first with the start of the second.
+
+    Args:
+        first (BytesLike): Mulaw audio that fades out.
+        second (BytesLike): Mulaw audio that fades in.
+        duration_ms (float): Length of the overlap; limited by the shorter clip.
+
+    Returns:
+        bytes: Mulaw audio, shorter than the two clips by the overlap.
+    """
+    overlap = min(ms_to_bytes(duration_ms), len(first), len(second))
+    if overlap == 0:
+        return concat((first, second))
+
+    first_view = memoryview(first).cast("B")
+    second_view = memoryview(second).cast("B")
+    fade_in = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+    tail = decode(first_view[len(first_view) - overlap:]).astype(np.float32)
+    head = decode(second_view[:overlap]).astype(np.float32)
+    mixed = np.clip(np.rint(tail * (1 - fade_in) + head * fade_in), -32768, 32767).astype(np.int16)
+    return concat((first_view[:len(first_view) - overlap], encode(mixed), second_view[overlap:]))
+
+
+def silence(duration_ms: float) -> bytes:
+    return bytes([MULAW_SILENCE]) * ms_to_bytes(duration_ms)
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resamples PCM16 audio with linear interpolation.
+
+    Good enough for speech going to or from the 8kHz phone line; it does not low-pass
+    filter, so content above the new Nyquist frequency aliases when downsampling.
+
+    Args:
+        samples (np.ndarray): int16 samples.
+        from_rate (int): Sample rate of the input.
+        to_rate (int): Sample rate of the output.
+
+    Returns:
+        np.ndarray: int16 samples at to_rate.
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples
+    length = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(length, dtype=np.float64) * (from_rate / to_rate)
+    resampled = np.interp(positions, np.arange(len(samples)), samples.astype(np.float32))
+    return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+
+
+def pcm16_to_mulaw(pcm: BytesLike, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Converts little-endian PCM16 audio at any rate to 8kHz mulaw."""
+    return encode(resample(decode_pcm16(pcm), sample_rate, SAMPLE_RATE))
+
+
+def mulaw_to_pcm16(audio: BytesLike, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Converts 8kHz mulaw audio to little-endian PCM16 at any rate."""
+    return resample(decode(audio), SAMPLE_RATE, sample_rate).astype("<i2").tobytes()
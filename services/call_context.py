@@ -1,6 +1,12 @@
-from typing import List, Optional, Dict
+import time
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
+from services.telephony import ENDED_CALL_STATUSES
+
+# Runtime state that is not part of a stored call
+TRANSIENT_FIELDS = {"playback"}
+
 
 class CallContext:
     """Store context for the current call."""
@@ -14,10 +20,20 @@ class CallContext:
         self.start_time: Optional[str] = None
         self.end_time: Optional[str] = None
         self.final_status: Optional[str] = None
+        # Latest status reported by Twilio, when it was received and the callback's sequence number
+        self.twilio_status: Optional[str] = None
+        self.status_updated_at: Optional[float] = None
+        self.status_sequence: int = -1
+        # Set while the media stream is connected, see services/playback_tracker.py
+        self.playback = None
         
         # Appointment tracking
         self.appointment_scheduled: bool = False
         self.whatsapp_sent: bool = False
+        # Delivery of the confirmation through the WhatsApp outbox: queued, sent or failed
+        self.whatsapp_message_id: Optional[int] = None
+        self.whatsapp_status: Optional[str] = None
+        self.whatsapp_error: Optional[str] = None
         self.appointment_date: Optional[str] = None
         self.appointment_time: Optional[str] = None
         self.user_name: Optional[str] = None
@@ -32,6 +48,72 @@ class CallContext:
         self.last_response_was_no: bool = False
         
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the call's data as JSON serializable values, for storing it."""
+        return {key: value for key, value in vars(self).items() if key not in TRANSIENT_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CallContext":
+        """Recreate a call context from the output of to_dict."""
+        context = cls()
+        for key, value in data.items():
+            if hasattr(context, key) and key not in TRANSIENT_FIELDS:
+                setattr(context, key, value)
+        return context
+
+    def current_status(self) -> str:
+        """Return the final Twilio status of the call if known, otherwise its latest state."""
+        if self.final_status:
+            return self.final_status
+        if self.end_time:
+            return "completed"
+        if self.playback is not None:
+            # The media stream is connected, whatever callbacks are still on their way
+            return "in-progress"
+        return self.twilio_status or "in-progress"
+
+    def update_status(self, status: str, sequence: Optional[int] = None) -> bool:
+        """
+        Record a status reported by Twilio.
+
+        Status callbacks may arrive out of order, so a callback with a lower sequence
+        number than one already applied is ignored.
+
+        Returns:
+            bool: Whether the status was applied.
+        """
+        if sequence is not None:
+            if sequence <= self.status_sequence:
+                return False
+            self.status_sequence = sequence
+        self.twilio_status = status
+        self.status_updated_at = time.time()
+        if status in ENDED_CALL_STATUSES:
+            self.final_status = status
+        return True
+
+    def outcome(self) -> str:
+        """Return what the call achieved."""
+        if self.whatsapp_sent:
+            return "appointment_confirmed"
+        if self.appointment_scheduled:
+            return "appointment_scheduled"
+        if self.conversation_ended:
+            return "conversation_ended"
+        return "none"
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the fields listed for the call, without the transcript."""
+        return {
+            "call_sid": self.call_sid,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "status": self.current_status(),
+            "outcome": self.outcome(),
+            # Caller turns, not counting the greeting prompt
+            "turns": sum(1 for entry in self.user_context if entry.get("name") == "user"),
+        }
+
     def update_appointment_details(self, details: Dict[str, str]) -> bool:
         """Update appointment details and validate them."""
         try:
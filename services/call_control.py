@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Coroutine, Dict
+
+from logger_config import get_logger
+from services.playback_tracker import wait_for_playback
+from services.telephony import ENDED_CALL_STATUSES, telephony_client
+
+logger = get_logger("CallControl")
+
+# Hangups and transfers in flight by call SID, also keeping their tasks referenced
+pending_actions: Dict[str, asyncio.Task] = {}
+
+
+def start_action(call_sid: str, coro: Coroutine) -> bool:
+    """
+    Runs the terminal call control action of a call, a hangup or a transfer, in the background.
+
+    The action is not part of the turn that requested it, so a barge-in or a tool
+    timeout cannot cancel it halfway and leave the call up. A call gets one action
+    only; later requests are dropped while one is in flight.
+
+    Returns:
+        bool: False if an action was already in flight for the call.
+    """
+    if call_sid in pending_actions:
+        coro.close()
+        return False
+    task = asyncio.create_task(coro)
+    pending_actions[call_sid] = task
+    task.add_done_callback(lambda _: pending_actions.pop(call_sid, None))
+    return True
+
+
+async def hang_up(context: Any):
+    """Hangs up once the goodbye has been played."""
+    call_sid = context.call_sid
+    await wait_for_playback(context)
+    try:
+        call = await telephony_client.fetch_call(call_sid)
+        if call["status"] in ENDED_CALL_STATUSES:
+            logger.info(f"Call {call_sid} already ended with status: {call['status']}")
+            return
+        call = await telephony_client.end_call(call_sid)
+        logger.info(f"Call {call_sid} ended. Final status: {call['status']}")
+    except Exception as e:
+        logger.error(f"Error ending call {call_sid}: {str(e)}")
+
+
+async def redirect(context: Any, url: str):
+    """Redirects the call, e.g. to transfer it, once the announcement has been played."""
+    call_sid = context.call_sid
+    await wait_for_playback(context)
+    try:
+        await telephony_client.redirect_call(call_sid, url=url, method='POST')
+        logger.info(f"Call {call_sid} redirected to {url}")
+    except Exception as e:
+        logger.error(f"Error redirecting call {call_sid}: {str(e)}")
+
+
+async def drain_actions():
+    """Waits for the actions in flight, e.g. before shutting down."""
+    if pending_actions:
+        await asyncio.gather(*list(pending_actions.values()), return_exceptions=True)
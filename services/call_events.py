@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Set, Tuple
+
+# An event as queued for subscribers: (event name, data)
+CallEvent = Tuple[str, Dict[str, Any]]
+
+
+class CallEventBus:
+    """
+    Pushes live changes of calls to subscribers, e.g. the UI's event stream.
+
+    Publishing never waits: every subscriber has a queue of CALL_EVENTS_QUEUE_SIZE
+    events, and a subscriber that falls behind loses its oldest events rather than
+    holding up the call pipeline. Events are only seen by subscribers of the worker
+    that handles the call.
+    """
+
+    def __init__(self):
+        self.queue_size = int(os.getenv("CALL_EVENTS_QUEUE_SIZE", 100))
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.dropped = 0
+
+    def subscribe(self, call_sid: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(call_sid, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, call_sid: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(call_sid)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[call_sid]
+
+    def publish(self, call_sid: str, event: str, data: Dict[str, Any]):
+        for queue in self.subscribers.get(call_sid, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait((event, data))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": len(self.subscribers),
+            "subscribers": sum(len(queues) for queues in self.subscribers.values()),
+            "dropped": self.dropped,
+        }
+
+
+class TranscriptPublisher:
+    """
+    Publishes the changes of one call's transcript as 'transcript' events.
+
+    The transcript is compared with what was published last; an event carries the
+    index of the first changed entry and every entry from there on, so appended turns
+    and replies truncated by a barge-in are both sent as a short delta. Applying an
+    event twice gives the same transcript.
+    """
+
+    def __init__(self, bus: CallEventBus, call_sid: str):
+        self.bus = bus
+        self.call_sid = call_sid
+        self.published: List[Dict[str, Any]] = []
+
+    def sync(self, transcript: List[Dict[str, Any]]):
+        start = 0
+        for published, entry in zip(self.published, transcript):
+            if published != entry:
+                break
+            start += 1
+        if start == len(transcript) == len(self.published):
+            return
+
+        entries = [dict(entry) for entry in transcript[start:]]
+        self.published = self.published[:start] + entries
+        self.bus.publish(self.call_sid, "transcript", {"start": start, "entries": entries})
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+call_event_bus = CallEventBus()
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import sqlite3
+import ssl
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from logger_config import get_logger
+
+logger = get_logger("CallSetup")
+
+
+class AbstractCallSetupStore(ABC):
+    """
+    Hands the setup of a call started by /start_call to whichever worker receives its
+    media stream.
+
+    With several uvicorn workers or hosts, the websocket of a call often lands on a
+    different process than the request that started it. The setup data, i.e. the
+    messages and details given for the call, is published by call SID and claimed by
+    the worker that accepts the stream. Entries expire after CALL_SETUP_TTL_SECONDS,
+    so calls that are never answered do not pile up.
+    """
+
+    def __init__(self):
+        self.ttl = int(os.getenv("CALL_SETUP_TTL_SECONDS", 3600))
+
+    @abstractmethod
+    async def publish(self, call_sid: str, setup: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    async def claim(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns and removes the setup of a call, so it is handed out once.
+
+        Returns None for a call that was not set up here, e.g. an inbound one.
+        """
+        pass
+
+    async def close(self):
+        pass
+
+
+class InMemoryCallSetupStore(AbstractCallSetupStore):
+    """Process local setup data, for running a single worker."""
+
+    def __init__(self):
+        super().__init__()
+        self.setups: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    async def publish(self, call_sid: str, setup: Dict[str, Any]):
+        now = time.monotonic()
+        self.setups = {sid: entry for sid, entry in self.setups.items() if entry[0] > now}
+        self.setups[call_sid] = (now + self.ttl, setup)
+
+    async def claim(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        expires_at, setup = self.setups.pop(call_sid, (0, None))
+        return setup if expires_at > time.monotonic() else None
+
+
+class SQLiteCallSetupStore(AbstractCallSetupStore):
+    """
+    Setup data in a SQLite file, shared by the workers of one host.
+
+    Queries run on a thread of the store's own, so waiting for the write lock of
+    another worker never blocks the event loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.path = os.getenv("CALL_SETUP_PATH", "cache/call_setup.sqlite3")
+        self.db: Optional[sqlite3.Connection] = None
+        # One thread, which owns the connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="call-setup")
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS call_setup (call_sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        return self.db
+
+    async def run_db(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def write(self, call_sid: str, data: str):
+        now = time.time()
+        db = self.connect()
+        db.execute("DELETE FROM call_setup WHERE expires_at <= ?", (now,))
+        db.execute(
+            "INSERT OR REPLACE INTO call_setup (call_sid, data, expires_at) VALUES (?, ?, ?)",
+            (call_sid, data, now + self.ttl)
+        )
+
+    def take(self, call_sid: str) -> Optional[str]:
+        db = self.connect()
+        # Workers may claim the same call at once, only one of them may get it
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT data FROM call_setup WHERE call_sid = ? AND expires_at > ?", (call_sid, time.time())
+            ).fetchone()
+            db.execute("DELETE FROM call_setup WHERE call_sid = ?", (call_sid,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def close_db(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    async def publish(self, call_sid: str, setup: Dict[str, Any]):
+        await self.run_db(self.write, call_sid, json.dumps(setup))
+
+    async def claim(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        data = await self.run_db(self.take, call_sid)
+        return json.loads(data) if data is not None else None
+
+    async def close(self):
+        await self.run_db(self.close_db)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisReplyError(RedisError):
+    """An error reply from the server, which leaves the connection usable."""
+    pass
+
+
+class RedisClient:
+    """
+    Minimal asyncio client for the Redis protocol (RESP2).
+
+    Supports just what the call setup store needs: one connection, opened lazily from a
+    redis:// or rediss:// URL with optional password and database, and commands sent
+    one at a time. A failed connection is reopened on the next command.
+    """
+
+    def __init__(self, url: str, timeout: float = 5):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.ssl = ssl.create_default_context() if parsed.scheme == "rediss" else None
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.lock = asyncio.Lock()
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), timeout=self.timeout
+        )
+        if self.password:
+            credentials = [self.username, self.password] if self.username else [self.password]
+            await self.send("AUTH", *credentials)
+        if self.database:
+            await self.send("SELECT", self.database)
+
+    async def execute(self, *args: Any) -> Any:
+        async with self.lock:
+            opening = self.writer is None
+            try:
+                if opening:
+                    await self.open()
+                return await asyncio.wait_for(self.send(*args), timeout=self.timeout)
+            except RedisReplyError:
+                if opening:
+                    # Never keep a connection that failed to authenticate
+                    self.drop()
+                raise
+            except BaseException as e:
+                # Anything else, including being cancelled between sending a command and
+                # reading its reply, may leave a reply on the connection that the next
+                # command would read as its own
+                self.drop()
+                if isinstance(e, (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError)):
+                    raise RedisError(f"Redis {args[0]} failed: {e!r}") from e
+                raise
+
+    async def send(self, *args: Any) -> Any:
+        parts = [str(arg).encode("utf-8") if not isinstance(arg, bytes) else arg for arg in args]
+        command = b"*%d\r\n" % len(parts) + b"".join(b"$%d\r\n%s\r\n" % (len(part), part) for part in parts)
+        self.writer.write(command)
+        await self.writer.drain()
+        return await self.read_reply()
+
+    async def read_reply(self) -> Any:
+        line = await self.reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisReplyError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [await self.read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply from Redis: {line!r}")
+
+    def drop(self) -> Optional[asyncio.StreamWriter]:
+        writer, self.reader, self.writer = self.writer, None, None
+        if writer is not None:
+            writer.close()
+        return writer
+
+    async def close(self):
+        writer = self.drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+class RedisCallSetupStore(AbstractCallSetupStore):
+    """Setup data in Redis, shared by workers on any number of hosts."""
+
+    def __init__(self):
+        super().__init__()
+        self.client = RedisClient(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            timeout=float(os.getenv("REDIS_TIMEOUT_SECONDS", 5))
+        )
+        self.prefix = os.getenv("CALL_SETUP_KEY_PREFIX", "ai-dialer:call-setup:")
+
+    async def publish(self, call_sid: str, setup: Dict[str, Any]):
+        await self.client.execute("SET", self.prefix + call_sid, json.dumps(setup), "EX", self.ttl)
+
+    async def claim(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        # GETDEL needs Redis 6.2 or later
+        data = await self.client.execute("GETDEL", self.prefix + call_sid)
+        return json.loads(data) if data is not None else None
+
+    async def close(self):
+        await self.client.close()
+
+
+class CallSetupFactory:
+    @staticmethod
+    def get_call_setup_store(backend: str) -> AbstractCallSetupStore:
+        if backend.lower() == "memory":
+            return InMemoryCallSetupStore()
+        elif backend.lower() == "sqlite":
+            return SQLiteCallSetupStore()
+        elif backend.lower() == "redis":
+            return RedisCallSetupStore()
+        else:
+            raise ValueError(f"Unsupported call setup backend: {backend}")
+
+
+call_setup_store = CallSetupFactory.get_call_setup_store(os.getenv("CALL_SETUP_BACKEND", "memory"))
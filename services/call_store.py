@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from logger_config import get_logger
+from services.call_context import CallContext
+from services.telephony import ENDED_CALL_STATUSES
+
+logger = get_logger("CallStore")
+
+# Position of a call in listings, which are ordered newest first: (start_time, call_sid)
+CallKey = Tuple[str, str]
+
+
+def call_key(call_context: CallContext) -> CallKey:
+    return call_context.start_time or "", call_context.call_sid or ""
+
+
+def matches(call_context: CallContext, after: Optional[CallKey], since: Optional[str], until: Optional[str], status: Optional[str]) -> bool:
+    start_time = call_context.start_time or ""
+    return (
+        (after is None or call_key(call_context) < after)
+        and (since is None or start_time >= since)
+        and (until is None or start_time < until)
+        and (status is None or call_context.current_status() == status)
+    )
+
+
+class AbstractCallStore(ABC):
+    """
+    Stores the CallContext of every call by call SID.
+
+    A call is active from the time it is stored until `finish` is called when its
+    media stream ends. Active calls are the live objects the call pipeline mutates,
+    while finished calls may be evicted or persisted, depending on the store.
+    """
+
+    @abstractmethod
+    def get(self, call_sid: str) -> Optional[CallContext]:
+        pass
+
+    @abstractmethod
+    def put(self, call_context: CallContext):
+        """Stores a call, or the changes made to a finished one."""
+        pass
+
+    @abstractmethod
+    def finish(self, call_sid: str):
+        pass
+
+    @abstractmethod
+    def list(self) -> List[CallContext]:
+        """Returns every stored call, newest first."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        pass
+
+    def page(
+        self,
+        limit: int,
+        after: Optional[CallKey] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[CallContext]:
+        """
+        Returns one page of calls, newest first.
+
+        Args:
+            limit (int): Maximum number of calls.
+            after (Optional[CallKey]): Key of the last call of the previous page.
+            since (Optional[str]): Only calls started at or after this ISO time.
+            until (Optional[str]): Only calls started before this ISO time.
+            status (Optional[str]): Only calls with this status, see CallContext.current_status.
+
+        Returns:
+            List[CallContext]: The calls of the page.
+        """
+        calls = [call_context for call_context in self.list() if matches(call_context, after, since, until, status)]
+        calls.sort(key=call_key, reverse=True)
+        return calls[:limit]
+
+    def __contains__(self, call_sid: str) -> bool:
+        return self.get(call_sid) is not None
+
+    def close(self):
+        pass
+
+
+class InMemoryCallStore(AbstractCallStore):
+    """
+    Keeps calls in process memory.
+
+    Finished calls are evicted CALL_STORE_TTL_SECONDS after they ended, and the oldest
+    finished calls first once more than CALL_STORE_MAX_CALLS are stored. Calls that are
+    never finished, e.g. dialled but not answered, are evicted after
+    CALL_STORE_STALE_SECONDS once Twilio has reported them ended; a call with a media
+    stream attached or a status that is not final is still live and kept.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.getenv("CALL_STORE_TTL_SECONDS", 6 * 3600))
+        self.max_calls = int(os.getenv("CALL_STORE_MAX_CALLS", 1000))
+        self.stale_after = float(os.getenv("CALL_STORE_STALE_SECONDS", 4 * 3600))
+        self.calls: "OrderedDict[str, CallContext]" = OrderedDict()
+        self.stored_at: Dict[str, float] = {}
+        self.finished_at: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted = 0
+
+    def get(self, call_sid: str) -> Optional[CallContext]:
+        return self.calls.get(call_sid)
+
+    def put(self, call_context: CallContext):
+        call_sid = call_context.call_sid
+        if call_sid not in self.calls:
+            self.stored_at[call_sid] = time.monotonic()
+        self.calls[call_sid] = call_context
+        self.evict()
+
+    def finish(self, call_sid: str):
+        if call_sid in self.calls:
+            self.finished_at[call_sid] = time.monotonic()
+            self.finished_at.move_to_end(call_sid)
+        self.evict()
+
+    def remove(self, call_sid: str):
+        self.calls.pop(call_sid, None)
+        self.stored_at.pop(call_sid, None)
+        self.finished_at.pop(call_sid, None)
+        self.evicted += 1
+
+    def evict(self):
+        now = time.monotonic()
+        # finished_at is in the order calls finished, so expired calls are at the front
+        while self.finished_at and now - next(iter(self.finished_at.values())) > self.ttl:
+            self.remove(next(iter(self.finished_at)))
+        while len(self.calls) > self.max_calls and self.finished_at:
+            self.remove(next(iter(self.finished_at)))
+
+        stale = [
+            call_sid for call_sid, stored_at in self.stored_at.items()
+            if call_sid not in self.finished_at and now - stored_at > self.stale_after and self.is_ended(call_sid)
+        ]
+        for call_sid in stale:
+            logger.info(f"Evicting call {call_sid} that never finished")
+            self.remove(call_sid)
+
+    def is_ended(self, call_sid: str) -> bool:
+        call_context = self.calls[call_sid]
+        return call_context.playback is None and call_context.final_status in ENDED_CALL_STATUSES
+
+    def list(self) -> List[CallContext]:
+        return list(reversed(self.calls.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.calls),
+            "active": len(self.calls) - len(self.finished_at),
+            "finished": len(self.finished_at),
+            "evicted": self.evicted,
+        }
+
+
+class SQLiteCallStore(InMemoryCallStore):
+    """
+    Keeps active calls in memory and persists finished calls to SQLite.
+
+    A call is written to CALL_STORE_PATH when it finishes and then dropped from
+    memory, so transcripts survive restarts without the worker holding them all.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.path = os.getenv("CALL_STORE_PATH", "cache/calls.sqlite3")
+        self.db: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Also read by the stats route and shutdown, which may run on other threads
+            self.db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS calls (
+                    call_sid TEXT PRIMARY KEY,
+                    start_time TEXT,
+                    end_time TEXT,
+                    data TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(calls)")}
+            if "status" not in columns:
+                # Added for listing by status
+                self.db.execute("ALTER TABLE calls ADD COLUMN status TEXT")
+                # Calls are stored when their media stream ends
+                self.db.execute("UPDATE calls SET status = 'completed'")
+            self.db.execute("CREATE INDEX IF NOT EXISTS calls_by_start ON calls (start_time, call_sid)")
+        return self.db
+
+    def write(self, call_context: CallContext):
+        self.connect().execute(
+            "INSERT OR REPLACE INTO calls (call_sid, start_time, end_time, status, data, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                call_context.call_sid,
+                call_context.start_time,
+                call_context.end_time,
+                call_context.current_status(),
+                json.dumps(call_context.to_dict(), default=str),
+                time.time()
+            )
+        )
+
+    def read(self, call_sid: str) -> Optional[CallContext]:
+        row = self.connect().execute("SELECT data FROM calls WHERE call_sid = ?", (call_sid,)).fetchone()
+        return CallContext.from_dict(json.loads(row[0])) if row else None
+
+    def get(self, call_sid: str) -> Optional[CallContext]:
+        return self.calls.get(call_sid) or self.read(call_sid)
+
+    def put(self, call_context: CallContext):
+        if call_context.call_sid in self.calls:
+            super().put(call_context)
+        elif self.read(call_context.call_sid) is not None:
+            # Changes to a call that has already finished
+            self.write(call_context)
+        else:
+            super().put(call_context)
+
+    def finish(self, call_sid: str):
+        call_context = self.calls.get(call_sid)
+        if call_context is None:
+            return
+        self.write(call_context)
+        self.calls.pop(call_sid)
+        self.stored_at.pop(call_sid, None)
+
+    def list(self) -> List[CallContext]:
+        active = super().list()
+        active_sids = {call_context.call_sid for call_context in active}
+        rows = self.connect().execute("SELECT call_sid, data FROM calls ORDER BY start_time DESC").fetchall()
+        return active + [CallContext.from_dict(json.loads(data)) for call_sid, data in rows if call_sid not in active_sids]
+
+    def page(
+        self,
+        limit: int,
+        after: Optional[CallKey] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[CallContext]:
+        active = [
+            call_context for call_context in self.calls.values()
+            if matches(call_context, after, since, until, status)
+        ]
+        active_sids = {call_context.call_sid for call_context in active}
+
+        conditions, parameters = [], []
+        if after is not None:
+            conditions.append("(COALESCE(start_time, ''), call_sid) < (?, ?)")
+            parameters.extend(after)
+        if since is not None:
+            conditions.append("COALESCE(start_time, '') >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("COALESCE(start_time, '') < ?")
+            parameters.append(until)
+        if status is not None:
+            conditions.append("status = ?")
+            parameters.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connect().execute(
+            f"SELECT call_sid, data FROM calls {where} ORDER BY COALESCE(start_time, '') DESC, call_sid DESC LIMIT ?",
+            (*parameters, limit + len(active_sids))
+        ).fetchall()
+
+        calls = active + [CallContext.from_dict(json.loads(data)) for call_sid, data in rows if call_sid not in active_sids]
+        calls.sort(key=call_key, reverse=True)
+        return calls[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["persisted"] = self.connect().execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        return stats
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class CallStoreFactory:
+    @staticmethod
+    def get_call_store(store_name: str) -> AbstractCallStore:
+        if store_name.lower() == "memory":
+            return InMemoryCallStore()
+        elif store_name.lower() == "sqlite":
+            return SQLiteCallStore()
+        else:
+            raise ValueError(f"Unsupported call store: {store_name}")
+
+
+call_store = CallStoreFactory.get_call_store(os.getenv("CALL_STORE", "memory"))
@@ -0,0 +1,118 @@
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from logger_config import get_logger
+
+logger = get_logger("HTTP")
+
+
+class ConnectionManager:
+    """
+    Process-wide pool of keep-alive HTTP connections for outbound provider calls.
+
+    All TTS services and function tools share one aiohttp session, so DNS, TCP and
+    TLS setup is paid once per host instead of once per request.
+    """
+
+    def __init__(self):
+        self.limit = int(os.getenv("HTTP_POOL_LIMIT", 100))
+        self.limit_per_host = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 20))
+        self.keepalive_timeout = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60))
+        self.request_timeout = float(os.getenv("HTTP_REQUEST_TIMEOUT", 30))
+        self.warmup_urls = [
+            url.strip() for url in os.getenv(
+                "HTTP_WARMUP_URLS",
+                "https://api.elevenlabs.io,https://api.deepgram.com,http://api.textmebot.com"
+            ).split(",") if url.strip()
+        ]
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._connections_created = 0
+        self._connections_reused = 0
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session, creating it on first use.
+
+        Returns:
+            aiohttp.ClientSession: Session backed by the shared connection pool.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                trace_configs=[self._trace_config()]
+            )
+        return self._session
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self._requests[params.url.host] += 1
+
+        async def on_connection_create_end(session, context, params):
+            self._connections_created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self._connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def warm_up(self, timeout: float = 5):
+        """
+        Opens a connection to each configured host so the first call does not pay for setup.
+
+        Args:
+            timeout (float): Maximum seconds to spend on each host.
+        """
+        session = self.get_session()
+
+        async def touch(url):
+            try:
+                async with session.head(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    await response.release()
+                logger.info(f"Warmed up connection to {url}")
+            except Exception as e:
+                logger.warning(f"Could not warm up connection to {url}: {e}")
+
+        await asyncio.gather(*(touch(url) for url in self.warmup_urls))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        logger.info("HTTP connection pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns pool configuration and usage counters for monitoring.
+
+        Returns:
+            Dict[str, Any]: Limits, request counts per host and connection reuse counts.
+        """
+        return {
+            "open": self._session is not None and not self._session.closed,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "requests_per_host": dict(self._requests),
+            "connections_created": self._connections_created,
+            "connections_reused": self._connections_reused,
+        }
+
+
+connection_manager = ConnectionManager()
@@ -0,0 +1,121 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from logger_config import get_logger
+
+logger = get_logger("Memory")
+
+Summarizer = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    # Roughly four characters per token, plus the role and separators
+    return len(str(message.get("content", ""))) // 4 + 4
+
+
+class ConversationMemory:
+    """
+    Bounded view of a call's conversation for the LLM prompt.
+
+    The full transcript keeps growing, since it is also the transcript served by the
+    API, but only the last MEMORY_MAX_TURNS turns are sent verbatim. Older turns are
+    folded into a rolling summary by a background task started between turns, so a
+    reply never waits for summarization; until the summary is ready, the turns being
+    folded are still sent verbatim. MEMORY_TOKEN_BUDGET folds further turns when the
+    verbatim ones get too long.
+    """
+
+    def __init__(self, transcript: List[Dict[str, Any]], summarizer: Summarizer):
+        self.transcript = transcript
+        self.summarizer = summarizer
+        self.max_turns = int(os.getenv("MEMORY_MAX_TURNS", 6))
+        self.token_budget = int(os.getenv("MEMORY_TOKEN_BUDGET", 2000))
+
+        self.summary = ""
+        # Number of transcript entries covered by the summary
+        self.summarized_count = 0
+        # Changes whenever the summary does, so cached prompts can be rebuilt
+        self.version = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Returns the messages to send to the LLM: the summary, then the recent turns."""
+        recent = self.transcript[self.summarized_count:]
+        if not self.summary:
+            return recent
+        return [{"role": "user", "content": f"(Summary of the call so far: {self.summary})"}] + recent
+
+    def forget(self, entry: Dict[str, Any]):
+        """Must be called before an entry is removed from the transcript."""
+        for index in range(min(self.summarized_count, len(self.transcript))):
+            if self.transcript[index] is entry:
+                self.summarized_count -= 1
+                return
+
+    def fold_end(self) -> int:
+        """Returns the transcript index up to which entries should be summarized."""
+        turn_starts = [
+            index for index in range(self.summarized_count, len(self.transcript))
+            if self.transcript[index]["role"] == "user"
+        ]
+        if len(turn_starts) <= 1:
+            return self.summarized_count
+
+        keep_from = turn_starts[max(0, len(turn_starts) - max(1, self.max_turns))]
+        tokens = estimate_tokens({"content": self.summary}) + sum(
+            estimate_tokens(message) for message in self.transcript[keep_from:]
+        )
+        # Over budget, fold more turns but always keep the latest one verbatim
+        for start in turn_starts:
+            if start <= keep_from:
+                continue
+            if tokens <= self.token_budget:
+                break
+            tokens -= sum(estimate_tokens(message) for message in self.transcript[keep_from:start])
+            keep_from = start
+        return keep_from
+
+    def schedule(self):
+        """Starts summarizing older turns in the background if the memory is over its limits."""
+        if self.task is not None and not self.task.done():
+            return
+        end = self.fold_end()
+        if end > self.summarized_count:
+            self.task = asyncio.create_task(self.fold(self.summarized_count, end))
+
+    async def fold(self, start: int, end: int):
+        folded = self.transcript[start:end]
+        try:
+            summary = await self.summarizer(self.summary, folded)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {str(e)}")
+            return
+
+        # The transcript may have been changed while the summary was generated
+        current = self.transcript[start:start + len(folded)]
+        if start != self.summarized_count or len(current) != len(folded) or any(a is not b for a, b in zip(current, folded)):
+            logger.info("Conversation changed during summarization, discarding the summary")
+            return
+        if not summary:
+            return
+
+        self.summary = summary
+        self.summarized_count = end
+        self.version += 1
+        logger.info(f"Summarized {len(folded)} messages, {len(self.transcript) - end} kept verbatim")
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self.transcript),
+            "summarized": self.summarized_count,
+            "summary_tokens": estimate_tokens({"content": self.summary}) if self.summary else 0,
+            "prompt_tokens": sum(estimate_tokens(message) for message in self.messages()),
+        }
@@ -1,5 +1,13 @@
 import asyncio
-from typing import Any, Callable, Dict, List
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from logger_config import get_logger
+
+logger = get_logger("EventEmitter")
+
+QUEUE_POLICIES = ("block", "drop_oldest", "coalesce")
 
 
 class EventEmitter:
@@ -8,6 +16,10 @@ class EventEmitter:
 
     An event emitter allows registering callbacks for specific events and emitting those events
     with optional arguments and keyword arguments.
+
+    By default `emit` runs the callbacks inline. Events configured with `use_queue` are instead
+    put on a bounded queue and dispatched by a dedicated task, so a slow listener does not block
+    the code that emitted the event.
     """
 
     def __init__(self):
@@ -15,6 +27,7 @@ class EventEmitter:
         Initializes an instance of the EventEmitter class.
         """
         self._events: Dict[str, List[Callable]] = {}
+        self._queues: Dict[str, "EventQueue"] = {}
 
     def on(self, event: str, callback: Callable):
         """
@@ -28,6 +41,23 @@ class EventEmitter:
             self._events[event] = []
         self._events[event].append(callback)
 
+    def use_queue(self, event: str, maxsize: int = 100, policy: str = "block"):
+        """
+        Dispatches an event through a bounded queue drained by a dedicated task.
+
+        Args:
+            event (str): The name of the event.
+            maxsize (int): Maximum number of pending emissions.
+            policy (str): What to do when the queue is full: "block" waits for room,
+                "drop_oldest" discards the oldest pending emission and "coalesce"
+                replaces the newest pending emission with the new one.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unsupported queue policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("Queue maxsize must be at least 1")
+        self._queues[event] = EventQueue(self, event, maxsize, policy)
+
     async def emit(self, event: str, *args: Any, **kwargs: Any):
         """
         Emits an event and executes all registered callbacks for that event.
@@ -37,6 +67,11 @@ class EventEmitter:
             *args (Any): Optional positional arguments to be passed to the callbacks.
             **kwargs (Any): Optional keyword arguments to be passed to the callbacks.
         """
+        queue = self._queues.get(event)
+        if queue is not None:
+            await queue.put(args, kwargs)
+            return
+
         if event in self._events:
             for callback in self._events[event]:
                 await self._run_callback(callback, *args, **kwargs)
@@ -53,4 +88,121 @@ class EventEmitter:
         if asyncio.iscoroutinefunction(callback):
             await callback(*args, **kwargs)
         else:
-            callback(*args, **kwargs)
\ No newline at end of file
+            callback(*args, **kwargs)
+
+    def queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns depth, drop and latency counters for every queued event.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Counters keyed by event name.
+        """
+        return {event: queue.stats() for event, queue in self._queues.items()}
+
+    async def close_queues(self):
+        """
+        Stops the dispatch tasks of all queued events, discarding pending emissions.
+        """
+        for queue in self._queues.values():
+            await queue.close()
+
+
+class EventQueue:
+    """
+    Bounded queue of pending emissions for one event, drained by a dedicated task.
+    """
+
+    def __init__(self, emitter: EventEmitter, event: str, maxsize: int, policy: str):
+        self.emitter = emitter
+        self.event = event
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items: Deque[Tuple[float, tuple, dict]] = deque()
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_handling = 0.0
+
+    async def put(self, args: tuple, kwargs: dict):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._drain())
+
+        if len(self.items) >= self.maxsize:
+            if self.policy == "block":
+                while len(self.items) >= self.maxsize:
+                    self.not_full.clear()
+                    await self.not_full.wait()
+            elif self.policy == "drop_oldest":
+                self.items.popleft()
+                self.dropped += 1
+            else:
+                self.items.pop()
+                self.coalesced += 1
+
+        self.items.append((time.monotonic(), args, kwargs))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self.items))
+        self.not_empty.set()
+
+    async def _drain(self):
+        while True:
+            while not self.items:
+                self.not_empty.clear()
+                await self.not_empty.wait()
+
+            enqueued_at, args, kwargs = self.items.popleft()
+            self.not_full.set()
+
+            started_at = time.monotonic()
+            wait = started_at - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            for callback in self.emitter._events.get(self.event, []):
+                try:
+                    await self.emitter._run_callback(callback, *args, **kwargs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # One failing listener must not stop the queue or the other listeners
+                    self.errors += 1
+                    logger.error(f"Error in '{self.event}' listener {getattr(callback, '__name__', callback)}: {e}")
+
+            self.dispatched += 1
+            self.total_handling += time.monotonic() - started_at
+
+    async def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.items.clear()
+        self.not_full.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "avg_wait_ms": round(self.total_wait / self.dispatched * 1000, 2) if self.dispatched else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_handling_ms": round(self.total_handling / self.dispatched * 1000, 2) if self.dispatched else 0.0,
+        }
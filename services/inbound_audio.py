@@ -0,0 +1,118 @@
+import asyncio
+import base64
+import os
+from typing import Any, Dict, Optional
+
+from logger_config import get_logger
+from services.transcription_service import TranscriptionService
+from services.vad import VoiceActivityDetector
+
+logger = get_logger("InboundAudio")
+
+# 8kHz mulaw is 8 bytes per millisecond
+BYTES_PER_MS = 8
+
+
+class InboundAudioQueue:
+    """
+    Per-call path from Twilio media frames to the transcription service.
+
+    Frames are queued as they arrive and a single worker decodes them in order and
+    coalesces them into INBOUND_CHUNK_MS chunks before sending them on, instead of
+    starting a task for every 20ms frame. Decoded audio is also fed to the local
+    voice activity detector, if there is one.
+    """
+
+    def __init__(self, transcription_service: TranscriptionService, vad: Optional[VoiceActivityDetector] = None):
+        self.transcription_service = transcription_service
+        self.vad = vad
+        self.chunk_bytes = int(os.getenv("INBOUND_CHUNK_MS", 60)) * BYTES_PER_MS
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=int(os.getenv("INBOUND_QUEUE_FRAMES", 500)))
+        self.task: Optional[asyncio.Task] = None
+
+        self.frames = 0
+        self.chunks = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def push(self, payload: str):
+        """
+        Queues one base64 media payload without waiting.
+
+        Args:
+            payload (str): The 'media.payload' field of a Twilio media message.
+        """
+        if self.queue.full():
+            # Transcription has fallen far behind, old audio is the least useful
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def _run(self):
+        pending = bytearray()
+        while True:
+            payload = await self.queue.get()
+            batch_start = len(pending)
+            while True:
+                if payload is None:
+                    await self._send(pending)
+                    return
+                pending += base64.b64decode(payload)
+                self.frames += 1
+                # Take whatever else has already arrived before sending
+                try:
+                    payload = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+
+            if self.vad is not None:
+                try:
+                    await self.vad.process(bytes(pending[batch_start:]))
+                except Exception as e:
+                    logger.error(f"Error in voice activity detection: {e}")
+
+            if len(pending) >= self.chunk_bytes:
+                await self._send(pending)
+                pending = bytearray()
+
+    async def _send(self, chunk: bytearray):
+        if not chunk:
+            return
+        try:
+            await self.transcription_service.send(bytes(chunk))
+            self.chunks += 1
+        except Exception as e:
+            logger.error(f"Error sending audio to transcription: {e}")
+
+    async def close(self):
+        """Sends any audio still pending and stops the worker."""
+        if self.task is None:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(None)
+        try:
+            await asyncio.wait_for(self.task, timeout=2)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+        self.task = None
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "frames": self.frames,
+            "chunks": self.chunks,
+            "dropped": self.dropped,
+            "chunk_ms": self.chunk_bytes // BYTES_PER_MS,
+        }
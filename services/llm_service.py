@@ -1,22 +1,37 @@
+import hashlib
 import importlib
 import json
 import os
 import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 
 import google.generativeai as genai
+from google.generativeai import caching
 
-from functions.function_manifest import tools
+from functions.function_manifest import responses, tools
 from logger_config import get_logger
 from services.call_context import CallContext
+from services.conversation_memory import ConversationMemory
 from services.event_emmiter import EventEmitter
+from services.tool_call_parser import TOOL_CALL_PATTERN, ToolCallParser
+from services.tool_runtime import ToolRuntime, function_declarations
 import asyncio
+from functions.end_call import end_call
 from functions.send_whatsapp import send_whatsapp
+from functions.transfer_call import transfer_call
 
 logger = get_logger("LLMService")
 
+APPOINTMENT_DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2}|\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*(?:\s+\d{4})?)')
+APPOINTMENT_TIME_PATTERN = re.compile(r'(\d{1,2}(?::\d{2})?\s*(?:am|pm|AM|PM)|\d{2}:\d{2})')
+# Matched anywhere in the text, like the substring checks it replaces
+NEGATIVE_RESPONSE_PATTERN = re.compile("|".join(
+    re.escape(response) for response in ["no", "nope", "nahi", "not really", "that's all", "nothing else"]
+))
+SENTENCE_END_PATTERN = re.compile(r'([.!?])')
+
 class AbstractLLMService(EventEmitter, ABC):
     def __init__(self, context: CallContext):
         super().__init__()
@@ -29,12 +44,17 @@ class AbstractLLMService(EventEmitter, ABC):
         ]
         self.partial_response_index = 0
         self.available_functions = {
-            "transfer_call": self.transfer_call,
-            "end_call": self.end_call,
+            "transfer_call": transfer_call,
+            "end_call": end_call,
             "send_whatsapp": send_whatsapp
         }
+        self.tool_runtime = ToolRuntime(self.available_functions)
         self.sentence_buffer = ""
+        # Assistant entries of user_context by interaction, the greeting being interaction 0
+        self.reply_entries = {0: self.user_context[1]}
         context.user_context = self.user_context
+        self.memory_enabled = os.getenv("MEMORY_ENABLED", "false").lower() == "true"
+        self.memory = self.create_memory()
 
     def set_call_context(self, context: CallContext):
         self.context = context
@@ -42,7 +62,11 @@ class AbstractLLMService(EventEmitter, ABC):
             {"role": "user", "content": "Hello"},
             {"role": "assistant", "content": context.initial_message}
         ]
+        self.reply_entries = {0: self.user_context[1]}
         context.user_context = self.user_context
+        if self.memory is not None:
+            self.memory.cancel()
+        self.memory = self.create_memory()
         self.system_message = context.system_message
         self.initial_message = context.initial_message
 
@@ -50,8 +74,102 @@ class AbstractLLMService(EventEmitter, ABC):
     async def completion(self, text: str, interaction_count: int, role: str = 'user', name: str = 'user'):
         pass
 
+    def create_memory(self) -> Optional[ConversationMemory]:
+        if not self.memory_enabled:
+            return None
+        return ConversationMemory(self.user_context, self.summarize)
+
+    def conversation(self) -> List[Dict[str, Any]]:
+        """Returns the messages to send to the LLM, bounded when memory is enabled."""
+        if self.memory is None:
+            return self.user_context
+        return self.memory.messages()
+
+    @abstractmethod
+    async def summarize(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Fold messages into the running summary of the call, returning the new summary."""
+        pass
+
+    @abstractmethod
+    async def draft(self, text: str) -> str:
+        """Generate the complete reply to a user message without emitting it or changing user_context."""
+        pass
+
+    async def process_response(self, complete_response: str, interaction_count: int):
+        # Speak the reply as if it was streamed, up to its first tool call
+        parser = ToolCallParser(self.available_functions)
+        spoken = ""
+        tool_called = False
+        chunk_size = 50
+        for i in range(0, len(complete_response), chunk_size):
+            speakable, calls = parser.feed(complete_response[i:i + chunk_size])
+            spoken += speakable
+            await self.emit_complete_sentences(speakable, interaction_count)
+            if calls:
+                tool_called = True
+                break
+
+        if not tool_called:
+            speakable = parser.finish()
+            spoken += speakable
+            await self.emit_complete_sentences(speakable, interaction_count)
+
+        await self.finish_reply(complete_response, spoken, interaction_count)
+
+    async def finish_reply(self, complete_response: str, spoken: str, interaction_count: int) -> bool:
+        """
+        Ends a reply, the same way for every completion mode.
+
+        The rest of the sentence buffer is spoken and the spoken text is recorded
+        before a tool call in the reply takes over the turn, so the caller hears, and
+        the history keeps, what was said before the call.
+
+        Args:
+            complete_response (str): The reply as generated, including tool calls.
+            spoken (str): The text of the reply passed to TTS.
+            interaction_count (int): The interaction of the reply.
+
+        Returns:
+            bool: True if a tool call in the reply handled the rest of the turn.
+        """
+        await self.flush_sentence_buffer(interaction_count)
+        if spoken.strip():
+            self.record_reply(interaction_count, spoken)
+        return await self.handle_tool_calls(complete_response, interaction_count)
+
+    async def complete_from_draft(self, text: str, draft: str, interaction_count: int):
+        """Use a reply drafted ahead of time as the completion of a user message."""
+        try:
+            self.user_context.append({"role": "user", "content": text, "name": "user"})
+            await self.process_response(draft, interaction_count)
+        except Exception as e:
+            logger.error(f"Error completing from draft: {str(e)}")
+
     def reset(self):
         self.partial_response_index = 0
+        self.sentence_buffer = ""
+
+    def record_reply(self, interaction_count: int, text: str):
+        entry = {"role": "assistant", "content": text}
+        self.user_context.append(entry)
+        self.reply_entries[interaction_count] = entry
+        if self.memory is not None:
+            # The reply is complete, so this is the gap between two turns
+            self.memory.schedule()
+
+    def truncate_reply(self, interaction_count: int, spoken_text: str):
+        """Keep only the part of an interrupted reply that the caller actually heard."""
+        entry = self.reply_entries.pop(interaction_count, None)
+        if entry is not None:
+            if spoken_text:
+                entry["content"] = spoken_text
+            else:
+                if self.memory is not None:
+                    self.memory.forget(entry)
+                self.user_context.remove(entry)
+        elif spoken_text:
+            # The completion was cancelled before it recorded the reply
+            self.record_reply(interaction_count, spoken_text)
 
     def validate_function_args(self, args):
         try:
@@ -61,7 +179,7 @@ class AbstractLLMService(EventEmitter, ABC):
             return {}
 
     def split_into_sentences(self, text):
-        sentences = re.split(r'([.!?])', text)
+        sentences = SENTENCE_END_PATTERN.split(text)
         sentences = [''.join(sentences[i:i+2]) for i in range(0, len(sentences), 2)]
         return sentences
 
@@ -78,48 +196,52 @@ class AbstractLLMService(EventEmitter, ABC):
         
         self.sentence_buffer = sentences[-1] if sentences else ""
 
-    # Tool function implementations
-    async def transfer_call(self, context, args):
-        from twilio.rest import Client
-        account_sid = os.environ['TWILIO_ACCOUNT_SID']
-        auth_token = os.environ['TWILIO_AUTH_TOKEN']
-        transfer_number = os.environ['TRANSFER_NUMBER']
-        client = Client(account_sid, auth_token)
-        call_sid = context.call_sid
-
-        await asyncio.sleep(8)
-        try:
-            call = client.calls(call_sid).fetch()
-            call = client.calls(call_sid).update(
-                url=f'http://twimlets.com/forward?PhoneNumber={transfer_number}',
-                method='POST'
-            )
-            return "Call transferred."
-        except Exception as e:
-            return f"Error transferring call: {str(e)}"
-
-    async def end_call(self, context, args):
-        from twilio.rest import Client
-        account_sid = os.environ['TWILIO_ACCOUNT_SID']
-        auth_token = os.environ['TWILIO_AUTH_TOKEN']
-        client = Client(account_sid, auth_token)
-        call_sid = context.call_sid
-
-        call = client.calls(call_sid).fetch()
-        if call.status in ['completed', 'failed', 'busy', 'no-answer', 'canceled']:
-            return f"Call already ended with status: {call.status}"
+    async def flush_sentence_buffer(self, interaction_count):
+        if self.sentence_buffer.strip():
+            await self.emit('llmreply', {
+                "partialResponseIndex": self.partial_response_index,
+                "partialResponse": self.sentence_buffer.strip()
+            }, interaction_count)
+            self.partial_response_index += 1
+        self.sentence_buffer = ""
 
-        await asyncio.sleep(5)
-        call = client.calls(call_sid).update(status='completed')
-        return f"Call ended successfully. Final status: {call.status}"
+    async def announce_tool_call(self, function_name: str, interaction_count: int) -> str:
+        """Speak the manifest's "say" phrase of a tool before it runs, returning the phrase."""
+        tool_data = next((tool for tool in tools if tool['function']['name'] == function_name), None)
+        say = tool_data['function']['say'] if tool_data else ""
+        if say:
+            await self.emit('llmreply', {
+                "partialResponseIndex": None,
+                "partialResponse": say
+            }, interaction_count)
+        return say
+
+    async def handle_whatsapp_result(self, function_response: Any, interaction_count: int):
+        if isinstance(function_response, dict):
+            if function_response.get("success"):
+                self.context.whatsapp_sent = True
+                # A queued message is delivered in the background, do not claim it was sent
+                response = "whatsapp_queued" if function_response.get("status") == "queued" else "whatsapp_sent"
+                await self.emit('llmreply', {
+                    "partialResponseIndex": None,
+                    "partialResponse": responses[response]
+                }, interaction_count)
+                self.context.asked_anything_else = True
+            else:
+                error_msg = function_response.get("error", "Unknown error")
+                await self.emit('llmreply', {
+                    "partialResponseIndex": None,
+                    "partialResponse": f"I apologize, but I couldn't send the WhatsApp message. {error_msg}"
+                }, interaction_count)
 
     # New helper function to detect and handle tool calls
     async def handle_tool_calls(self, response_text: str, interaction_count: int) -> bool:
+        lowered = response_text.lower()
         # Check for appointment details in the response
-        if "appointment" in response_text.lower():
+        if "appointment" in lowered:
             # Extract date and time using regex
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2}|\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*(?:\s+\d{4})?)', response_text)
-            time_match = re.search(r'(\d{1,2}(?::\d{2})?\s*(?:am|pm|AM|PM)|\d{2}:\d{2})', response_text)
+            date_match = APPOINTMENT_DATE_PATTERN.search(response_text)
+            time_match = APPOINTMENT_TIME_PATTERN.search(response_text)
             
             if date_match or time_match:
                 details = {}
@@ -155,27 +277,25 @@ class AbstractLLMService(EventEmitter, ABC):
                     self.context.update_appointment_details(details)
 
         # Check for negative responses to "anything else"
-        negative_responses = ["no", "nope", "nahi", "not really", "that's all", "nothing else"]
-        if (any(resp in response_text.lower() for resp in negative_responses) and 
-            ("anything else" in response_text.lower() or self.context.asked_anything_else)):
+        if (NEGATIVE_RESPONSE_PATTERN.search(lowered) and
+            ("anything else" in lowered or self.context.asked_anything_else)):
             logger.info("User indicated no more questions, ending call")
             self.context.last_response_was_no = True
             await self.emit('llmreply', {
                 "partialResponseIndex": None,
-                "partialResponse": "Thank you for your time. Looking forward to meeting you!"
+                "partialResponse": responses["goodbye"]
             }, interaction_count)
-            await asyncio.sleep(2)  # Give time for the closing message
+            # The call is hung up once the goodbye has been played
             self.context.mark_conversation_end()
-            await self.end_call(self.context, {})
+            await end_call(self.context, {})
             return True
 
         # Pattern to detect function calls: [function_name(args)]
-        pattern = r'\[(\w+)\((.*?)\)\]'
-        matches = re.findall(pattern, response_text)
+        matches = TOOL_CALL_PATTERN.findall(response_text)
         
         if not matches:
             # If asking about anything else, mark it
-            if "anything else" in response_text.lower():
+            if "anything else" in lowered:
                 self.context.asked_anything_else = True
             return False
 
@@ -188,43 +308,22 @@ class AbstractLLMService(EventEmitter, ABC):
                     logger.info("Skipping duplicate WhatsApp message")
                     await self.emit('llmreply', {
                         "partialResponseIndex": None,
-                        "partialResponse": "I've already sent you the confirmation message. Is there anything else I can help you with?"
+                        "partialResponse": responses["whatsapp_already_sent"]
                     }, interaction_count)
                     self.context.asked_anything_else = True
                     return True
 
-                # Get tool metadata
-                tool_data = next((tool for tool in tools if tool['function']['name'] == function_name), None)
-                if tool_data:
-                    say = tool_data['function']['say']
-                    await self.emit('llmreply', {
-                        "partialResponseIndex": None,
-                        "partialResponse": say
-                    }, interaction_count)
+                say = await self.announce_tool_call(function_name, interaction_count)
 
                 # Execute the function
-                function_to_call = self.available_functions[function_name]
                 args = self.validate_function_args(args_str)
-                function_response = await function_to_call(self.context, args)
+                function_response = await self.tool_runtime.execute(self.context, function_name, args)
                 
                 logger.info(f"Function {function_name} executed with result: {function_response}")
                 
                 # Handle WhatsApp response specially
                 if function_name == "send_whatsapp":
-                    if isinstance(function_response, dict):
-                        if function_response.get("success"):
-                            self.context.whatsapp_sent = True
-                            await self.emit('llmreply', {
-                                "partialResponseIndex": None,
-                                "partialResponse": "I've sent you the confirmation. Is there anything else I can assist you with?"
-                            }, interaction_count)
-                            self.context.asked_anything_else = True
-                        else:
-                            error_msg = function_response.get("error", "Unknown error")
-                            await self.emit('llmreply', {
-                                "partialResponseIndex": None,
-                                "partialResponse": f"I apologize, but I couldn't send the WhatsApp message. {error_msg}"
-                            }, interaction_count)
+                    await self.handle_whatsapp_result(function_response, interaction_count)
                     return True  # Return True to stop further processing
 
                 # Handle end_call specially
@@ -241,90 +340,403 @@ class AbstractLLMService(EventEmitter, ABC):
                 
         return False
 
+class GeminiPromptCache:
+    """
+    Provider-side caches of system instructions, shared by all calls of this process.
+
+    Creating a cache can fail, e.g. when the instruction is shorter than the minimum
+    cacheable size of the model; the failure is remembered so that later calls go
+    straight to sending the system instruction with each request.
+    """
+
+    def __init__(self):
+        self.model_name = os.getenv("GEMINI_CACHE_MODEL", "models/gemini-1.5-flash-001")
+        self.ttl = timedelta(minutes=int(os.getenv("GEMINI_CACHE_TTL_MINUTES", 60)))
+        self.entries: Dict[str, Tuple[Optional[caching.CachedContent], datetime]] = {}
+        self.lock = asyncio.Lock()
+
+    async def get(self, system_instruction: str, tools: Optional[List[Dict[str, Any]]] = None) -> Optional[caching.CachedContent]:
+        key = hashlib.sha256(f"{system_instruction}{json.dumps(tools, sort_keys=True)}".encode("utf-8")).hexdigest()
+        async with self.lock:
+            if key in self.entries:
+                cached, renew_at = self.entries[key]
+                if datetime.now() < renew_at:
+                    return cached
+
+            try:
+                cached = await asyncio.to_thread(
+                    caching.CachedContent.create,
+                    model=self.model_name,
+                    display_name=f"system-{key[:12]}",
+                    system_instruction=system_instruction,
+                    tools=tools,
+                    ttl=self.ttl
+                )
+                logger.info(f"Created Gemini context cache {cached.name}")
+                # Renew a little early so requests never reference an expired cache
+                self.entries[key] = (cached, datetime.now() + self.ttl - timedelta(minutes=1))
+            except Exception as e:
+                logger.info(f"Gemini context caching unavailable, sending the system instruction instead: {str(e)}")
+                cached = None
+                self.entries[key] = (None, datetime.max)
+            return cached
+
+
+gemini_prompt_cache = GeminiPromptCache()
+
+
 class GeminiService(AbstractLLMService):
     def __init__(self, context: CallContext):
         super().__init__(context)
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
         self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.streaming = os.getenv("GEMINI_STREAMING", "false").lower() == "true"
+        self.generation_config = {
+            "max_output_tokens": 300,
+            "temperature": 0.7,
+        }
+
+        # Session mode sends the system instruction separately from the conversation,
+        # which is kept as structured contents and extended by one entry per message
+        self.chat_session = os.getenv("GEMINI_CHAT_SESSION", "false").lower() == "true"
+        self.context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+        self.session_model = None
+        self.session_key = None
+        self.contents: List[Dict[str, Any]] = []
+        self.contents_stale = False
+        self.contents_version = 0
+
+        # Native mode declares the manifest's functions to Gemini instead of having the
+        # model write them out as text; calls are never executed automatically by the SDK
+        self.native_tools = os.getenv("GEMINI_FUNCTION_CALLING", "text").lower() == "native"
+        self.max_tool_rounds = int(os.getenv("GEMINI_MAX_TOOL_ROUNDS", 2))
+        self.tools = [{"function_declarations": function_declarations()}] if self.native_tools else None
+        self.tool_config = {"function_calling_config": {"mode": "AUTO"}} if self.native_tools else None
+
+    def tool_usage_instruction(self) -> str:
+        if self.native_tools:
+            return (
+                "IMPORTANT: You MUST use these functions by calling them, never by writing them out in your response. "
+                "Below, [function_name(args)] stands for calling that function with those arguments:\n"
+                "- transfer_call - Transfer the call to another number\n"
+                "- end_call - End the current call\n"
+                "- send_whatsapp(message) - Send a WhatsApp message. You MUST call this function when confirming appointments.\n\n"
+            )
+        return (
+            "IMPORTANT: You MUST use these functions by writing [function_name(args)] in your response:\n"
+            "- [transfer_call()] - Transfer the call to another number\n"
+            "- [end_call()] - End the current call\n"
+            "- [send_whatsapp({\"message\": \"message text\"})] - Send a WhatsApp message. You MUST call this function when confirming appointments.\n\n"
+        )
+
+    def system_instruction(self) -> str:
+        # Enhanced system message to instruct Gemini about tool usage
+        return (
+            f"{self.system_message}\n\n"
+            f"{self.tool_usage_instruction()}"
+            "Initial Time Request Handling:\n"
+            "1. If user says 'no', 'busy', 'not now', 'in a meeting', or indicates they don't have time:\n"
+            "   - Respond with: 'Ah, I see. What would be a better time to call you back?'\n"
+            "   - After they suggest a time, say: 'Thank you for letting me know. I'll make a note to call you at [their suggested time].'\n"
+            "   - End with: 'Have a great day!' and use [end_call()]\n"
+            "2. Only proceed with property discussion if they agree to talk\n\n"
+            "Appointment Booking Flow:\n"
+            "1. First, ask for and confirm the preferred date and time for the site visit\n"
+            "2. After date/time is confirmed, ask: 'May I confirm if [number] is your WhatsApp number for sending the appointment details?'\n"
+            "3. Only after both date/time AND WhatsApp number are confirmed separately, proceed with sending confirmation\n"
+            "4. NEVER assume the phone number is a WhatsApp number without explicit confirmation\n"
+            "5. If user only provides date/time, ask about WhatsApp number separately\n"
+            "6. If user only confirms WhatsApp number, ask about preferred date/time separately\n\n"
+            "WhatsApp Confirmation:\n"
+            "1. Only send WhatsApp confirmation after BOTH date/time AND number are explicitly confirmed\n"
+            "2. Use this exact format for appointment confirmations:\n"
+            "[send_whatsapp({\"message\": \"*SHIVALIK GROUP*\\n*Appointment Confirmation*\\n\\nDear *{name}*,\\n\\nYour site visit has been scheduled for:\\nDate: *{date}*\\nTime: *{time}*\\n\\nLocation:\\nShivalik House, Beside Satellite Police Station,\\nRamdevnagar Cross Road, Satellite Rd,\\nAhmedabad, Gujarat - 380015\\n\\nPlease arrive *10 minutes* before your scheduled time.\\n\\nContact: *Riya* (Shivalik Group)\\nMobile: *+91 79 4020 0000*\\n\\n_We look forward to showing you our premium properties._\"})]\n"
+            "3. After sending confirmation, ask if there's anything else you can help with\n\n"
+            "IMPORTANT RULES:\n"
+            "1. NEVER say you sent a message unless you actually called [send_whatsapp()]\n"
+            "2. ALWAYS handle date/time and WhatsApp confirmation as separate steps\n"
+            "3. NEVER assume phone number is WhatsApp without explicit confirmation\n"
+            "Only use these functions when explicitly requested or clearly appropriate."
+        )
+
+    def build_prompt(self, context: List[Dict[str, Any]] = None) -> str:
+        messages = []
+        for msg in self.user_context if context is None else context:
+            messages.append(self.to_content(msg))
+
+        return f"System: {self.system_instruction()}\n\n" + "\n".join(
+            [f"{msg['role']}: {msg['parts'][0]}" for msg in messages]
+        )
+
+    @staticmethod
+    def to_content(msg: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "role": "user" if msg["role"] == "user" else "model",
+            "parts": [msg["content"]]
+        }
+
+    def build_contents(self, extra: List[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """
+        Brings the contents up to date with the conversation and returns them.
+
+        Only messages appended since the last request are converted, unless an earlier
+        message was changed, e.g. a reply truncated by a barge-in or turns folded into
+        the summary.
+
+        Args:
+            extra (List[Dict[str, Any]]): Messages to send after the conversation, without keeping them.
+        """
+        conversation = self.conversation()
+        memory_version = self.memory.version if self.memory is not None else 0
+        if self.contents_stale or memory_version != self.contents_version or len(self.contents) > len(conversation):
+            self.contents = []
+            self.contents_stale = False
+            self.contents_version = memory_version
+        for msg in conversation[len(self.contents):]:
+            self.contents.append(self.to_content(msg))
+        return self.contents + [self.to_content(msg) for msg in extra]
+
+    async def get_session_model(self) -> genai.GenerativeModel:
+        instruction = self.system_instruction()
+        cached = await gemini_prompt_cache.get(instruction, self.tools) if self.context_cache else None
+        # Rebuilt when the call context changes the instruction or the cache is renewed
+        session_key = (instruction, cached.name if cached is not None else None)
+        if self.session_model is not None and session_key == self.session_key:
+            return self.session_model
+
+        if cached is not None:
+            self.session_model = genai.GenerativeModel.from_cached_content(cached)
+        else:
+            self.session_model = genai.GenerativeModel(
+                'gemini-1.5-flash',
+                system_instruction=instruction,
+                tools=self.tools,
+                tool_config=self.tool_config
+            )
+        self.session_key = session_key
+        return self.session_model
+
+    async def build_request(self, extra: List[Dict[str, Any]] = ()) -> Tuple[genai.GenerativeModel, Any]:
+        """Returns the model to call and the prompt or contents to send it."""
+        # Function calls and their results can only be sent as structured contents
+        if self.chat_session or self.native_tools:
+            return await self.get_session_model(), self.build_contents(extra)
+        return self.model, self.build_prompt(self.conversation() + list(extra))
+
+    def set_call_context(self, context: CallContext):
+        super().set_call_context(context)
+        self.contents_stale = True
+
+    def truncate_reply(self, interaction_count: int, spoken_text: str):
+        super().truncate_reply(interaction_count, spoken_text)
+        self.contents_stale = True
 
     async def completion(self, text: str, interaction_count: int, role: str = 'user', name: str = 'user'):
         try:
             self.user_context.append({"role": role, "content": text, "name": name})
-            
-            # Enhanced system message to instruct Gemini about tool usage
-            enhanced_system_message = (
-                f"{self.system_message}\n\n"
-                "IMPORTANT: You MUST use these functions by writing [function_name(args)] in your response:\n"
-                "- [transfer_call()] - Transfer the call to another number\n"
-                "- [end_call()] - End the current call\n"
-                "- [send_whatsapp({\"message\": \"message text\"})] - Send a WhatsApp message. You MUST call this function when confirming appointments.\n\n"
-                "Initial Time Request Handling:\n"
-                "1. If user says 'no', 'busy', 'not now', 'in a meeting', or indicates they don't have time:\n"
-                "   - Respond with: 'Ah, I see. What would be a better time to call you back?'\n"
-                "   - After they suggest a time, say: 'Thank you for letting me know. I'll make a note to call you at [their suggested time].'\n"
-                "   - End with: 'Have a great day!' and use [end_call()]\n"
-                "2. Only proceed with property discussion if they agree to talk\n\n"
-                "Appointment Booking Flow:\n"
-                "1. First, ask for and confirm the preferred date and time for the site visit\n"
-                "2. After date/time is confirmed, ask: 'May I confirm if [number] is your WhatsApp number for sending the appointment details?'\n"
-                "3. Only after both date/time AND WhatsApp number are confirmed separately, proceed with sending confirmation\n"
-                "4. NEVER assume the phone number is a WhatsApp number without explicit confirmation\n"
-                "5. If user only provides date/time, ask about WhatsApp number separately\n"
-                "6. If user only confirms WhatsApp number, ask about preferred date/time separately\n\n"
-                "WhatsApp Confirmation:\n"
-                "1. Only send WhatsApp confirmation after BOTH date/time AND number are explicitly confirmed\n"
-                "2. Use this exact format for appointment confirmations:\n"
-                "[send_whatsapp({\"message\": \"*SHIVALIK GROUP*\\n*Appointment Confirmation*\\n\\nDear *{name}*,\\n\\nYour site visit has been scheduled for:\\nDate: *{date}*\\nTime: *{time}*\\n\\nLocation:\\nShivalik House, Beside Satellite Police Station,\\nRamdevnagar Cross Road, Satellite Rd,\\nAhmedabad, Gujarat - 380015\\n\\nPlease arrive *10 minutes* before your scheduled time.\\n\\nContact: *Riya* (Shivalik Group)\\nMobile: *+91 79 4020 0000*\\n\\n_We look forward to showing you our premium properties._\"})]\n"
-                "3. After sending confirmation, ask if there's anything else you can help with\n\n"
-                "IMPORTANT RULES:\n"
-                "1. NEVER say you sent a message unless you actually called [send_whatsapp()]\n"
-                "2. ALWAYS handle date/time and WhatsApp confirmation as separate steps\n"
-                "3. NEVER assume phone number is WhatsApp without explicit confirmation\n"
-                "Only use these functions when explicitly requested or clearly appropriate."
-            )
-            
-            messages = []
-            for msg in self.user_context:
-                messages.append({
-                    "role": "user" if msg["role"] == "user" else "model",
-                    "parts": [msg["content"]]
-                })
-            
-            prompt = f"System: {enhanced_system_message}\n\n" + "\n".join(
-                [f"{msg['role']}: {msg['parts'][0]}" for msg in messages]
-            )
+            model, prompt = await self.build_request()
+
+            if self.native_tools:
+                await self.native_completion(model, prompt, interaction_count)
+            elif self.streaming:
+                await self.streaming_completion(model, prompt, interaction_count)
+            else:
+                await self.buffered_completion(model, prompt, interaction_count)
 
-            response = await self.model.generate_content_async(
-                prompt,
-                generation_config={
-                    "max_output_tokens": 300,
-                    "temperature": 0.7,
-                }
+        except Exception as e:
+            logger.error(f"Error in GeminiService completion: {str(e)}")
+
+    async def summarize(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        prompt = (
+            "You keep the running summary of a phone call between an assistant and a caller.\n"
+            "Update the summary with the new messages. Keep names, phone numbers, dates, times, "
+            "decisions, promises and open questions. Reply with the summary only, in under 150 words.\n\n"
+            f"Current summary:\n{summary or 'None yet.'}\n\n"
+            f"New messages:\n{transcript}"
+        )
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config={"max_output_tokens": 300, "temperature": 0.2}
+        )
+        return response.text.strip()
+
+    async def draft(self, text: str) -> str:
+        model, prompt = await self.build_request([{"role": "user", "content": text, "name": "user"}])
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=self.generation_config
+        )
+        return response.text
+
+    async def buffered_completion(self, model: genai.GenerativeModel, prompt: Any, interaction_count: int):
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=self.generation_config
+        )
+        self.log_usage(response)
+
+        await self.process_response(response.text, interaction_count)
+
+    async def streaming_completion(self, model: genai.GenerativeModel, prompt: Any, interaction_count: int):
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=self.generation_config,
+            stream=True
+        )
+
+        complete_response = ""
+        spoken = ""
+        # Tool calls are withheld from TTS and run as soon as they are complete
+        parser = ToolCallParser(self.available_functions)
+        tool_called = False
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety or finish metadata)
+                continue
+
+            complete_response += text
+            speakable, calls = parser.feed(text)
+            spoken += speakable
+            await self.emit_complete_sentences(speakable, interaction_count)
+            if calls:
+                # Text after a tool call is never spoken, so stop reading the reply
+                tool_called = True
+                break
+
+        if not tool_called:
+            self.log_usage(response)
+            speakable = parser.finish()
+            spoken += speakable
+            await self.emit_complete_sentences(speakable, interaction_count)
+
+        await self.finish_reply(complete_response, spoken, interaction_count)
+
+    async def native_completion(self, model: genai.GenerativeModel, contents: List[Dict[str, Any]], interaction_count: int):
+        """
+        Completes with native function calling.
+
+        Text is spoken as it arrives. Requested functions run together once the reply is
+        complete, and if their results need an answer they are sent back in a single
+        follow-up request, up to GEMINI_MAX_TOOL_ROUNDS times per turn.
+        """
+        for _ in range(self.max_tool_rounds + 1):
+            response = await model.generate_content_async(
+                contents,
+                generation_config=self.generation_config,
+                tool_config=self.tool_config,
+                stream=self.streaming
             )
 
-            complete_response = response.text
-            
-            # Check for tool calls first
-            if await self.handle_tool_calls(complete_response, interaction_count):
+            complete_response = ""
+            spoken = ""
+            function_calls = []
+            # Models sometimes still write calls out as text, which must not be spoken either
+            parser = ToolCallParser(self.available_functions)
+            text_tool_called = False
+            async for chunk in self.iterate_response(response):
+                for part in chunk.parts:
+                    if "function_call" in part:
+                        function_call = type(part.function_call).to_dict(part.function_call)
+                        function_calls.append({"name": function_call["name"], "args": function_call.get("args") or {}})
+                    elif part.text:
+                        complete_response += part.text
+                        speakable, calls = parser.feed(part.text)
+                        spoken += speakable
+                        await self.emit_complete_sentences(speakable, interaction_count)
+                        text_tool_called = text_tool_called or bool(calls)
+                if text_tool_called:
+                    break
+
+            if not text_tool_called:
+                self.log_usage(response)
+                speakable = parser.finish()
+                spoken += speakable
+                await self.emit_complete_sentences(speakable, interaction_count)
+
+            if await self.finish_reply(complete_response, spoken, interaction_count):
                 return
 
-            # If no tool calls, process as regular response
-            chunk_size = 50
-            for i in range(0, len(complete_response), chunk_size):
-                chunk = complete_response[i:i + chunk_size]
-                await self.emit_complete_sentences(chunk, interaction_count)
+            if not function_calls:
+                return
 
-            if self.sentence_buffer.strip():
+            function_responses = await self.run_function_calls(function_calls, interaction_count)
+            if not function_responses:
+                return
+
+            model_parts = [{"text": complete_response}] if complete_response else []
+            model_parts += [{"function_call": function_call} for function_call, _ in function_responses]
+            contents = contents + [
+                {"role": "model", "parts": model_parts},
+                {"role": "user", "parts": [
+                    {"function_response": {"name": function_call["name"], "response": result}}
+                    for function_call, result in function_responses
+                ]}
+            ]
+
+        logger.info(f"Stopped after {self.max_tool_rounds} rounds of function calls")
+
+    async def iterate_response(self, response):
+        if self.streaming:
+            async for chunk in response:
+                yield chunk
+        else:
+            yield response
+
+    async def run_function_calls(self, function_calls: List[Dict[str, Any]], interaction_count: int) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Runs the functions of one reply concurrently.
+
+        Returns:
+            List[Tuple[Dict[str, Any], Dict[str, Any]]]: Each call with its result, if the
+            results need an answer from the model; otherwise an empty list.
+        """
+        calls = []
+        for function_call in function_calls:
+            # Prevent duplicate WhatsApp messages
+            if function_call["name"] == "send_whatsapp" and self.context.whatsapp_sent:
+                logger.info("Skipping duplicate WhatsApp message")
                 await self.emit('llmreply', {
-                    "partialResponseIndex": self.partial_response_index,
-                    "partialResponse": self.sentence_buffer.strip()
+                    "partialResponseIndex": None,
+                    "partialResponse": responses["whatsapp_already_sent"]
                 }, interaction_count)
-                self.sentence_buffer = ""
-
-            self.user_context.append({"role": "assistant", "content": complete_response})
+                self.context.asked_anything_else = True
+                continue
+            await self.announce_tool_call(function_call["name"], interaction_count)
+            calls.append(function_call)
+
+        if not calls:
+            return []
+        results = await self.tool_runtime.run(self.context, [(call["name"], call["args"]) for call in calls])
+
+        needs_answer = False
+        for function_call, result in zip(calls, results):
+            function_name = function_call["name"]
+            logger.info(f"Function {function_name} executed with result: {result}")
+            if function_name == "send_whatsapp":
+                await self.handle_whatsapp_result(result, interaction_count)
+            elif function_name == "end_call":
+                self.context.mark_conversation_end()
+            else:
+                self.user_context.append({"role": "function", "content": str(result), "name": function_name})
+                needs_answer = True
+
+        if not needs_answer or self.context.call_ended:
+            return []
+        return [
+            (function_call, result if isinstance(result, dict) else {"result": str(result)})
+            for function_call, result in zip(calls, results)
+        ]
 
-        except Exception as e:
-            logger.error(f"Error in GeminiService completion: {str(e)}")
+    def log_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            logger.info(
+                f"Gemini tokens: {usage.prompt_token_count} prompt "
+                f"({usage.cached_content_token_count} cached), {usage.candidates_token_count} reply"
+            )
 
 class LLMFactory:
     @staticmethod
@@ -0,0 +1,100 @@
+import asyncio
+import os
+from typing import Any, Iterable, Optional, Set
+
+from logger_config import get_logger
+
+logger = get_logger("Playback")
+
+
+class PlaybackTracker:
+    """
+    Tracks whether a call still has speech on its way to the caller.
+
+    Speech is pending from the moment a reply is handed to TTS, held by its synthesis
+    task, until Twilio acknowledges the mark sent after its audio. `drained` resolves
+    once nothing is pending, so the call can be hung up or transferred right after the
+    last word was played instead of after a fixed delay.
+    """
+
+    def __init__(self):
+        self.marks: Set[str] = set()
+        self.holds: Set[asyncio.Task] = set()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.closed = False
+
+    @property
+    def playing(self) -> bool:
+        """Whether audio has been sent that Twilio has not finished playing."""
+        return bool(self.marks)
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.marks or self.holds)
+
+    def update(self):
+        if self.pending and not self.closed:
+            self.idle.clear()
+        else:
+            self.idle.set()
+
+    def hold(self, task: asyncio.Task):
+        """Keeps playback pending until a synthesis task is done and its audio was sent."""
+        if task.done():
+            return
+        self.holds.add(task)
+        task.add_done_callback(self.release)
+        self.update()
+
+    def release(self, task: asyncio.Task):
+        self.holds.discard(task)
+        self.update()
+
+    def sent(self, mark_label: str):
+        self.marks.add(mark_label)
+        self.update()
+
+    def acknowledged(self, mark_label: str):
+        self.marks.discard(mark_label)
+        self.update()
+
+    def discard(self, mark_labels: Iterable[str]):
+        """Forgets marks that will never be acknowledged, e.g. of audio dropped by a clear."""
+        self.marks.difference_update(mark_labels)
+        self.update()
+
+    def close(self):
+        """Releases every waiter once the media stream has ended."""
+        self.closed = True
+        self.idle.set()
+
+    async def drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until all pending speech has been played.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+async def wait_for_playback(context: Any):
+    """
+    Waits until the speech of a call has been played, at most PLAYBACK_DRAIN_TIMEOUT seconds.
+
+    Returns at once for a context without a media stream.
+    """
+    playback: Optional[PlaybackTracker] = getattr(context, "playback", None)
+    if playback is None:
+        return
+    timeout = float(os.getenv("PLAYBACK_DRAIN_TIMEOUT", 10))
+    if not await playback.drained(timeout):
+        logger.warning(f"Playback of call {context.call_sid} not drained after {timeout}s, continuing")
@@ -0,0 +1,168 @@
+import os
+from typing import Any, Dict
+
+import numpy as np
+
+from services import audio
+from services.audio import BytesLike
+
+
+class SilenceTrimmer:
+    """
+    Energy based trimming of the leading and trailing silence that TTS providers add.
+
+    Audio is measured in short frames; speech starts at the first run of min_speech_ms
+    above threshold_db, which also skips the short click some providers start with, and
+    ends after the last frame above it. padding_ms of the original audio is kept on both
+    sides so word onsets and decays are not cut. One trimmer is used per TTS service,
+    and so per call, and counts how much audio it removed.
+    """
+
+    def __init__(self, threshold_db: float = -50, padding_ms: float = 20, min_speech_ms: float = 20, frame_ms: float = 10):
+        self.threshold_db = threshold_db
+        self.frame_bytes = audio.ms_to_bytes(frame_ms)
+        self.padding_bytes = audio.ms_to_bytes(padding_ms)
+        self.min_speech_frames = max(1, int(min_speech_ms // frame_ms))
+
+        self.clips = 0
+        self.leading_bytes = 0
+        self.trailing_bytes = 0
+
+    @classmethod
+    def from_env(cls, provider: str) -> "SilenceTrimmer":
+        """
+        Creates a trimmer configured for a TTS provider.
+
+        Provider specific variables, e.g. DEEPGRAM_TRIM_THRESHOLD_DB, take precedence
+        over the TTS_TRIM_* defaults.
+        """
+        def setting(name: str, default: float) -> float:
+            return float(os.getenv(f"{provider.upper()}_TRIM_{name}", os.getenv(f"TTS_TRIM_{name}", default)))
+
+        return cls(
+            threshold_db=setting("THRESHOLD_DB", -50),
+            padding_ms=setting("PADDING_MS", 20),
+            min_speech_ms=setting("MIN_SPEECH_MS", 20),
+        )
+
+    @property
+    def signature(self) -> str:
+        # Part of the cache key, so audio trimmed with other settings is not reused
+        return f"trim{self.threshold_db:g}db{self.padding_bytes}p{self.min_speech_frames}f"
+
+    def voiced_frames(self, clip: BytesLike) -> np.ndarray:
+        """Returns whether each complete frame of the clip is above the threshold."""
+        return audio.frame_rms_dbfs(clip, self.frame_bytes) > self.threshold_db
+
+    def speech_start(self, voiced: np.ndarray) -> int:
+        """Returns the first frame of a run of speech frames, or -1 if there is none."""
+        if len(voiced) < self.min_speech_frames:
+            return -1
+        runs = np.convolve(voiced, np.ones(self.min_speech_frames, dtype=np.int32), mode="valid")
+        starts = np.flatnonzero(runs == self.min_speech_frames)
+        return int(starts[0]) if len(starts) else -1
+
+    def trim(self, clip: BytesLike) -> bytes:
+        """
+        Trims a complete clip.
+
+        Args:
+            clip (BytesLike): Mulaw audio of one sentence.
+
+        Returns:
+            bytes: The trimmed audio, or the clip unchanged if no speech was found in it.
+        """
+        voiced = self.voiced_frames(clip)
+        first = self.speech_start(voiced)
+        if first < 0:
+            self.clips += 1
+            return bytes(clip)
+
+        last = int(np.flatnonzero(voiced)[-1])
+        start = max(0, first * self.frame_bytes - self.padding_bytes)
+        end = min(len(clip), (last + 1) * self.frame_bytes + self.padding_bytes)
+        self.record(start, len(clip) - end)
+        return bytes(memoryview(clip)[start:end])
+
+    def stream(self) -> "StreamingSilenceTrimmer":
+        return StreamingSilenceTrimmer(self)
+
+    def record(self, leading: int, trailing: int):
+        self.clips += 1
+        self.leading_bytes += leading
+        self.trailing_bytes += trailing
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clips": self.clips,
+            "leading_ms": round(audio.bytes_to_ms(self.leading_bytes)),
+            "trailing_ms": round(audio.bytes_to_ms(self.trailing_bytes)),
+            "removed_ms": round(audio.bytes_to_ms(self.leading_bytes + self.trailing_bytes)),
+        }
+
+
+class StreamingSilenceTrimmer:
+    """
+    Trims one clip that arrives in chunks.
+
+    Audio before the start of speech is held until speech is found, and silence after
+    it is held until more speech follows, so only the silence at the very start and
+    end of the clip is dropped.
+    """
+
+    def __init__(self, trimmer: SilenceTrimmer):
+        self.trimmer = trimmer
+        self.remainder = b""
+        self.started = False
+        self.run = 0
+        self.leading = bytearray()
+        self.held = bytearray()
+
+    def feed(self, chunk: BytesLike) -> bytes:
+        """
+        Adds a chunk of the clip.
+
+        Returns:
+            bytes: Audio that can be played now, possibly empty.
+        """
+        frame_bytes = self.trimmer.frame_bytes
+        data = self.remainder + bytes(chunk)
+        usable = len(data) - len(data) % frame_bytes
+        self.remainder = data[usable:]
+
+        out = bytearray()
+        for index, is_voiced in enumerate(self.trimmer.voiced_frames(data[:usable]).tolist()):
+            frame = data[index * frame_bytes:(index + 1) * frame_bytes]
+            if not self.started:
+                self.leading += frame
+                self.run = self.run + 1 if is_voiced else 0
+                if self.run >= self.trimmer.min_speech_frames:
+                    self.started = True
+                    keep = min(len(self.leading), self.run * frame_bytes + self.trimmer.padding_bytes)
+                    self.trimmer.leading_bytes += len(self.leading) - keep
+                    out += self.leading[len(self.leading) - keep:]
+                    self.leading = bytearray()
+            elif is_voiced:
+                out += self.held
+                out += frame
+                self.held = bytearray()
+            else:
+                self.held += frame
+        return bytes(out)
+
+    def finish(self) -> bytes:
+        """
+        Ends the clip.
+
+        Returns:
+            bytes: The rest of the audio to play, including the trailing padding.
+        """
+        if not self.started:
+            # No speech found, play the clip as it was
+            self.trimmer.clips += 1
+            return bytes(self.leading) + self.remainder
+
+        self.held += self.remainder
+        keep = min(len(self.held), self.trimmer.padding_bytes)
+        self.trimmer.record(0, len(self.held) - keep)
+        return bytes(self.held[:keep])
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, Optional
+
+from logger_config import get_logger
+from services.llm_service import AbstractLLMService
+
+logger = get_logger("Speculation")
+
+
+class SpeculationStats:
+    """Hit-rate and time-saved counters for speculative completions."""
+
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        decided = self.hits + self.misses
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / decided, 3) if decided else 0.0,
+            "saved_ms": self.saved_ms,
+            "avg_saved_ms": round(self.saved_ms / self.hits) if self.hits else 0,
+        }
+
+
+# Totals across all calls handled by this process
+speculation_stats = SpeculationStats()
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class SpeculativeCompleter:
+    """
+    Starts drafting a reply from a stable interim transcript before the caller's turn ends.
+
+    When the final transcript arrives, the draft is used if the two transcripts are at
+    least SPECULATION_THRESHOLD similar; otherwise it is cancelled and a regular
+    completion runs.
+    """
+
+    def __init__(self, llm_service: AbstractLLMService):
+        self.llm_service = llm_service
+        self.threshold = float(os.getenv("SPECULATION_THRESHOLD", 0.9))
+        self.stats = SpeculationStats()
+        self.task: Optional[asyncio.Task] = None
+        self.text = ""
+        self.started_at = 0.0
+
+    def speculate(self, text: str):
+        """
+        Starts drafting a reply to an interim transcript, replacing any older draft.
+
+        Args:
+            text (str): The interim transcript.
+        """
+        if self.task is not None and normalize_transcript(text) == normalize_transcript(self.text):
+            return
+
+        self.cancel()
+        self.text = text
+        self.started_at = time.monotonic()
+        self.task = asyncio.create_task(self._draft(text))
+        self.stats.started += 1
+        speculation_stats.started += 1
+        logger.info(f"Speculating on: {text}")
+
+    async def _draft(self, text: str):
+        draft = await self.llm_service.draft(text)
+        return draft, time.monotonic()
+
+    def similarity(self, text: str) -> float:
+        return SequenceMatcher(None, normalize_transcript(text), normalize_transcript(self.text)).ratio()
+
+    async def completion(self, text: str, interaction_count: int):
+        """
+        Completes a final transcript, from the speculative draft if it still applies.
+
+        Args:
+            text (str): The final transcript.
+            interaction_count (int): The interaction the completion belongs to.
+        """
+        task, self.task = self.task, None
+        if task is None:
+            await self.llm_service.completion(text, interaction_count)
+            return
+
+        turn_ended_at = time.monotonic()
+        similarity = self.similarity(text)
+        if similarity < self.threshold:
+            task.cancel()
+            self._record_miss(f"similarity {similarity:.2f}")
+            await self.llm_service.completion(text, interaction_count)
+            return
+
+        draft, finished_at = None, turn_ended_at
+        try:
+            draft, finished_at = await task
+        except asyncio.CancelledError:
+            # Only swallow the cancellation of the draft, not of the turn itself
+            if asyncio.current_task().cancelling():
+                raise
+        except Exception as e:
+            logger.error(f"Speculative draft failed: {str(e)}")
+
+        if not draft:
+            self._record_miss("no draft")
+            await self.llm_service.completion(text, interaction_count)
+            return
+
+        # Without speculation, generation would have started when the turn ended
+        saved_ms = int((min(finished_at, turn_ended_at) - self.started_at) * 1000)
+        self.stats.hits += 1
+        self.stats.saved_ms += saved_ms
+        speculation_stats.hits += 1
+        speculation_stats.saved_ms += saved_ms
+        logger.info(f"Speculation hit (similarity {similarity:.2f}), saved {saved_ms}ms")
+
+        await self.llm_service.complete_from_draft(text, draft, interaction_count)
+
+    def _record_miss(self, reason: str):
+        self.stats.misses += 1
+        speculation_stats.misses += 1
+        logger.info(f"Speculation miss ({reason})")
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -1,5 +1,9 @@
-import uuid
-from typing import Dict
+import asyncio
+import base64
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
 
@@ -8,47 +12,105 @@ from services.event_emmiter import EventEmitter
 
 logger = get_logger("Stream")
 
+# 20ms of 8kHz mulaw, the frame size Twilio itself uses
+FRAME_BYTES = 160
+FRAME_SECONDS = 0.02
+
 class StreamService(EventEmitter):
     def __init__(self, websocket: WebSocket):
         super().__init__()
         self.ws = websocket
         self.expected_audio_index = 0
-        self.audio_buffer: Dict[int, str] = {}
+        self.audio_buffer: Dict[int, List[Tuple[bytes, Any]]] = {}
+        self.completed_indices: Set[int] = set()
         self.stream_sid = ''
+        # Chunks of concurrent sentences must not interleave while draining
+        self.buffer_lock = asyncio.Lock()
+
+        # Paced mode sends audio in 20ms frames close to real time, so a clear
+        # only has to discard what Twilio has buffered for the pacing lead
+        self.pacing = os.getenv("STREAM_PACING", "false").lower() == "true"
+        self.pacing_lead = int(os.getenv("STREAM_PACING_LEAD_MS", 100)) / 1000
+        self.outbound: Deque[Tuple[memoryview, str]] = deque()
+        self.sender_task: Optional[asyncio.Task] = None
+        self.clear_generation = 0
+        self.playback_clock = 0.0
+        self.mark_counter = 0
 
     def set_stream_sid(self, stream_sid: str):
         self.stream_sid = stream_sid
 
-    async def buffer(self, index: int, audio: str):
-        if index is None:
-            await self.send_audio(audio)
-        elif index == self.expected_audio_index:
-            await self.send_audio(audio)
-            self.expected_audio_index += 1
+    async def buffer(self, index: int, audio: bytes, is_final: bool = True, tag: Any = None):
+        """Send or hold audio for a sentence, keeping sentences in index order.
 
-            while self.expected_audio_index in self.audio_buffer:
-                buffered_audio = self.audio_buffer[self.expected_audio_index]
-                await self.send_audio(buffered_audio)
-                del self.audio_buffer[self.expected_audio_index]
-                self.expected_audio_index += 1
-        else:
-            self.audio_buffer[index] = audio
+        Streaming TTS delivers a sentence as several chunks; only the chunk with
+        ``is_final`` set completes the sentence and lets the next index play.
+        A ``tag`` is passed along with the 'audiosent' event of the chunk's mark,
+        so listeners can tell which sentence Twilio has finished playing.
+        """
+        async with self.buffer_lock:
+            if index is None:
+                await self.send_audio(audio, tag)
+            elif index == self.expected_audio_index:
+                await self.send_audio(audio, tag)
+                if is_final:
+                    self.expected_audio_index += 1
+                    await self.drain_buffer()
+            elif index < self.expected_audio_index:
+                # Late chunk for a sentence that is already complete
+                return
+            else:
+                self.audio_buffer.setdefault(index, []).append((audio, tag))
+                if is_final:
+                    self.completed_indices.add(index)
+
+    async def drain_buffer(self):
+        while self.expected_audio_index in self.audio_buffer or self.expected_audio_index in self.completed_indices:
+            for buffered_audio, tag in self.audio_buffer.pop(self.expected_audio_index, []):
+                await self.send_audio(buffered_audio, tag)
+            if self.expected_audio_index not in self.completed_indices:
+                # Sentence is still streaming, its remaining chunks go out directly
+                break
+            self.completed_indices.remove(self.expected_audio_index)
+            self.expected_audio_index += 1
 
     def reset(self):
         self.expected_audio_index = 0
         self.audio_buffer = {}
+        self.completed_indices = set()
+
+    def next_mark_label(self) -> str:
+        self.mark_counter += 1
+        return str(self.mark_counter)
+
+    async def send_audio(self, audio: bytes, tag: Any = None):
+        # Tagged chunks get a mark even without audio, e.g. the end of a streamed sentence
+        if not audio and tag is None:
+            return
+
+        mark_label = self.next_mark_label()
+
+        if self.pacing:
+            self.outbound.append((memoryview(audio), mark_label))
+            if self.sender_task is None or self.sender_task.done():
+                self.sender_task = asyncio.create_task(self.send_outbound())
+        else:
+            if audio:
+                await self.send_media(audio)
+            await self.send_mark(mark_label)
+
+        await self.emit('audiosent', mark_label, tag)
 
-    async def send_audio(self, audio: str):
+    async def send_media(self, audio):
         await self.ws.send_json({
             "streamSid": self.stream_sid,
             "event": "media",
             "media": {
-                "payload": audio
+                "payload": base64.b64encode(audio).decode('utf-8')
             }
         })
 
-        mark_label = str(uuid.uuid4())
-
+    async def send_mark(self, mark_label: str):
         await self.ws.send_json({
             "streamSid": self.stream_sid,
             "event": "mark",
@@ -57,4 +119,53 @@ class StreamService(EventEmitter):
             }
         })
 
-        await self.emit('audiosent', mark_label)
\ No newline at end of file
+    async def send_outbound(self):
+        try:
+            while self.outbound:
+                audio, mark_label = self.outbound[0]
+                generation = self.clear_generation
+
+                for offset in range(0, len(audio), FRAME_BYTES):
+                    if generation != self.clear_generation:
+                        break
+                    await self.send_media(audio[offset:offset + FRAME_BYTES])
+                    await self.wait_for_frame_slot()
+
+                if generation != self.clear_generation:
+                    # Cleared mid-sentence, whatever is queued now is new audio
+                    continue
+
+                self.outbound.popleft()
+                await self.send_mark(mark_label)
+        except Exception as e:
+            logger.error(f"Error sending paced audio: {e}")
+
+    async def wait_for_frame_slot(self):
+        # Keep at most pacing_lead seconds of audio queued on Twilio's side
+        now = time.monotonic()
+        self.playback_clock = max(self.playback_clock, now) + FRAME_SECONDS
+        ahead = self.playback_clock - now - self.pacing_lead
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+    async def clear(self) -> List[str]:
+        """Stop playback on Twilio and drop audio that has not been sent yet.
+
+        Returns:
+            List[str]: Mark labels of the dropped audio, which Twilio will never acknowledge.
+        """
+        self.clear_generation += 1
+        dropped = [mark_label for _, mark_label in self.outbound]
+        self.outbound.clear()
+        self.playback_clock = 0.0
+
+        await self.ws.send_json({
+            "streamSid": self.stream_sid,
+            "event": "clear"
+        })
+        return dropped
+
+    async def close(self):
+        self.outbound.clear()
+        if self.sender_task is not None and not self.sender_task.done():
+            self.sender_task.cancel()
@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import os
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from logger_config import get_logger
+from services.connection_manager import connection_manager
+
+logger = get_logger("Telephony")
+
+ENDED_CALL_STATUSES = ['completed', 'failed', 'busy', 'no-answer', 'canceled']
+
+
+class TelephonyError(Exception):
+    """A telephony request that failed, with the provider's status code if there was a response."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class AbstractTelephonyClient(ABC):
+    """
+    Call control operations, returning the provider's call and recording resources as dicts.
+    """
+
+    @abstractmethod
+    async def create_call(self, to: str, from_: str, url: str, **params) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def fetch_call(self, call_sid: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def update_call(self, call_sid: str, **params) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def start_recording(self, call_sid: str, recording_channels: str = "dual") -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def list_recordings(self, call_sid: str) -> List[Dict[str, Any]]:
+        pass
+
+    async def end_call(self, call_sid: str) -> Dict[str, Any]:
+        return await self.update_call(call_sid, status="completed")
+
+    async def redirect_call(self, call_sid: str, url: str, method: str = "POST") -> Dict[str, Any]:
+        return await self.update_call(call_sid, url=url, method=method)
+
+
+class TwilioTelephonyClient(AbstractTelephonyClient):
+    """
+    Async client for the Twilio REST API.
+
+    Requests go through the shared connection pool instead of the blocking twilio
+    library. Rate limiting, server errors and network failures are retried with
+    exponential backoff, except that creating a call is only retried when Twilio
+    rejected it outright, so a call is never dialled twice.
+    """
+
+    def __init__(self):
+        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.base_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}"
+        self.timeout = float(os.getenv("TELEPHONY_TIMEOUT_SECONDS", 10))
+        self.max_retries = int(os.getenv("TELEPHONY_MAX_RETRIES", 3))
+        self.backoff = float(os.getenv("TELEPHONY_BACKOFF_SECONDS", 0.5))
+
+    async def request(self, method: str, path: str, data: Optional[Dict[str, Any]] = None, idempotent: bool = True) -> Dict[str, Any]:
+        session = connection_manager.get_session()
+        auth = aiohttp.BasicAuth(self.account_sid or "", self.auth_token or "")
+        # Twilio expects form parameters; booleans as lowercase strings, lists as repeated parameters
+        form = []
+        for key, value in (data or {}).items():
+            for item in value if isinstance(value, (list, tuple)) else [value]:
+                form.append((key, str(item).lower() if isinstance(item, bool) else str(item)))
+
+        for attempt in range(self.max_retries + 1):
+            retry = attempt < self.max_retries
+            try:
+                async with session.request(
+                    method,
+                    f"{self.base_url}{path}",
+                    data=form or None,
+                    auth=auth,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    body = await response.json(content_type=None)
+                    if response.status < 400:
+                        return body
+                    message = body.get("message", "") if isinstance(body, dict) else str(body)
+                    error = TelephonyError(f"Twilio {method} {path} returned {response.status}: {message}", response.status)
+                    # Rate limited requests were not processed and are always safe to repeat
+                    if response.status != 429 and not (idempotent and response.status >= 500):
+                        raise error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = TelephonyError(f"Twilio {method} {path} failed: {e!r}")
+                if not idempotent:
+                    raise error from e
+
+            if not retry:
+                raise error
+            delay = self.backoff * 2 ** attempt * random.uniform(0.8, 1.2)
+            logger.warning(f"{error}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def create_call(self, to: str, from_: str, url: str, **params) -> Dict[str, Any]:
+        data = {"To": to, "From": from_, "Url": url}
+        data.update({self.parameter_name(key): value for key, value in params.items()})
+        return await self.request("POST", "/Calls.json", data, idempotent=False)
+
+    async def fetch_call(self, call_sid: str) -> Dict[str, Any]:
+        return await self.request("GET", f"/Calls/{call_sid}.json")
+
+    async def update_call(self, call_sid: str, **params) -> Dict[str, Any]:
+        data = {self.parameter_name(key): value for key, value in params.items()}
+        return await self.request("POST", f"/Calls/{call_sid}.json", data)
+
+    async def start_recording(self, call_sid: str, recording_channels: str = "dual") -> Dict[str, Any]:
+        return await self.request(
+            "POST", f"/Calls/{call_sid}/Recordings.json", {"RecordingChannels": recording_channels}, idempotent=False
+        )
+
+    async def list_recordings(self, call_sid: str) -> List[Dict[str, Any]]:
+        body = await self.request("GET", f"/Calls/{call_sid}/Recordings.json")
+        return body.get("recordings", [])
+
+    @staticmethod
+    def parameter_name(name: str) -> str:
+        # status_callback -> StatusCallback
+        return "".join(part.capitalize() for part in name.split("_"))
+
+
+class FakeTelephonyClient(AbstractTelephonyClient):
+    """
+    In-memory telephony for tests and local development without a Twilio account.
+
+    Calls and recordings are kept in dicts and every operation is appended to
+    `requests`, so tests can assert on what would have been sent.
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        self.recordings: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.ids = itertools.count(1)
+
+    def get_call(self, call_sid: str) -> Dict[str, Any]:
+        if call_sid not in self.calls:
+            raise TelephonyError(f"Call {call_sid} not found", 404)
+        return self.calls[call_sid]
+
+    async def create_call(self, to: str, from_: str, url: str, **params) -> Dict[str, Any]:
+        call_sid = f"CA{next(self.ids):032d}"
+        self.calls[call_sid] = {"sid": call_sid, "to": to, "from": from_, "url": url, "status": "queued", **params}
+        self.requests.append({"operation": "create_call", "call_sid": call_sid, **self.calls[call_sid]})
+        return dict(self.calls[call_sid])
+
+    async def fetch_call(self, call_sid: str) -> Dict[str, Any]:
+        self.requests.append({"operation": "fetch_call", "call_sid": call_sid})
+        return dict(self.get_call(call_sid))
+
+    async def update_call(self, call_sid: str, **params) -> Dict[str, Any]:
+        self.requests.append({"operation": "update_call", "call_sid": call_sid, **params})
+        call = self.get_call(call_sid)
+        call.update(params)
+        return dict(call)
+
+    async def start_recording(self, call_sid: str, recording_channels: str = "dual") -> Dict[str, Any]:
+        self.requests.append({"operation": "start_recording", "call_sid": call_sid, "recording_channels": recording_channels})
+        self.get_call(call_sid)
+        recording_sid = f"RE{next(self.ids):032d}"
+        recording = {
+            "sid": recording_sid,
+            "call_sid": call_sid,
+            "channels": 2 if recording_channels == "dual" else 1,
+            "uri": f"/2010-04-01/Accounts/ACfake/Recordings/{recording_sid}.json"
+        }
+        self.recordings.setdefault(call_sid, []).append(recording)
+        return dict(recording)
+
+    async def list_recordings(self, call_sid: str) -> List[Dict[str, Any]]:
+        self.requests.append({"operation": "list_recordings", "call_sid": call_sid})
+        return [dict(recording) for recording in self.recordings.get(call_sid, [])]
+
+
+class TelephonyFactory:
+    @staticmethod
+    def get_telephony_client(client_name: str) -> AbstractTelephonyClient:
+        if client_name.lower() == "twilio":
+            return TwilioTelephonyClient()
+        elif client_name.lower() == "fake":
+            return FakeTelephonyClient()
+        else:
+            raise ValueError(f"Unsupported telephony client: {client_name}")
+
+
+telephony_client = TelephonyFactory.get_telephony_client(os.getenv("TELEPHONY_CLIENT", "twilio"))
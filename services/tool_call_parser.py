@@ -0,0 +1,90 @@
+import re
+from typing import Iterable, List, Tuple
+
+from logger_config import get_logger
+
+logger = get_logger("ToolCallParser")
+
+# A tool call written by the LLM: [function_name(args)]
+TOOL_CALL_PATTERN = re.compile(r'\[(\w+)\((.*?)\)\]')
+# Text that may still grow into a tool call
+TOOL_CALL_PREFIX_PATTERN = re.compile(r'\[\w*(?:\([^\n]*)?\Z')
+TOOL_CALL_START_PATTERN = re.compile(r'\[(\w+)\(')
+
+
+class ToolCallParser:
+    """
+    Incrementally separates tool calls from the text of a streamed LLM reply.
+
+    Text is passed through as soon as it cannot be part of a tool call. From a "[" on,
+    text is withheld until it either closes as [name(args)], which is reported as a
+    call and never returned as text, or stops looking like a tool call, in which case
+    it is released. The call ends the reply: text after it is never spoken.
+    """
+
+    def __init__(self, function_names: Iterable[str]):
+        self.function_names = set(function_names)
+        self.pending = ""
+
+    def feed(self, text: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Adds streamed text.
+
+        Args:
+            text (str): The next piece of the reply.
+
+        Returns:
+            Tuple[str, List[Tuple[str, str]]]: Text that can be spoken up to the first
+            tool call, and the (function_name, args) of that call, if this piece
+            completed one.
+        """
+        buffer = self.pending + text
+        self.pending = ""
+        speakable = []
+        calls = []
+
+        while buffer:
+            start = buffer.find("[")
+            if start < 0:
+                speakable.append(buffer)
+                break
+            speakable.append(buffer[:start])
+            buffer = buffer[start:]
+
+            match = TOOL_CALL_PATTERN.match(buffer)
+            if match:
+                function_name, args = match.groups()
+                if function_name in self.function_names:
+                    calls.append((function_name, args))
+                    break
+                else:
+                    logger.info(f"Dropping call to unknown function: {function_name}")
+                buffer = buffer[match.end():]
+            elif TOOL_CALL_PREFIX_PATTERN.match(buffer):
+                # Wait for more text to decide
+                self.pending = buffer
+                break
+            else:
+                speakable.append("[")
+                buffer = buffer[1:]
+
+        return "".join(speakable), calls
+
+    def finish(self) -> str:
+        """
+        Ends the reply.
+
+        Returns:
+            str: Withheld text that turned out not to be a tool call. An unterminated
+            tool call, e.g. in a reply cut off by the token limit, is dropped.
+        """
+        pending, self.pending = self.pending, ""
+        if TOOL_CALL_START_PATTERN.match(pending):
+            logger.info(f"Dropping unterminated tool call: {pending}")
+            return ""
+        return pending
+
+    def strip(self, text: str) -> str:
+        """Returns the speakable text of a complete reply."""
+        speakable, _ = self.feed(text)
+        return speakable + self.finish()
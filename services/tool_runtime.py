@@ -0,0 +1,79 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from functions.function_manifest import tools
+from logger_config import get_logger
+
+logger = get_logger("ToolRuntime")
+
+ToolFunction = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+
+
+def function_declarations(manifest: List[Dict[str, Any]] = tools) -> List[Dict[str, Any]]:
+    """
+    Converts the function manifest to function declarations for native function calling.
+
+    Only name, description and parameters are passed on; parameters are omitted for
+    functions without any, since providers reject empty object schemas.
+    """
+    declarations = []
+    for tool in manifest:
+        function = tool["function"]
+        declaration = {"name": function["name"], "description": function["description"]}
+        parameters = function.get("parameters") or {}
+        if parameters.get("properties"):
+            declaration["parameters"] = parameters
+        declarations.append(declaration)
+    return declarations
+
+
+class ToolRuntime:
+    """
+    Executes the tool calls requested by the LLM in one reply.
+
+    Calls run concurrently, each bounded by the "timeout" of its manifest entry or
+    TOOL_TIMEOUT_SECONDS; a timeout of None exempts a tool, e.g. call control that must
+    not be cut off halfway. A call that fails or times out yields an error result for
+    the LLM instead of raising, so one slow or broken tool does not lose the others.
+    """
+
+    def __init__(self, functions: Dict[str, ToolFunction], manifest: List[Dict[str, Any]] = tools):
+        self.functions = functions
+        default_timeout = float(os.getenv("TOOL_TIMEOUT_SECONDS", 15))
+        self.timeouts: Dict[str, Optional[float]] = {}
+        for tool in manifest:
+            timeout = tool["function"].get("timeout", default_timeout)
+            self.timeouts[tool["function"]["name"]] = float(timeout) if timeout is not None else None
+        self.default_timeout = default_timeout
+
+    async def execute(self, context: Any, function_name: str, args: Dict[str, Any]) -> Any:
+        function = self.functions.get(function_name)
+        if function is None:
+            return {"success": False, "error": f"Unknown function: {function_name}"}
+
+        timeout = self.timeouts.get(function_name, self.default_timeout)
+        try:
+            if timeout is None:
+                return await function(context, args)
+            return await asyncio.wait_for(function(context, args), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {function_name} timed out after {timeout}s")
+            return {"success": False, "error": f"{function_name} timed out"}
+        except Exception as e:
+            logger.error(f"Tool {function_name} failed: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    async def run(self, context: Any, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Executes tool calls concurrently.
+
+        Args:
+            context (Any): The call context passed to every tool.
+            calls (List[Tuple[str, Dict[str, Any]]]): (function_name, args) of each call.
+
+        Returns:
+            List[Any]: The result of each call, in the order of the calls.
+        """
+        logger.info(f"Running tools: {[function_name for function_name, _ in calls]}")
+        return await asyncio.gather(*(self.execute(context, function_name, args) for function_name, args in calls))
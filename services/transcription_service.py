@@ -15,6 +15,14 @@ class TranscriptionService(EventEmitter):
         self.final_result = ""
         self.speech_final = False
         self.stream_sid = None
+        # Set when the local VAD has decided the caller finished speaking
+        self.end_of_turn_requested = False
+        self.interim_pending = False
+        # Interim transcripts that stay the same are offered for speculative replies
+        self.stable_results = int(os.getenv("SPECULATION_STABLE_RESULTS", 2))
+        self.candidate = ""
+        self.candidate_count = 0
+        self.speculated = ""
 
     def set_stream_sid(self, stream_id):
         self.stream_sid = stream_id
@@ -47,9 +55,8 @@ class TranscriptionService(EventEmitter):
         try:
             if not self.speech_final:
                 logger.info(f"UtteranceEnd received before speech was final, emit the text collected so far: {self.final_result}")
-                await self.emit('transcription', self.final_result)
-                self.final_result = ''
-                self.speech_final = True
+                # Ends the turn like a final result would, so no speculation or end of turn request carries over
+                await self.emit_turn()
                 return
             else:
                 return
@@ -64,20 +71,68 @@ class TranscriptionService(EventEmitter):
 
             if result.is_final and text.strip():
                 self.final_result += f" {text}"
-                if result.speech_final:
-                    self.speech_final = True
-                    await self.emit('transcription', self.final_result)
-                    self.final_result = ''
+                self.interim_pending = False
+                if result.speech_final or self.end_of_turn_requested:
+                    await self.emit_turn()
                 else:
                     self.speech_final = False
+                    await self.track_candidate(self.final_result, stable=True)
             else:
                 if text.strip():
+                    self.interim_pending = True
                     stream_sid = self.stream_sid
                     await self.emit('utterance', text, stream_sid)
+                    await self.track_candidate(f"{self.final_result} {text}")
         except Exception as e:
             logger.error(f"Error while handling transcription: {e}")
             e.print_stack()
 
+
+    async def track_candidate(self, text: str, stable: bool = False):
+        """Emits 'speculation' once the transcript of the current turn stops changing.
+
+        Args:
+            text (str): Finalized text of the turn plus the latest interim result.
+            stable (bool): Whether the text is already final and needs no repeats.
+        """
+        text = text.strip()
+        if text == self.candidate:
+            self.candidate_count += 1
+        else:
+            self.candidate = text
+            self.candidate_count = 1
+
+        if (stable or self.candidate_count >= self.stable_results) and text != self.speculated:
+            self.speculated = text
+            await self.emit('speculation', text)
+
+    async def emit_turn(self):
+        self.speech_final = True
+        self.end_of_turn_requested = False
+        self.candidate = ""
+        self.candidate_count = 0
+        self.speculated = ""
+        text = self.final_result
+        self.final_result = ''
+        await self.emit('transcription', text)
+
+    async def end_turn(self):
+        """Ends the caller's turn without waiting for Deepgram's endpointing.
+
+        Text Deepgram has already finalized is emitted straight away; otherwise
+        Deepgram is asked to finalize what it has heard and the next final result
+        ends the turn.
+        """
+        self.end_of_turn_requested = True
+        if self.final_result.strip() and not self.interim_pending:
+            logger.info(f"Local end of turn, emitting: {self.final_result}")
+            await self.emit_turn()
+        elif self.deepgram_live:
+            await self.deepgram_live.finalize()
+
+    def resume_turn(self):
+        # The caller started speaking again, wait for the next end of turn
+        self.end_of_turn_requested = False
             
     async def handle_error(self, self_obj, error):
         logger.error(f"Deepgram error: {error}")
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from logger_config import get_logger
+
+logger = get_logger("TTSCache")
+
+# Phrases that missed recently, to notice one being synthesized a second time
+MAX_MISSED_KEYS = 4096
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized audio, stored as raw mulaw bytes.
+
+    Recently used phrases live in an in-memory LRU. Phrases that are pre-warmed or
+    used more than once are also written to disk, so they survive restarts and are
+    shared between workers, while one-off sentences stay in memory only. Disk reads
+    and writes run in a thread and never block the event loop.
+    """
+
+    def __init__(self):
+        self.max_memory_bytes = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+        self.max_disk_bytes = int(os.getenv("TTS_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+        self.cache_dir = os.getenv("TTS_CACHE_DIR", "cache/tts")
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # Phrases in memory that are not on disk yet
+        self._unsaved: Set[str] = set()
+        self._missed: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+        self._writes: Set[asyncio.Task] = set()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, voice: str, model: str, encoding: str, text: str) -> str:
+        """
+        Builds the cache key for a synthesized phrase.
+
+        Args:
+            provider (str): TTS provider name.
+            voice (str): Voice identifier.
+            model (str): Model identifier.
+            encoding (str): Output encoding and sample rate.
+            text (str): Text that was synthesized.
+
+        Returns:
+            str: Hex digest identifying the audio.
+        """
+        raw = json.dumps([provider, voice, model, encoding, text.strip()], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.ulaw")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            if key in self._unsaved:
+                # Used again, worth keeping across restarts
+                self._save(key, audio)
+            return audio
+
+        if self.cache_dir:
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                return audio
+
+        self.misses += 1
+        self._missed[key] = self._missed.pop(key, 0) + 1
+        while len(self._missed) > MAX_MISSED_KEYS:
+            self._missed.popitem(last=False)
+        return None
+
+    async def contains(self, key: str) -> bool:
+        if key in self._memory:
+            return True
+        return bool(self.cache_dir) and await asyncio.to_thread(os.path.exists, self._path(key))
+
+    def put(self, key: str, audio: bytes, persist: bool = False):
+        """
+        Caches synthesized audio.
+
+        Args:
+            key (str): Cache key of the phrase.
+            audio (bytes): The synthesized audio.
+            persist (bool): Write it to disk right away, e.g. for pre-warmed phrases.
+        """
+        if not audio:
+            return
+        self._remember(key, audio)
+        if not self.cache_dir:
+            return
+        # A phrase that missed before was synthesized again after it left memory
+        if persist or self._missed.get(key, 0) > 1:
+            self._missed.pop(key, None)
+            self._save(key, audio)
+        else:
+            self._unsaved.add(key)
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._unsaved.discard(evicted_key)
+
+    def _save(self, key: str, audio: bytes):
+        self._unsaved.discard(key)
+        task = asyncio.create_task(asyncio.to_thread(self._write, key, audio))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read cached audio {key}: {e}")
+            return None
+
+    async def flush(self):
+        """Waits for pending disk writes, e.g. before shutting down."""
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    def _write(self, key: str, audio: bytes):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cached audio {key}: {e}")
+            return
+
+        # Writes run in threads of their own, keep the size accounting consistent
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(audio)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _cache_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".ulaw"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(stat.st_size for _, stat in self._cache_files())
+
+    def _prune_disk(self):
+        # Drop least recently modified files until the disk tier is back under 90% of its limit
+        files = sorted(self._cache_files(), key=lambda item: item[1].st_mtime)
+        target = int(self.max_disk_bytes * 0.9)
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= stat.st_size
+            except OSError:
+                continue
+        self._disk_bytes = total
+        logger.info(f"Pruned TTS disk cache to {total} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "unsaved_entries": len(self._unsaved),
+            "disk_bytes": self._disk_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+tts_cache = TTSCache()
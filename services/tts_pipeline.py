@@ -0,0 +1,70 @@
+import asyncio
+import os
+from typing import Any, Dict, Set
+
+from logger_config import get_logger
+from services.tts_service import AbstractTTSService
+
+logger = get_logger("TTSPipeline")
+
+
+class TTSPipeline:
+    """
+    Per-call TTS stage that synthesizes upcoming sentences concurrently.
+
+    Sentences are handed off as soon as the LLM produces them, so sentence N+1 is
+    being synthesized while sentence N plays. Playback order is kept by
+    StreamService, which buffers audio by partialResponseIndex.
+    """
+
+    def __init__(self, tts_service: AbstractTTSService, max_concurrency: int = None):
+        self.tts_service = tts_service
+        self.max_concurrency = max_concurrency or int(os.getenv("TTS_MAX_CONCURRENCY", 3))
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, llm_reply: Dict[str, Any], interaction_count: int) -> asyncio.Task:
+        """
+        Starts synthesis of a reply without waiting for it to finish.
+
+        Waits only while all synthesis slots are busy, which slows the LLM down
+        instead of letting requests pile up.
+
+        Args:
+            llm_reply (Dict[str, Any]): The 'llmreply' payload.
+            interaction_count (int): Interaction the reply belongs to.
+
+        Returns:
+            asyncio.Task: The synthesis task.
+        """
+        await self.semaphore.acquire()
+
+        # Unindexed replies are sent as soon as they are synthesized, so they wait
+        # for earlier sentences to keep the spoken order
+        predecessors = list(self.tasks) if llm_reply.get('partialResponseIndex') is None else []
+
+        task = asyncio.create_task(self._run(llm_reply, interaction_count, predecessors))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        # Released when the task is done rather than by _run, which never runs when
+        # the task is cancelled before it starts
+        task.add_done_callback(lambda _: self.semaphore.release())
+        return task
+
+    async def _run(self, llm_reply, interaction_count, predecessors):
+        try:
+            if predecessors:
+                await asyncio.gather(*predecessors, return_exceptions=True)
+            await self.tts_service.generate(llm_reply, interaction_count)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in TTS pipeline: {str(e)}")
+
+    def cancel(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+    async def drain(self):
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
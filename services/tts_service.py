@@ -1,26 +1,154 @@
 
-import base64
 import os
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-import aiohttp
-import numpy as np
-from deepgram import DeepgramClient, LiveOptions
 from dotenv import load_dotenv
 
 from logger_config import get_logger
+from services.connection_manager import connection_manager
 from services.event_emmiter import EventEmitter
+from services.silence_trimmer import SilenceTrimmer
+from services.tts_cache import TTSCache, tts_cache
 
 load_dotenv()
 logger = get_logger("TTS")
 
 
 class AbstractTTSService(EventEmitter, ABC):
+    name = ""
+    output_format = ""
+
+    def __init__(self):
+        super().__init__()
+        # Forward audio to the stream as it arrives instead of once per sentence
+        self.streaming = os.getenv("TTS_STREAMING", "false").lower() == "true"
+        self.stream_chunk_size = int(os.getenv("TTS_STREAM_CHUNK_BYTES", 1600))
+        # Providers pad every sentence with silence, which adds up between sentences
+        self.trimmer = None
+        if os.getenv("TTS_TRIM_SILENCE", "true").lower() == "true":
+            self.trimmer = SilenceTrimmer.from_env(self.name)
+
     @abstractmethod
-    async def generate(self, llm_reply: Dict[str, Any], interaction_count: int):
+    def build_request(self, text: str) -> Dict[str, Any]:
+        """Returns the url, headers, params and json body of a synthesis request."""
         pass
 
+    @abstractmethod
+    def cache_key(self, text: str) -> str:
+        pass
+
+    @property
+    def audio_format(self) -> str:
+        # Identifies the processed audio in cache keys
+        if self.trimmer is None:
+            return self.output_format
+        return f"{self.output_format}:{self.trimmer.signature}"
+
+    def post_process(self, audio: bytes) -> bytes:
+        if self.trimmer is None:
+            return audio
+        return self.trimmer.trim(audio)
+
+    def trim_stats(self) -> Dict[str, Any]:
+        return self.trimmer.stats() if self.trimmer is not None else {}
+
+    async def generate(self, llm_reply: Dict[str, Any], interaction_count: int):
+        partial_response_index, partial_response = llm_reply['partialResponseIndex'], llm_reply['partialResponse']
+
+        if not partial_response:
+            return
+
+        key = self.cache_key(partial_response)
+        cached_audio = await tts_cache.get(key)
+        if cached_audio is not None:
+            await self.emit('speech', partial_response_index, cached_audio, partial_response, interaction_count)
+            return
+
+        try:
+            session = connection_manager.get_session()
+            async with session.post(**self.build_request(partial_response)) as response:
+                if response.status != 200:
+                    logger.error(f"{self.name} TTS returned status {response.status}")
+                    await self.emit_empty(partial_response_index, partial_response, interaction_count)
+                    return
+
+                if self.streaming:
+                    await self.emit_stream(
+                        partial_response_index,
+                        response.content.iter_chunked(self.stream_chunk_size),
+                        partial_response,
+                        interaction_count,
+                        key
+                    )
+                    return
+
+                audio_content = self.post_process(await response.read())
+
+            tts_cache.put(key, audio_content)
+            await self.emit('speech', partial_response_index, audio_content, partial_response, interaction_count)
+        except Exception as e:
+            logger.error(f"Error in {self.name} TTS generation: {str(e)}")
+            await self.emit_empty(partial_response_index, partial_response, interaction_count)
+
+    async def emit_stream(self, partial_response_index, chunks, partial_response, interaction_count, key):
+        """Emit each chunk of an async byte iterator as a partial 'speech' event.
+
+        A final empty chunk marks the sentence as complete so the stream service
+        can move on to the next partialResponseIndex. The complete audio is cached
+        once the provider has finished sending it.
+        """
+        received = []
+        trimmer = self.trimmer.stream() if self.trimmer is not None else None
+
+        async def emit_chunk(chunk):
+            if chunk:
+                received.append(chunk)
+                await self.emit('speech', partial_response_index, chunk, partial_response, interaction_count, False)
+
+        try:
+            async for chunk in chunks:
+                await emit_chunk(trimmer.feed(chunk) if trimmer is not None else chunk)
+            if trimmer is not None:
+                await emit_chunk(trimmer.finish())
+            tts_cache.put(key, b"".join(received))
+        finally:
+            await self.emit_empty(partial_response_index, partial_response, interaction_count)
+
+    async def emit_empty(self, partial_response_index, partial_response, interaction_count):
+        # Completes a sentence without audio so later sentences are not held back
+        if partial_response_index is not None:
+            await self.emit('speech', partial_response_index, b"", partial_response, interaction_count, True)
+
+    async def synthesize(self, text: str) -> Optional[bytes]:
+        """Synthesizes text into the cache, on disk too, without emitting it, returning the audio."""
+        key = self.cache_key(text)
+        cached_audio = await tts_cache.get(key)
+        if cached_audio is not None:
+            return cached_audio
+
+        session = connection_manager.get_session()
+        async with session.post(**self.build_request(text)) as response:
+            if response.status != 200:
+                logger.error(f"{self.name} TTS returned status {response.status} for '{text}'")
+                return None
+            audio_content = self.post_process(await response.read())
+
+        tts_cache.put(key, audio_content, persist=True)
+        return audio_content
+
+    async def prewarm(self, phrases: List[str]):
+        """Makes sure every phrase is in the cache, synthesizing the missing ones."""
+        missing = [phrase for phrase in phrases if phrase and not await tts_cache.contains(self.cache_key(phrase))]
+        synthesized = 0
+        for phrase in missing:
+            try:
+                if await self.synthesize(phrase) is not None:
+                    synthesized += 1
+            except Exception as e:
+                logger.error(f"Error pre-warming TTS cache for '{phrase}': {str(e)}")
+        logger.info(f"TTS cache ready: {len(phrases) - len(missing)} cached, {synthesized} synthesized, {len(missing) - synthesized} failed")
+
     @abstractmethod
     async def set_voice(self, voice_id: str):
         pass
@@ -30,6 +158,9 @@ class AbstractTTSService(EventEmitter, ABC):
         pass
 
 class ElevenLabsTTS(AbstractTTSService):
+    name = "elevenlabs"
+    output_format = "ulaw_8000"
+
     def __init__(self):
         super().__init__()
         self.voice_id = os.getenv("ELEVENLABS_VOICE_ID")
@@ -45,90 +176,57 @@ class ElevenLabsTTS(AbstractTTSService):
         # ElevenLabs client doesn't require explicit disconnection
         return
 
+    def cache_key(self, text: str) -> str:
+        return TTSCache.make_key(self.name, self.voice_id, self.model_id, self.audio_format, text)
 
-    async def generate(self, llm_reply: Dict[str, Any], interaction_count: int):
-        partial_response_index, partial_response = llm_reply['partialResponseIndex'], llm_reply['partialResponse']
-
-        if not partial_response:
-            return
-
-        try:
-            output_format = "ulaw_8000"            
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/stream"
-            headers = {
+    def build_request(self, text: str) -> Dict[str, Any]:
+        return {
+            "url": f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/stream",
+            "headers": {
                 "xi-api-key": self.api_key,
                 "Content-Type": "application/json",
                 "Accept": "audio/wav"
-            }
-            params = {
-                "output_format": output_format,
+            },
+            "params": {
+                "output_format": self.output_format,
                 "optimize_streaming_latency": 4
-            }
-            data = {
+            },
+            "json": {
                 "model_id": self.model_id,
-                "text": partial_response
+                "text": text
             }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, params=params, json=data) as response:
-                    if response.status == 200:
-                        audio_content = await response.read()
-                        audio_base64 = base64.b64encode(audio_content).decode('utf-8')
-                        await self.emit('speech', partial_response_index, audio_base64, partial_response, interaction_count)
-        except Exception as err:
-            logger.error("Error occurred in ElevenLabs TTS service", exc_info=True)
-            logger.error(str(err))
+        }
 
 
 class DeepgramTTS(AbstractTTSService):
+    name = "deepgram"
+    output_format = "mulaw_8000"
+
     def __init__(self):
         super().__init__()
-        self.client = DeepgramClient(os.getenv("DEEPGRAM_API_KEY"))
-
-    async def generate(self, llm_reply, interaction_count):
-        partial_response_index = llm_reply['partialResponseIndex']
-        partial_response = llm_reply['partialResponse']
-
-        if not partial_response:
-            return
-
-        try:
-            source = {
-                "text": partial_response
-            }
-
-            options = {
-                "model": "aura-asteria-en",
-                "encoding": "mulaw", 
-                "sample_rate": 8000 
-            }
-            
-            response = await self.client.asyncspeak.v("1").stream(
-                source={"text": partial_response},
-                options=options
-            )
-
-            if response.stream:
-                audio_content = response.stream.getvalue()
-                
-                # Convert audio to numpy array
-                audio_array = np.frombuffer(audio_content, dtype=np.uint8)
-                
-                # Trim the first 10ms (80 samples at 8000Hz) to remove the initial noise
-                trim_samples = 80
-                trimmed_audio = audio_array[trim_samples:]
-                
-                # Convert back to bytes
-                trimmed_audio_bytes = trimmed_audio.tobytes()
-
-                audio_base64 = base64.b64encode(trimmed_audio_bytes).decode('utf-8')
-                await self.emit('speech', partial_response_index, audio_base64, partial_response, interaction_count)
-            else:
-                logger.error("Error in TTS generation: No audio stream returned")
-
-        except Exception as e:
-            logger.error(f"Error in TTS generation: {str(e)}")
-
+        self.api_key = os.getenv("DEEPGRAM_API_KEY")
+        self.model = "aura-asteria-en"
+
+    def cache_key(self, text: str) -> str:
+        # Deepgram voices are selected through the model name
+        return TTSCache.make_key(self.name, self.model, self.model, self.audio_format, text)
+
+    def build_request(self, text: str) -> Dict[str, Any]:
+        # The REST endpoint is called directly so requests go through the shared connection pool
+        return {
+            "url": "https://api.deepgram.com/v1/speak",
+            "headers": {
+                "Authorization": f"Token {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            "params": {
+                "model": self.model,
+                "encoding": "mulaw",
+                "sample_rate": 8000,
+                "container": "none"
+            },
+            "json": {"text": text}
+        }
 
     async def set_voice(self, voice_id):
         logger.info(f"Attempting to set voice to {voice_id}, but Deepgram TTS doesn't support direct voice selection.")
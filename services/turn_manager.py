@@ -0,0 +1,77 @@
+import asyncio
+from typing import Coroutine, Dict, List, Set
+
+from logger_config import get_logger
+
+logger = get_logger("Turns")
+
+
+class TurnManager:
+    """
+    Tracks the tasks started for each interaction so that barge-in can cancel them.
+
+    Every LLM completion and TTS synthesis of an interaction is registered under its
+    interaction_count. Cancelling a turn cancels all of its outstanding tasks, which also
+    aborts their in-flight provider requests, and marks the interaction as cancelled so
+    late events for it can be dropped. Hangups and transfers are not turn work: they
+    run in services.call_control, so a barge-in during the goodbye cannot keep the
+    call up.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[int, Set[asyncio.Task]] = {}
+        self.cancelled: Set[int] = set()
+
+    def track(self, interaction_count: int, task: asyncio.Task):
+        if interaction_count in self.cancelled:
+            task.cancel()
+            return
+
+        turn_tasks = self.tasks.setdefault(interaction_count, set())
+        turn_tasks.add(task)
+
+        def forget(done_task):
+            turn_tasks.discard(done_task)
+            if not turn_tasks and self.tasks.get(interaction_count) is turn_tasks:
+                del self.tasks[interaction_count]
+
+        task.add_done_callback(forget)
+
+    def start(self, interaction_count: int, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.track(interaction_count, task)
+        return task
+
+    async def run(self, interaction_count: int, coro: Coroutine) -> bool:
+        """
+        Runs a coroutine as part of a turn and waits for it.
+
+        Returns:
+            bool: False if the turn was cancelled before the coroutine finished.
+        """
+        task = self.start(interaction_count, coro)
+        # asyncio.wait does not raise when the task is cancelled by a barge-in
+        await asyncio.wait({task})
+        return not task.cancelled()
+
+    def is_cancelled(self, interaction_count: int) -> bool:
+        return interaction_count in self.cancelled
+
+    def cancel(self, interaction_count: int):
+        self.cancelled.add(interaction_count)
+        for task in list(self.tasks.pop(interaction_count, ())):
+            task.cancel()
+
+    def cancel_all(self) -> List[int]:
+        """
+        Cancels every turn that still has work in flight.
+
+        Returns:
+            List[int]: The interaction counts that were cancelled.
+        """
+        active = list(self.tasks)
+        for interaction_count in active:
+            self.cancel(interaction_count)
+        if active:
+            logger.info(f"Cancelled in-flight work for interactions {active}")
+        return active
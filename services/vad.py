@@ -0,0 +1,96 @@
+import os
+import time
+
+import numpy as np
+
+from logger_config import get_logger
+from services.audio import MULAW_DECODE_TABLE, as_mulaw_array
+from services.event_emmiter import EventEmitter
+
+logger = get_logger("VAD")
+
+# 20ms frames of 8kHz audio
+FRAME_SAMPLES = 160
+FRAME_MS = 20
+
+
+class VoiceActivityDetector(EventEmitter):
+    """
+    Energy and zero-crossing voice activity detector for the inbound mulaw stream.
+
+    Emits 'speech_start' once speech has lasted VAD_START_MS and 'speech_end' once
+    it has been followed by VAD_END_MS of silence, so the pipeline can react before
+    Deepgram's server-side endpointing does. The energy threshold follows the
+    background noise level of the call.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.min_energy_db = float(os.getenv("VAD_ENERGY_DB", -45))
+        self.noise_margin_db = float(os.getenv("VAD_NOISE_MARGIN_DB", 12))
+        self.max_zero_crossing_rate = float(os.getenv("VAD_MAX_ZCR", 0.35))
+        self.start_frames = max(1, int(os.getenv("VAD_START_MS", 60)) // FRAME_MS)
+        self.end_frames = max(1, int(os.getenv("VAD_END_MS", 300)) // FRAME_MS)
+
+        self.noise_floor_db = self.min_energy_db - self.noise_margin_db
+        self.speaking = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.speech_started_at = 0.0
+        self.remainder = b""
+
+    def frame_features(self, audio: bytes):
+        """
+        Decodes complete 20ms frames and measures their energy and zero-crossing rate.
+
+        Args:
+            audio (bytes): Mulaw audio whose length is a multiple of the frame size.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Energy in dBFS and zero-crossing rate per frame.
+        """
+        codes = as_mulaw_array(audio).reshape(-1, FRAME_SAMPLES)
+        samples = MULAW_DECODE_TABLE.take(codes).astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        energy_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+        signs = np.signbit(samples)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (FRAME_SAMPLES - 1)
+        return energy_db, zero_crossing_rate
+
+    async def process(self, audio: bytes):
+        """
+        Feeds inbound audio to the detector.
+
+        Args:
+            audio (bytes): Mulaw audio of any length.
+        """
+        audio = self.remainder + audio
+        usable = len(audio) - len(audio) % FRAME_SAMPLES
+        self.remainder = audio[usable:]
+        if not usable:
+            return
+
+        energy_db, zero_crossing_rate = self.frame_features(audio[:usable])
+
+        for energy, zcr in zip(energy_db.tolist(), zero_crossing_rate.tolist()):
+            threshold = max(self.min_energy_db, self.noise_floor_db + self.noise_margin_db)
+            is_speech = energy > threshold and zcr < self.max_zero_crossing_rate
+
+            if is_speech:
+                self.speech_run += 1
+                self.silence_run = 0
+            else:
+                self.silence_run += 1
+                self.speech_run = 0
+                if not self.speaking:
+                    # Slowly track the background level while nobody is talking
+                    self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy
+
+            if not self.speaking and self.speech_run >= self.start_frames:
+                self.speaking = True
+                self.speech_started_at = time.monotonic()
+                await self.emit('speech_start')
+            elif self.speaking and self.silence_run >= self.end_frames:
+                self.speaking = False
+                duration_ms = int((time.monotonic() - self.speech_started_at) * 1000)
+                await self.emit('speech_end', duration_ms)
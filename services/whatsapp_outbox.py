@@ -0,0 +1,260 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from logger_config import get_logger
+from services.connection_manager import connection_manager
+from services.event_emmiter import EventEmitter
+
+logger = get_logger("WhatsAppOutbox")
+
+# WhatsApp formatting characters that must reach the API unencoded
+FORMATTING_CHARS = {
+    "*": "{{ASTERISK}}",
+    "_": "{{UNDERSCORE}}",
+    "\n": "{{NEWLINE}}"
+}
+
+
+def encode_message(message: str) -> str:
+    """URL encodes a message while preserving WhatsApp formatting characters."""
+    for char, placeholder in FORMATTING_CHARS.items():
+        message = message.replace(char, placeholder)
+    encoded_message = quote(message)
+    for char, placeholder in FORMATTING_CHARS.items():
+        encoded_message = encoded_message.replace(quote(placeholder), char)
+    return encoded_message
+
+
+class WhatsAppOutbox(EventEmitter):
+    """
+    Persistent queue of WhatsApp messages delivered by a background worker.
+
+    Messages are written to SQLite when enqueued, so the tool call returns at once and
+    nothing queued is lost on restart; the worker picks up pending messages when it
+    starts. Failed deliveries are retried with exponential backoff until
+    WHATSAPP_MAX_ATTEMPTS. Every change of a queued message's status is emitted as a
+    'status' event with the call SID, message id, status and error, if any.
+
+    Database work runs on a thread of the outbox's own, so waiting for a write lock
+    held by another process never stalls the event loop and the audio of live calls.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.path = os.getenv("WHATSAPP_OUTBOX_PATH", "cache/whatsapp_outbox.sqlite3")
+        self.api_url = os.getenv("TEXTMEBOT_API_URL", "http://api.textmebot.com/send.php")
+        self.api_key = os.getenv("TEXTMEBOT_API_KEY")
+        self.timeout = float(os.getenv("WHATSAPP_TIMEOUT_SECONDS", 10))
+        self.max_attempts = int(os.getenv("WHATSAPP_MAX_ATTEMPTS", 5))
+        self.backoff = float(os.getenv("WHATSAPP_BACKOFF_SECONDS", 2))
+        self.max_backoff = float(os.getenv("WHATSAPP_MAX_BACKOFF_SECONDS", 300))
+
+        self.db: Optional[sqlite3.Connection] = None
+        # One thread, which owns the connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whatsapp-outbox")
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            self.db.row_factory = sqlite3.Row
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    call_sid TEXT,
+                    phone TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.db.execute("CREATE INDEX IF NOT EXISTS pending_messages ON messages (status, next_attempt_at)")
+        return self.db
+
+    async def run_db(self, function, *args):
+        """Runs database work on the outbox's thread."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def insert(self, call_sid: Optional[str], phone: str, text: str) -> int:
+        now = time.time()
+        cursor = self.connect().execute(
+            "INSERT INTO messages (call_sid, phone, text, status, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (call_sid, phone, text, now, now, now)
+        )
+        return cursor.lastrowid
+
+    async def enqueue(self, call_sid: Optional[str], phone: str, text: str) -> int:
+        """
+        Queues a message for delivery.
+
+        The message starts out 'queued'; only later changes are emitted as events.
+
+        Args:
+            call_sid (Optional[str]): The call the message belongs to.
+            phone (str): Recipient number in international format.
+            text (str): The message.
+
+        Returns:
+            int: The id of the queued message.
+        """
+        message_id = await self.run_db(self.insert, call_sid, phone, text)
+        logger.info(f"Queued WhatsApp message {message_id} for call {call_sid}")
+        self.wakeup.set()
+        return message_id
+
+    def read(self, message_id: int) -> Optional[Dict[str, Any]]:
+        row = self.connect().execute("SELECT * FROM messages WHERE id = ?", (message_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def get(self, message_id: int) -> Optional[Dict[str, Any]]:
+        return await self.run_db(self.read, message_id)
+
+    def claim_due_messages(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Claims due messages for one delivery attempt each.
+
+        Every process sharing the outbox file runs a worker. Due messages are selected
+        and leased in one write transaction, so each is delivered by one worker only.
+        A worker that dies mid attempt leaves its messages due again once the lease
+        runs out.
+        """
+        db = self.connect()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT * FROM messages WHERE status = 'queued' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            db.executemany(
+                "UPDATE messages SET next_attempt_at = ? WHERE id = ?",
+                [(now + self.timeout * 2, row["id"]) for row in rows]
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return [dict(row) for row in rows]
+
+    def next_due_in(self) -> Optional[float]:
+        """Returns the seconds until the next queued message is due, or None if there is none."""
+        row = self.connect().execute(
+            "SELECT MIN(next_attempt_at) FROM messages WHERE status = 'queued'"
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    async def deliver(self, phone: str, text: str):
+        """Sends one message, raising if it was not accepted."""
+        if not self.api_key:
+            raise RuntimeError("TEXTMEBOT_API_KEY is not set")
+        # Remove the + for the API call but keep the country code
+        recipient = phone[1:] if phone.startswith("+") else phone
+        url = f"{self.api_url}?recipient={recipient}&apikey={self.api_key}&text={encode_message(text)}"
+
+        session = connection_manager.get_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+            response_text = await response.text()
+        if response.status != 200:
+            raise RuntimeError(f"Status code: {response.status}, Response: {response_text}")
+        if "Success!" not in response_text:
+            raise RuntimeError(f"API returned success status but message may not have been sent. Response: {response_text}")
+
+    def record_attempt(self, message_id: int, status: str, attempts: int, next_attempt_at: float, error: Optional[str]):
+        self.connect().execute(
+            "UPDATE messages SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (status, attempts, next_attempt_at, error, time.time(), message_id)
+        )
+
+    async def attempt(self, message: Dict[str, Any]):
+        attempts = message["attempts"] + 1
+        try:
+            await self.deliver(message["phone"], message["text"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or repr(e)
+            if attempts >= self.max_attempts:
+                status, next_attempt_at = "failed", message["next_attempt_at"]
+                logger.error(f"WhatsApp message {message['id']} failed after {attempts} attempts: {error}")
+            else:
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                status, next_attempt_at = "queued", time.time() + delay
+                logger.warning(f"WhatsApp message {message['id']} attempt {attempts} failed, retrying in {delay:.1f}s: {error}")
+        else:
+            status, next_attempt_at, error = "sent", message["next_attempt_at"], None
+            logger.info(f"WhatsApp message {message['id']} sent")
+
+        await self.run_db(self.record_attempt, message["id"], status, attempts, next_attempt_at, error)
+        if status != "queued":
+            await self.emit('status', message["call_sid"], message["id"], status, error)
+
+    def count_queued(self) -> int:
+        return self.connect().execute("SELECT COUNT(*) FROM messages WHERE status = 'queued'").fetchone()[0]
+
+    async def run(self):
+        pending = await self.run_db(self.count_queued)
+        if pending:
+            logger.info(f"Resuming delivery of {pending} queued WhatsApp messages")
+
+        while True:
+            self.wakeup.clear()
+            messages = await self.run_db(self.claim_due_messages)
+            if messages:
+                await asyncio.gather(*(self.attempt(message) for message in messages))
+                continue
+
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=await self.run_db(self.next_due_in))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if not self.api_key:
+            logger.error("TEXTMEBOT_API_KEY is not set, WhatsApp messages stay queued until it is")
+            return
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.run_db(self.close)
+
+    def count_by_status(self) -> Dict[str, int]:
+        rows = self.connect().execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    async def stats(self) -> Dict[str, int]:
+        return await self.run_db(self.count_by_status)
+
+whatsapp_outbox = WhatsAppOutbox()
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RedisStandIn:
+    """
+    Local stand-in for a Redis server, speaking just enough RESP2 for the call setup store.
+
+    Supports PING, AUTH, SELECT, SET with EX, GET, GETDEL and DEL on one shared keyspace.
+    Replies can be held back by `reply_delay` seconds to test clients that give up
+    while a reply is on its way.
+    """
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[List[bytes]] = []
+        self.reply_delay = 0.0
+        self.server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        credentials = f":{self.password}@" if self.password else ""
+        return f"redis://{credentials}{host}:{port}/0"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        authenticated = self.password is None
+        try:
+            while True:
+                command = await self.read_command(reader)
+                self.commands.append(command)
+                name = command[0].upper()
+                if name == b"AUTH":
+                    authenticated = command[-1].decode() == self.password
+                    reply = b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n"
+                elif not authenticated:
+                    reply = b"-NOAUTH Authentication required.\r\n"
+                else:
+                    reply = self.run(name, command[1:])
+                if self.reply_delay:
+                    await asyncio.sleep(self.reply_delay)
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_command(reader: asyncio.StreamReader) -> List[bytes]:
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        parts = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            parts.append((await reader.readexactly(length + 2))[:-2])
+        return parts
+
+    def lookup(self, key: bytes) -> Optional[bytes]:
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return value
+
+    def run(self, name: bytes, args: List[bytes]) -> bytes:
+        if name in (b"PING", b"SELECT"):
+            return b"+PONG\r\n" if name == b"PING" else b"+OK\r\n"
+        if name == b"SET":
+            expires_at = None
+            if len(args) >= 4 and args[2].upper() == b"EX":
+                expires_at = time.monotonic() + int(args[3])
+            self.data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name in (b"GET", b"GETDEL"):
+            value = self.lookup(args[0])
+            if name == b"GETDEL":
+                self.data.pop(args[0], None)
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"DEL":
+            removed = sum(1 for key in args if self.lookup(key) is not None and self.data.pop(key))
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command '%s'\r\n" % name
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+from services.call_setup import (InMemoryCallSetupStore, RedisCallSetupStore, RedisClient, RedisError,
+                                 RedisReplyError, SQLiteCallSetupStore)
+from tests.redis_server import RedisStandIn
+
+SETUP = {"call_sid": "CA1", "system_message": "You are Priya", "user_phone": "+911234567890"}
+
+
+def run_with_redis(scenario, password=None):
+    async def main():
+        server = RedisStandIn(password)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_redis_store_hands_out_setup_once(monkeypatch):
+    async def scenario(server):
+        monkeypatch.setenv("REDIS_URL", server.url)
+        monkeypatch.setenv("CALL_SETUP_TTL_SECONDS", "60")
+        store = RedisCallSetupStore()
+        await store.publish("CA1", SETUP)
+        first = await store.claim("CA1")
+        second = await store.claim("CA1")
+        await store.close()
+        return first, second, server.commands
+
+    first, second, commands = run_with_redis(scenario, password="secret")
+    assert first == SETUP
+    assert second is None
+    assert commands[0] == [b"AUTH", b"secret"]
+    assert [b"EX", b"60"] == commands[1][-2:]
+
+
+def test_redis_store_unknown_call(monkeypatch):
+    async def scenario(server):
+        monkeypatch.setenv("REDIS_URL", server.url)
+        store = RedisCallSetupStore()
+        setup = await store.claim("CA404")
+        await store.close()
+        return setup
+
+    assert run_with_redis(scenario) is None
+
+
+def test_redis_client_rejects_wrong_password():
+    async def scenario(server):
+        client = RedisClient(server.url.replace("secret", "wrong"))
+        with pytest.raises(RedisReplyError):
+            await client.execute("PING")
+        return client.writer
+
+    assert run_with_redis(scenario, password="secret") is None
+
+
+def test_redis_client_drops_connection_when_cancelled_awaiting_reply():
+    async def scenario(server):
+        client = RedisClient(server.url)
+        await client.execute("SET", "first", "1")
+        await client.execute("SET", "second", "2")
+
+        server.reply_delay = 0.2
+        pending = asyncio.create_task(client.execute("GET", "first"))
+        await asyncio.sleep(0.05)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+
+        server.reply_delay = 0
+        value = await client.execute("GET", "second")
+        await client.close()
+        return value
+
+    # With the connection kept, this would read the reply meant for GET first
+    assert run_with_redis(scenario) == b"2"
+
+
+def test_redis_client_timeout_raises_redis_error():
+    async def scenario(server):
+        client = RedisClient(server.url, timeout=0.05)
+        await client.execute("PING")
+        server.reply_delay = 0.2
+        with pytest.raises(RedisError):
+            await client.execute("PING")
+        return client.writer
+
+    assert run_with_redis(scenario) is None
+
+
+def test_memory_store_hands_out_setup_once():
+    async def scenario():
+        store = InMemoryCallSetupStore()
+        await store.publish("CA1", SETUP)
+        return await store.claim("CA1"), await store.claim("CA1")
+
+    assert asyncio.run(scenario()) == (SETUP, None)
+
+
+def test_sqlite_store_shared_between_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("CALL_SETUP_PATH", os.path.join(tmp_path, "call_setup.sqlite3"))
+
+    async def scenario():
+        publisher, first_worker, second_worker = SQLiteCallSetupStore(), SQLiteCallSetupStore(), SQLiteCallSetupStore()
+        await publisher.publish("CA1", SETUP)
+        claims = await first_worker.claim("CA1"), await second_worker.claim("CA1")
+        for store in (publisher, first_worker, second_worker):
+            await store.close()
+        return claims
+
+    assert asyncio.run(scenario()) == (SETUP, None)
+
+
+def test_sqlite_store_expires_setup(tmp_path, monkeypatch):
+    monkeypatch.setenv("CALL_SETUP_PATH", os.path.join(tmp_path, "call_setup.sqlite3"))
+    monkeypatch.setenv("CALL_SETUP_TTL_SECONDS", "-1")
+
+    async def scenario():
+        store = SQLiteCallSetupStore()
+        await store.publish("CA1", SETUP)
+        setup = await store.claim("CA1")
+        await store.close()
+        return setup
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_sqlite_claim_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "call_setup.sqlite3")
+    monkeypatch.setenv("CALL_SETUP_PATH", path)
+
+    async def scenario():
+        store = SQLiteCallSetupStore()
+        await store.publish("CA1", SETUP)
+        # Another worker holds the write lock for a while
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        claim = asyncio.create_task(store.claim("CA1"))
+        ticks = 0
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        other.execute("COMMIT")
+        other.close()
+        setup = await claim
+        await store.close()
+        return ticks, setup
+
+    assert asyncio.run(scenario()) == (10, SETUP)
@@ -0,0 +1,45 @@
+import time
+
+from services.call_context import CallContext
+from services.call_store import InMemoryCallStore
+from services.playback_tracker import PlaybackTracker
+
+
+def stored_call(store, call_sid):
+    call_context = CallContext()
+    call_context.call_sid = call_sid
+    store.put(call_context)
+    return call_context
+
+
+def test_stale_calls_are_evicted_only_once_ended(monkeypatch):
+    monkeypatch.setenv("CALL_STORE_STALE_SECONDS", "0.01")
+    store = InMemoryCallStore()
+    streaming = stored_call(store, "CA-streaming")
+    streaming.playback = PlaybackTracker()
+    ringing = stored_call(store, "CA-ringing")
+    ringing.update_status("ringing")
+    unanswered = stored_call(store, "CA-unanswered")
+    unanswered.update_status("no-answer")
+
+    time.sleep(0.02)
+    store.evict()
+
+    assert [call_context.call_sid for call_context in store.list()] == ["CA-ringing", "CA-streaming"]
+    assert store.stats()["evicted"] == 1
+
+
+def test_stale_call_is_evicted_after_its_stream_ends(monkeypatch):
+    monkeypatch.setenv("CALL_STORE_STALE_SECONDS", "0.01")
+    store = InMemoryCallStore()
+    call_context = stored_call(store, "CA1")
+    call_context.playback = PlaybackTracker()
+    call_context.update_status("completed")
+
+    time.sleep(0.02)
+    store.evict()
+    kept = "CA1" in store
+    call_context.playback = None
+    store.evict()
+
+    assert (kept, "CA1" in store) == (True, False)
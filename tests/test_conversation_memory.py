@@ -0,0 +1,82 @@
+import asyncio
+
+from services.conversation_memory import ConversationMemory
+
+
+def turns(count, length=10):
+    transcript = []
+    for turn in range(count):
+        transcript.append({"role": "user", "content": f"question {turn} ".ljust(length, ".")})
+        transcript.append({"role": "assistant", "content": f"answer {turn} ".ljust(length, ".")})
+    return transcript
+
+
+def summarize_with(summaries):
+    async def summarizer(summary, messages):
+        summaries.append((summary, [message["content"] for message in messages]))
+        return f"summary of {len(messages)} messages"
+    return summarizer
+
+
+def test_old_turns_are_folded_into_a_summary(monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_TURNS", "2")
+
+    async def scenario():
+        transcript = turns(4)
+        summaries = []
+        memory = ConversationMemory(transcript, summarize_with(summaries))
+        # Until the summary is ready, every turn is still sent verbatim
+        before = len(memory.messages())
+        memory.schedule()
+        await memory.task
+        return before, memory.messages(), memory.version, len(summaries)
+
+    before, messages, version, summarized = asyncio.run(scenario())
+    assert before == 8
+    assert messages[0] == {"role": "user", "content": "(Summary of the call so far: summary of 4 messages)"}
+    assert [message["content"].rstrip(". ") for message in messages[1:]] == ["question 2", "answer 2", "question 3", "answer 3"]
+    assert (version, summarized) == (1, 1)
+
+
+def test_token_budget_folds_all_but_the_latest_turn(monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_TURNS", "6")
+    monkeypatch.setenv("MEMORY_TOKEN_BUDGET", "100")
+    # Each message is about 54 tokens, so only the latest turn fits
+    memory = ConversationMemory(turns(3, length=200), summarize_with([]))
+
+    assert memory.fold_end() == 4
+
+
+def test_memory_within_limits_is_not_summarized(monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_TURNS", "6")
+
+    async def scenario():
+        memory = ConversationMemory(turns(3), summarize_with([]))
+        memory.schedule()
+        return memory.task, len(memory.messages())
+
+    assert asyncio.run(scenario()) == (None, 6)
+
+
+def test_summary_is_discarded_when_the_transcript_changed(monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_TURNS", "1")
+
+    async def scenario():
+        transcript = turns(2)
+        release = asyncio.Event()
+
+        async def summarizer(summary, messages):
+            await release.wait()
+            return "stale summary"
+
+        memory = ConversationMemory(transcript, summarizer)
+        memory.schedule()
+        await asyncio.sleep(0)
+        # A barge-in removes a reply that is being summarized
+        memory.forget(transcript[1])
+        transcript.pop(1)
+        release.set()
+        await memory.task
+        return memory.summary, memory.summarized_count, len(memory.messages())
+
+    assert asyncio.run(scenario()) == ("", 0, 3)
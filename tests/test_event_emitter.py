@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from services.event_emmiter import EventEmitter
+
+
+def emit_while_listener_is_busy(policy):
+    """Emits 1 to 4 while the listener is still handling 0, with room for two pending emissions."""
+    async def scenario():
+        emitter = EventEmitter()
+        emitter.use_queue("event", maxsize=2, policy=policy)
+        received = []
+        release = asyncio.Event()
+
+        async def listener(value):
+            if value == 0:
+                await release.wait()
+            received.append(value)
+
+        emitter.on("event", listener)
+        await emitter.emit("event", 0)
+        await asyncio.sleep(0)
+        for value in range(1, 5):
+            if policy == "block":
+                asyncio.create_task(emitter.emit("event", value))
+            else:
+                await emitter.emit("event", value)
+        await asyncio.sleep(0)
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        stats = emitter.queue_stats()["event"]
+        await emitter.close_queues()
+        return received, stats
+
+    return asyncio.run(scenario())
+
+
+def test_emit_runs_listeners_inline_without_queue():
+    async def scenario():
+        emitter = EventEmitter()
+        received = []
+        emitter.on("event", lambda value: received.append(("sync", value)))
+
+        async def listener(value):
+            received.append(("async", value))
+
+        emitter.on("event", listener)
+        await emitter.emit("event", 1)
+        return received
+
+    assert asyncio.run(scenario()) == [("sync", 1), ("async", 1)]
+
+
+def test_block_policy_keeps_every_emission():
+    received, stats = emit_while_listener_is_busy("block")
+
+    assert received == [0, 1, 2, 3, 4]
+    assert (stats["dropped"], stats["coalesced"], stats["max_depth"]) == (0, 0, 2)
+
+
+def test_drop_oldest_policy_drops_the_oldest_pending_emissions():
+    received, stats = emit_while_listener_is_busy("drop_oldest")
+
+    assert received == [0, 3, 4]
+    assert (stats["dropped"], stats["dispatched"]) == (2, 3)
+
+
+def test_coalesce_policy_replaces_the_newest_pending_emission():
+    received, stats = emit_while_listener_is_busy("coalesce")
+
+    assert received == [0, 1, 4]
+    assert (stats["coalesced"], stats["dispatched"]) == (2, 3)
+
+
+def test_failing_listener_does_not_stop_the_queue():
+    async def scenario():
+        emitter = EventEmitter()
+        emitter.use_queue("event")
+        received = []
+
+        def failing(value):
+            raise RuntimeError("listener broke")
+
+        emitter.on("event", failing)
+        emitter.on("event", received.append)
+        await emitter.emit("event", 1)
+        await emitter.emit("event", 2)
+        await asyncio.sleep(0)
+        stats = emitter.queue_stats()["event"]
+        await emitter.close_queues()
+        return received, stats["errors"]
+
+    assert asyncio.run(scenario()) == ([1, 2], 2)
+
+
+def test_use_queue_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        EventEmitter().use_queue("event", policy="drop_newest")
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.call_context import CallContext
+from services.llm_service import GeminiService
+from services.tool_runtime import ToolRuntime
+
+REPLY = "Let me check that for you. One moment[lookup()] which is never spoken."
+
+
+class StreamedModel:
+    """Streams a reply in the given chunks, like generate_content_async(stream=True)."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def generate_content_async(self, prompt, **kwargs):
+        async def stream():
+            for chunk in self.chunks:
+                yield SimpleNamespace(text=chunk)
+        return stream()
+
+
+def service_with_lookup():
+    service = GeminiService(CallContext())
+    lookups = []
+
+    async def lookup(context, args):
+        lookups.append(args)
+        return "found"
+
+    async def completion(text, interaction_count, role="user", name="user"):
+        service.followups.append((text, role, name))
+
+    service.available_functions["lookup"] = lookup
+    service.tool_runtime = ToolRuntime(service.available_functions)
+    service.completion = completion
+    service.followups = []
+    service.lookups = lookups
+    service.replies = []
+    service.on("llmreply", lambda reply, interaction_count: service.replies.append(reply["partialResponse"]))
+    return service
+
+
+def test_text_before_a_tool_call_is_spoken_and_recorded_in_every_mode():
+    async def scenario(complete):
+        service = service_with_lookup()
+        await complete(service)
+        # The tool has no "say" phrase in the manifest, so its announcement is empty
+        history = [entry["content"] for entry in service.user_context[2:] if entry["content"]]
+        return service.replies, history, service.lookups, service.followups
+
+    buffered = asyncio.run(scenario(lambda service: service.process_response(REPLY, 1)))
+    streamed = asyncio.run(scenario(lambda service: service.streaming_completion(
+        StreamedModel(["Let me check that for you. One mo", "ment[look", "up()] which is never spoken."]), None, 1
+    )))
+
+    expected = (
+        ["Let me check that for you.", "One moment"],
+        ["Let me check that for you. One moment", "found"],
+        [{}],
+        [("found", "function", "lookup")],
+    )
+    assert buffered == expected
+    assert streamed == expected
+
+
+def test_reply_without_tool_call_is_recorded_whole():
+    async def scenario():
+        service = service_with_lookup()
+        await service.process_response("Your table is booked for two. What else can I do?", 1)
+        return service.replies, service.user_context[-1]["content"], service.followups
+
+    assert asyncio.run(scenario()) == (
+        ["Your table is booked for two.", "What else can I do?"],
+        "Your table is booked for two. What else can I do?",
+        [],
+    )
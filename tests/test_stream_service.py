@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import time
+
+from services.stream_service import FRAME_BYTES, StreamService
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+def sent_events(ws):
+    events = []
+    for message in ws.sent:
+        if message["event"] == "media":
+            events.append(("media", base64.b64decode(message["media"]["payload"])))
+        elif message["event"] == "mark":
+            events.append(("mark", message["mark"]["name"]))
+        else:
+            events.append((message["event"],))
+    return events
+
+
+def test_sentences_play_in_partial_response_index_order():
+    async def scenario():
+        ws = RecordingWebSocket()
+        stream = StreamService(ws)
+        tags = []
+        stream.on("audiosent", lambda mark_label, tag: tags.append(tag))
+        # Sentence 1 is synthesized before sentence 0 has finished streaming
+        await stream.buffer(0, b"a1", is_final=False, tag="first")
+        await stream.buffer(1, b"b", tag="second")
+        await stream.buffer(0, b"a2", tag="first")
+        # Late chunk of a completed sentence
+        await stream.buffer(0, b"late", tag="first")
+        return [event for event in sent_events(ws) if event[0] == "media"], tags, stream.expected_audio_index
+
+    media, tags, expected_index = asyncio.run(scenario())
+    assert media == [("media", b"a1"), ("media", b"a2"), ("media", b"b")]
+    assert tags == ["first", "first", "second"]
+    assert expected_index == 2
+
+
+def test_paced_audio_is_sent_in_frames_close_to_real_time(monkeypatch):
+    monkeypatch.setenv("STREAM_PACING", "true")
+    monkeypatch.setenv("STREAM_PACING_LEAD_MS", "20")
+
+    async def scenario():
+        ws = RecordingWebSocket()
+        stream = StreamService(ws)
+        started = time.monotonic()
+        # 100ms of audio
+        await stream.buffer(0, bytes(FRAME_BYTES * 5))
+        await stream.sender_task
+        return sent_events(ws), time.monotonic() - started
+
+    events, elapsed = asyncio.run(scenario())
+    assert events == [("media", bytes(FRAME_BYTES))] * 5 + [("mark", "1")]
+    # Only the lead may be sent ahead of playback
+    assert elapsed >= 0.07
+
+
+def test_clear_reports_marks_of_dropped_audio(monkeypatch):
+    monkeypatch.setenv("STREAM_PACING", "true")
+    monkeypatch.setenv("STREAM_PACING_LEAD_MS", "0")
+
+    async def scenario():
+        ws = RecordingWebSocket()
+        stream = StreamService(ws)
+        for index in range(3):
+            await stream.buffer(index, bytes(FRAME_BYTES * 50))
+        await asyncio.sleep(0.05)
+        dropped = await stream.clear()
+        await stream.sender_task
+        await stream.close()
+        marks = [event[1] for event in sent_events(ws) if event[0] == "mark"]
+        return dropped, marks, sent_events(ws)[-1]
+
+    dropped, marks, last_event = asyncio.run(scenario())
+    # The sentence being sent is cut off, so Twilio never acknowledges any of them
+    assert dropped == ["1", "2", "3"]
+    assert marks == []
+    assert last_event == ("clear",)
@@ -0,0 +1,185 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import services.call_control as call_control
+import services.telephony as telephony
+from functions.end_call import end_call
+from functions.transfer_call import transfer_call
+from services.call_context import CallContext
+from services.telephony import FakeTelephonyClient, TelephonyError, TwilioTelephonyClient
+
+
+class StubResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def json(self, content_type=None):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class StubSession:
+    """Answers Twilio requests in turn from a list of responses or exceptions."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def request(self, method, url, data=None, auth=None, timeout=None):
+        self.requests.append({"method": method, "url": url, "data": data, "timeout": timeout})
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return StubResponse(*outcome)
+
+
+@pytest.fixture
+def twilio(monkeypatch):
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "ACtest")
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setenv("TELEPHONY_MAX_RETRIES", "2")
+    monkeypatch.setenv("TELEPHONY_BACKOFF_SECONDS", "0")
+    monkeypatch.setenv("TELEPHONY_TIMEOUT_SECONDS", "3")
+
+    def connect(outcomes):
+        session = StubSession(outcomes)
+        monkeypatch.setattr(telephony.connection_manager, "get_session", lambda: session)
+        return TwilioTelephonyClient(), session
+
+    return connect
+
+
+def test_fetch_call_retries_server_errors(twilio):
+    client, session = twilio([(503, {"message": "unavailable"}), (200, {"sid": "CA1", "status": "in-progress"})])
+    call = asyncio.run(client.fetch_call("CA1"))
+    assert call["status"] == "in-progress"
+    assert len(session.requests) == 2
+    assert session.requests[0]["url"] == "https://api.twilio.com/2010-04-01/Accounts/ACtest/Calls/CA1.json"
+    assert session.requests[0]["timeout"].total == 3
+
+
+def test_fetch_call_gives_up_after_max_retries(twilio):
+    client, session = twilio([(500, {"message": "error"})] * 3)
+    with pytest.raises(TelephonyError) as error:
+        asyncio.run(client.fetch_call("CA1"))
+    assert error.value.status == 500
+    assert len(session.requests) == 3
+
+
+def test_client_errors_are_not_retried(twilio):
+    client, session = twilio([(404, {"message": "not found"})])
+    with pytest.raises(TelephonyError) as error:
+        asyncio.run(client.fetch_call("CA404"))
+    assert error.value.status == 404
+    assert len(session.requests) == 1
+
+
+def test_fetch_call_retries_timeouts(twilio):
+    client, session = twilio([asyncio.TimeoutError(), (200, {"sid": "CA1", "status": "ringing"})])
+    assert asyncio.run(client.fetch_call("CA1"))["status"] == "ringing"
+    assert len(session.requests) == 2
+
+
+def test_create_call_is_not_retried_after_server_error(twilio):
+    client, session = twilio([(500, {"message": "error"}), (201, {"sid": "CA2"})])
+    with pytest.raises(TelephonyError) as error:
+        asyncio.run(client.create_call("+911", "+912", "https://example.com/incoming"))
+    assert error.value.status == 500
+    assert len(session.requests) == 1
+
+
+def test_create_call_is_not_retried_after_timeout(twilio):
+    client, session = twilio([asyncio.TimeoutError(), (201, {"sid": "CA2"})])
+    with pytest.raises(TelephonyError):
+        asyncio.run(client.create_call("+911", "+912", "https://example.com/incoming"))
+    assert len(session.requests) == 1
+
+
+def test_create_call_is_retried_when_rate_limited(twilio):
+    client, session = twilio([(429, {"message": "too many requests"}), (201, {"sid": "CA2"})])
+    call = asyncio.run(client.create_call(
+        "+911", "+912", "https://example.com/incoming",
+        status_callback="https://example.com/status_callback",
+        status_callback_event=["initiated", "answered"],
+        record=False
+    ))
+    assert call["sid"] == "CA2"
+    assert len(session.requests) == 2
+    assert session.requests[0]["data"] == [
+        ("To", "+911"),
+        ("From", "+912"),
+        ("Url", "https://example.com/incoming"),
+        ("StatusCallback", "https://example.com/status_callback"),
+        ("StatusCallbackEvent", "initiated"),
+        ("StatusCallbackEvent", "answered"),
+        ("Record", "false"),
+    ]
+
+
+def test_connection_errors_are_retried(twilio):
+    client, session = twilio([aiohttp.ClientConnectionError("reset"), (200, {"recordings": [{"sid": "RE1"}]})])
+    assert asyncio.run(client.list_recordings("CA1")) == [{"sid": "RE1"}]
+    assert len(session.requests) == 2
+
+
+def make_call(client):
+    call = asyncio.run(client.create_call("+911", "+912", "https://example.com/incoming"))
+    call_context = CallContext()
+    call_context.call_sid = call["sid"]
+    return call_context
+
+
+def run_tool(tool, call_context, args=None):
+    async def scenario():
+        result = await tool(call_context, args or {})
+        # The call control action runs in the background
+        await call_control.drain_actions()
+        return result
+
+    return asyncio.run(scenario())
+
+
+def test_end_call_with_fake_client(monkeypatch):
+    client = FakeTelephonyClient()
+    monkeypatch.setattr(call_control, "telephony_client", client)
+    call_context = make_call(client)
+
+    assert run_tool(end_call, call_context) == "Ending the call once the goodbye has been played."
+    assert client.calls[call_context.call_sid]["status"] == "completed"
+    assert [request["operation"] for request in client.requests] == ["create_call", "fetch_call", "update_call"]
+
+    # Ended calls are not hung up again
+    assert run_tool(end_call, call_context) == "Ending the call once the goodbye has been played."
+    assert [request["operation"] for request in client.requests][-1] == "fetch_call"
+
+    call_context.final_status = "completed"
+    assert run_tool(end_call, call_context) == "Call already ended with status: completed"
+
+
+def test_transfer_call_with_fake_client(monkeypatch):
+    client = FakeTelephonyClient()
+    monkeypatch.setattr(call_control, "telephony_client", client)
+    monkeypatch.setenv("TRANSFER_NUMBER", "+913")
+    call_context = make_call(client)
+
+    assert run_tool(transfer_call, call_context) == "Transferring the call once the announcement has been played."
+    assert client.requests[-1] == {
+        "operation": "update_call",
+        "call_sid": call_context.call_sid,
+        "url": "http://twimlets.com/forward?PhoneNumber=+913",
+        "method": "POST",
+    }
+
+
+def test_fake_client_unknown_call():
+    with pytest.raises(TelephonyError) as error:
+        asyncio.run(FakeTelephonyClient().fetch_call("CA404"))
+    assert error.value.status == 404
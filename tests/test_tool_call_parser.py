@@ -0,0 +1,50 @@
+from services.tool_call_parser import ToolCallParser
+
+FUNCTIONS = ["send_whatsapp", "end_call"]
+
+
+def feed_all(parser, chunks):
+    spoken, calls = "", []
+    for chunk in chunks:
+        speakable, chunk_calls = parser.feed(chunk)
+        spoken += speakable
+        calls += chunk_calls
+        if chunk_calls:
+            break
+    else:
+        spoken += parser.finish()
+    return spoken, calls
+
+
+def test_tool_call_split_across_chunks():
+    parser = ToolCallParser(FUNCTIONS)
+    chunks = ["Booked! I'll confirm ", "[send_", "whatsapp(message=\"See you", " at 5\")", "] Done."]
+
+    assert parser.feed(chunks[0]) == ("Booked! I'll confirm ", [])
+    # The start of the call is withheld until it is complete
+    assert parser.feed(chunks[1]) == ("", [])
+    assert parser.feed(chunks[2]) == ("", [])
+    assert parser.feed(chunks[3]) == ("", [])
+    assert parser.feed(chunks[4]) == ("", [("send_whatsapp", 'message="See you at 5"')])
+
+
+def test_text_after_a_tool_call_is_not_spoken():
+    parser = ToolCallParser(FUNCTIONS)
+
+    assert parser.feed("Goodbye![end_call()] And more.") == ("Goodbye!", [("end_call", "")])
+
+
+def test_brackets_that_are_not_tool_calls_are_released():
+    spoken, calls = feed_all(ToolCallParser(FUNCTIONS), ["Options [1", "] and [", "b] or [unknown()] ok"])
+
+    assert (spoken, calls) == ("Options [1] and [b] or  ok", [])
+
+
+def test_unterminated_tool_call_is_dropped():
+    spoken, calls = feed_all(ToolCallParser(FUNCTIONS), ["Sending it now ", "[send_whatsapp(message=\"cut off"])
+
+    assert (spoken, calls) == ("Sending it now ", [])
+
+
+def test_strip_returns_speakable_text():
+    assert ToolCallParser(FUNCTIONS).strip("One moment[end_call()]") == "One moment"
@@ -0,0 +1,44 @@
+import asyncio
+
+from services.tool_runtime import ToolRuntime, function_declarations
+
+MANIFEST = [
+    {"function": {"name": "slow", "description": "Slow tool", "timeout": 0.05, "parameters": {}}},
+    {"function": {"name": "exempt", "description": "Never cut off", "timeout": None, "parameters": {}}},
+    {"function": {"name": "echo", "description": "Echoes", "parameters": {
+        "type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]
+    }}},
+]
+
+
+async def slow(context, args):
+    await asyncio.sleep(0.2)
+    return "done"
+
+
+async def echo(context, args):
+    return args["text"]
+
+
+async def broken(context, args):
+    raise RuntimeError("provider down")
+
+
+def test_timeouts_and_failures_become_results():
+    runtime = ToolRuntime({"slow": slow, "exempt": slow, "echo": echo, "broken": broken}, MANIFEST)
+    results = asyncio.run(runtime.run(None, [
+        ("slow", {}), ("exempt", {}), ("echo", {"text": "hi"}), ("broken", {}), ("missing", {})
+    ]))
+    assert results == [
+        {"success": False, "error": "slow timed out"},
+        "done",
+        "hi",
+        {"success": False, "error": "provider down"},
+        {"success": False, "error": "Unknown function: missing"},
+    ]
+
+
+def test_function_declarations_omit_empty_parameters():
+    declarations = function_declarations(MANIFEST)
+    assert declarations[0] == {"name": "slow", "description": "Slow tool"}
+    assert declarations[2]["parameters"]["required"] == ["text"]
@@ -0,0 +1,70 @@
+import asyncio
+import os
+
+from services.tts_cache import TTSCache
+
+KEY = TTSCache.make_key("elevenlabs", "voice", "model", "ulaw_8000", "Hello there.")
+
+
+def cache_in(tmp_path, monkeypatch, memory_bytes=1024):
+    monkeypatch.setenv("TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TTS_CACHE_MEMORY_BYTES", str(memory_bytes))
+    return TTSCache()
+
+
+def test_miss_then_memory_hit(tmp_path, monkeypatch):
+    async def scenario():
+        cache = cache_in(tmp_path, monkeypatch)
+        missed = await cache.get(KEY)
+        cache.put(KEY, b"audio")
+        hit = await cache.get(KEY)
+        await cache.flush()
+        return missed, hit, cache.stats()
+
+    missed, hit, stats = asyncio.run(scenario())
+    assert (missed, hit) == (None, b"audio")
+    assert (stats["misses"], stats["memory_hits"], stats["disk_hits"]) == (1, 1, 0)
+    # Used a second time, so it is now kept on disk too
+    assert stats["unsaved_entries"] == 0
+    assert os.path.exists(TTSCache()._path(KEY))
+
+
+def test_one_off_phrase_stays_in_memory(tmp_path, monkeypatch):
+    async def scenario():
+        cache = cache_in(tmp_path, monkeypatch)
+        cache.put(KEY, b"audio")
+        await cache.flush()
+        return cache.stats()["unsaved_entries"], await cache.contains(KEY), os.listdir(tmp_path)
+
+    assert asyncio.run(scenario()) == (1, True, [])
+
+
+def test_evicted_phrase_is_read_back_from_disk(tmp_path, monkeypatch):
+    async def scenario():
+        cache = cache_in(tmp_path, monkeypatch, memory_bytes=8)
+        cache.put(KEY, b"audio", persist=True)
+        await cache.flush()
+        # Another phrase pushes it out of memory
+        cache.put("other", b"12345678")
+        hit = await cache.get(KEY)
+        return hit, cache.stats()
+
+    hit, stats = asyncio.run(scenario())
+    assert hit == b"audio"
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 0)
+
+
+def test_phrase_synthesized_again_after_a_miss_is_saved(tmp_path, monkeypatch):
+    async def scenario():
+        cache = cache_in(tmp_path, monkeypatch, memory_bytes=8)
+        for _ in range(2):
+            assert await cache.get(KEY) is None
+            cache.put(KEY, b"audio")
+            # Other sentences push it out of memory before it is used again
+            cache.put("other", b"12345678")
+        await cache.flush()
+        return await cache.get(KEY), cache.stats()
+
+    audio, stats = asyncio.run(scenario())
+    assert audio == b"audio"
+    assert (stats["misses"], stats["disk_hits"]) == (2, 1)
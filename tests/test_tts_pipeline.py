@@ -0,0 +1,72 @@
+import asyncio
+
+from services.tts_pipeline import TTSPipeline
+
+
+class FakeTTSService:
+    def __init__(self):
+        self.generated = []
+
+    async def generate(self, llm_reply, interaction_count):
+        await asyncio.sleep(0)
+        self.generated.append(llm_reply['partialResponse'])
+
+
+def reply(text, index):
+    return {'partialResponseIndex': index, 'partialResponse': text}
+
+
+def test_cancel_before_start_releases_slots():
+    async def scenario():
+        tts_service = FakeTTSService()
+        pipeline = TTSPipeline(tts_service, max_concurrency=2)
+        first = await pipeline.submit(reply("one", 0), 1)
+        second = await pipeline.submit(reply("two", 1), 1)
+        # Cancelled before the tasks got to run their first step
+        pipeline.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+
+        task = await asyncio.wait_for(pipeline.submit(reply("three", 0), 2), timeout=1)
+        await task
+        # Let the done callbacks of the task run
+        await asyncio.sleep(0)
+        return tts_service.generated, pipeline.semaphore._value
+
+    generated, free_slots = asyncio.run(scenario())
+    assert generated == ["three"]
+    assert free_slots == 2
+
+
+def test_cancel_while_running_releases_slots():
+    async def scenario():
+        started = asyncio.Event()
+
+        class SlowTTSService:
+            async def generate(self, llm_reply, interaction_count):
+                started.set()
+                await asyncio.sleep(10)
+
+        pipeline = TTSPipeline(SlowTTSService(), max_concurrency=1)
+        task = await pipeline.submit(reply("one", 0), 1)
+        await started.wait()
+        pipeline.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return pipeline.semaphore._value
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_failed_synthesis_releases_slot():
+    async def scenario():
+        class FailingTTSService:
+            async def generate(self, llm_reply, interaction_count):
+                raise RuntimeError("provider down")
+
+        pipeline = TTSPipeline(FailingTTSService(), max_concurrency=1)
+        await (await pipeline.submit(reply("one", 0), 1))
+        await (await asyncio.wait_for(pipeline.submit(reply("two", 1), 1), timeout=1))
+        await asyncio.sleep(0)
+        return pipeline.semaphore._value
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,85 @@
+import asyncio
+
+import services.call_control as call_control
+from functions.end_call import end_call
+from functions.transfer_call import transfer_call
+from services.call_context import CallContext
+from services.playback_tracker import PlaybackTracker
+from services.telephony import FakeTelephonyClient
+from services.turn_manager import TurnManager
+
+
+def test_cancel_all_cancels_every_turn():
+    async def scenario():
+        turns = TurnManager()
+        first = turns.start(1, asyncio.sleep(10))
+        second = turns.start(2, asyncio.sleep(10))
+        cancelled = turns.cancel_all()
+        await asyncio.gather(first, second, return_exceptions=True)
+        # Work arriving late for a cancelled turn is cancelled right away
+        late = turns.start(1, asyncio.sleep(10))
+        await asyncio.gather(late, return_exceptions=True)
+        return cancelled, first.cancelled(), second.cancelled(), late.cancelled(), turns.tasks
+
+    assert asyncio.run(scenario()) == ([1, 2], True, True, True, {})
+
+
+def test_run_reports_interrupted_turn():
+    async def scenario():
+        turns = TurnManager()
+        asyncio.get_running_loop().call_later(0.01, turns.cancel, 1)
+        interrupted = not await turns.run(1, asyncio.sleep(10))
+        completed = await turns.run(2, asyncio.sleep(0))
+        return interrupted, completed
+
+    assert asyncio.run(scenario()) == (True, True)
+
+
+def call_with_speech_playing(client):
+    call_context = CallContext()
+    call_context.call_sid = asyncio.run(client.create_call("+911", "+912", "https://example.com/incoming"))["sid"]
+    call_context.playback = PlaybackTracker()
+    call_context.playback.sent("goodbye")
+    return call_context
+
+
+def interrupt_during(tool, call_context):
+    async def scenario():
+        turns = TurnManager()
+
+        async def turn():
+            await tool(call_context, {})
+            # The rest of the turn, e.g. waiting for a follow-up reply
+            await asyncio.sleep(10)
+
+        task = turns.start(1, turn())
+        await asyncio.sleep(0.01)
+        # The caller barges in while the announcement is still playing
+        turns.cancel_all()
+        call_context.playback.discard(["goodbye"])
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.wait_for(call_control.drain_actions(), timeout=1)
+        return task.cancelled()
+
+    return asyncio.run(scenario())
+
+
+def test_barge_in_during_end_call_still_hangs_up(monkeypatch):
+    client = FakeTelephonyClient()
+    monkeypatch.setattr(call_control, "telephony_client", client)
+    call_context = call_with_speech_playing(client)
+
+    assert interrupt_during(end_call, call_context)
+    assert client.requests[-1]["operation"] == "update_call"
+    assert client.calls[call_context.call_sid]["status"] == "completed"
+
+
+def test_barge_in_during_transfer_call_still_redirects(monkeypatch):
+    client = FakeTelephonyClient()
+    monkeypatch.setattr(call_control, "telephony_client", client)
+    monkeypatch.setenv("TRANSFER_NUMBER", "+913")
+    call_context = call_with_speech_playing(client)
+
+    assert interrupt_during(transfer_call, call_context)
+    assert client.requests[-1]["operation"] == "update_call"
+    assert client.calls[call_context.call_sid]["url"] == "http://twimlets.com/forward?PhoneNumber=+913"
@@ -0,0 +1,99 @@
+import asyncio
+import os
+
+import pytest
+
+from functions.send_whatsapp import send_whatsapp
+from services.call_context import CallContext
+from services.whatsapp_outbox import WhatsAppOutbox
+
+
+@pytest.fixture
+def outbox_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHATSAPP_OUTBOX_PATH", os.path.join(tmp_path, "outbox.sqlite3"))
+    monkeypatch.setenv("TEXTMEBOT_API_KEY", "key")
+    monkeypatch.setenv("WHATSAPP_BACKOFF_SECONDS", "0.01")
+    monkeypatch.setenv("WHATSAPP_MAX_ATTEMPTS", "2")
+
+
+def test_send_whatsapp_reports_queued_message(outbox_env, monkeypatch):
+    async def scenario():
+        outbox = WhatsAppOutbox()
+        monkeypatch.setattr("functions.send_whatsapp.whatsapp_outbox", outbox)
+        call_context = CallContext()
+        call_context.call_sid = "CA1"
+        call_context.user_phone = "+911234567890"
+        result = await send_whatsapp(call_context, {"message": "See you soon"})
+        message = await outbox.get(result["message_id"])
+        await outbox.stop()
+        return call_context, result, message
+
+    call_context, result, message = asyncio.run(scenario())
+    assert result["status"] == "queued"
+    assert call_context.whatsapp_message_id == result["message_id"]
+    assert call_context.whatsapp_status == "queued"
+    assert message["status"] == "queued" and message["phone"] == "+911234567890"
+
+
+def test_workers_sharing_the_outbox_deliver_each_message_once(outbox_env):
+    async def scenario():
+        outboxes = [WhatsAppOutbox(), WhatsAppOutbox()]
+        delivered = []
+        for name, outbox in enumerate(outboxes):
+            async def deliver(phone, text, name=name):
+                await asyncio.sleep(0.01)
+                delivered.append(text)
+            outbox.deliver = deliver
+
+        for i in range(20):
+            await outboxes[0].enqueue("CA1", "+911234567890", f"message {i}")
+        for outbox in outboxes:
+            outbox.start()
+        for _ in range(100):
+            if len(delivered) >= 20 and (await outboxes[0].stats()).get("sent") == 20:
+                break
+            await asyncio.sleep(0.02)
+        for outbox in outboxes:
+            await outbox.stop()
+        return delivered
+
+    delivered = asyncio.run(scenario())
+    assert sorted(delivered) == sorted(f"message {i}" for i in range(20))
+
+
+def test_failed_deliveries_are_retried_then_reported(outbox_env):
+    async def scenario():
+        outbox = WhatsAppOutbox()
+        statuses = []
+        outbox.on('status', lambda call_sid, message_id, status, error: statuses.append((status, error)))
+
+        async def deliver(phone, text):
+            raise RuntimeError("provider down")
+        outbox.deliver = deliver
+
+        message_id = await outbox.enqueue("CA1", "+911234567890", "See you soon")
+        outbox.start()
+        for _ in range(100):
+            if statuses:
+                break
+            await asyncio.sleep(0.02)
+        message = await outbox.get(message_id)
+        await outbox.stop()
+        return statuses, message
+
+    statuses, message = asyncio.run(scenario())
+    assert statuses == [("failed", "provider down")]
+    assert message["attempts"] == 2
+
+
+def test_worker_waits_for_api_key(outbox_env, monkeypatch):
+    monkeypatch.delenv("TEXTMEBOT_API_KEY")
+
+    async def scenario():
+        outbox = WhatsAppOutbox()
+        outbox.start()
+        started = outbox.task is not None
+        await outbox.stop()
+        return started
+
+    assert not asyncio.run(scenario())
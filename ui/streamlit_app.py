@@ -28,11 +28,27 @@ def display_call_interface():
     return phone_number, name
 
 def fetch_all_transcripts():
+    """Fetch the summaries of the latest calls, reusing the cached list if it has not changed."""
+    cached = st.session_state.get('all_transcripts')
+    headers = {}
+    if cached is not None and st.session_state.get('call_list_etag'):
+        headers['If-None-Match'] = st.session_state.call_list_etag
     try:
-        response = requests.get(f"https://{os.getenv('SERVER')}/all_transcripts")
+        response = requests.get(f"https://{os.getenv('SERVER')}/transcripts", params={"limit": 50}, headers=headers)
+        if response.status_code == 304:
+            return cached
+        st.session_state.call_list_etag = response.headers.get('ETag')
         return response.json().get('transcripts', [])
     except requests.RequestException as e:
         st.error(f"Error fetching call list: {str(e)}")
+        return cached or []
+
+def fetch_transcript(call_sid):
+    try:
+        response = requests.get(f"https://{os.getenv('SERVER')}/transcripts/{call_sid}")
+        return response.json().get('transcript', [])
+    except requests.RequestException as e:
+        st.error(f"Error fetching transcript: {str(e)}")
         return []
 
 if 'call_active' not in st.session_state:
@@ -42,6 +58,7 @@ if 'call_active' not in st.session_state:
     st.session_state.system_message = DEFAULT_SYSTEM_MESSAGE
     st.session_state.all_transcripts = fetch_all_transcripts()
     st.session_state.recording_info = None
+    st.session_state.selected_transcript = []
     st.session_state.call_selector = "Current Call"
 
 with st.sidebar:
@@ -123,10 +140,12 @@ def on_call_selector_change():
     if st.session_state.call_selector != "Current Call":
         selected_transcript = next((t for t in st.session_state.all_transcripts if f"Call {t['call_sid']}" == st.session_state.call_selector), None)
         if selected_transcript:
+            st.session_state.selected_transcript = fetch_transcript(selected_transcript['call_sid'])
             st.session_state.recording_info = fetch_recording_info(selected_transcript['call_sid'])
         else:
             st.warning("No transcript found for the selected call.")
     else:
+        st.session_state.selected_transcript = []
         st.session_state.recording_info = None
 
 st.selectbox(
@@ -139,12 +158,8 @@ st.selectbox(
 )
 
 if st.button("Refresh Call List"):
-    try:
-        response = requests.get(f"https://{os.getenv('SERVER')}/all_transcripts")
-        st.session_state.all_transcripts = response.json().get('transcripts', [])
-        on_call_selector_change()
-    except requests.RequestException as e:
-        st.error(f"Error fetching call list: {str(e)}")
+    st.session_state.all_transcripts = fetch_all_transcripts()
+    on_call_selector_change()
 
 st.divider()
 
@@ -157,46 +172,94 @@ with st.spinner("Loading recording and transcript..."):
 
     if st.session_state.call_active and st.session_state.call_sid:
         st.subheader(f"Transcript for Current Call {st.session_state.call_sid}")
-        for entry in st.session_state.transcript:
-            if entry['role'] == 'user':
-                st.chat_message("user").write(entry['content'])
-            elif entry['role'] == 'assistant':
-                st.chat_message("assistant").write(entry['content'])
+        live_transcript = st.empty()
     elif st.session_state.call_selector != "Current Call":
         if transcript := next((t for t in st.session_state.all_transcripts if f"Call {t['call_sid']}" == st.session_state.call_selector), None):
             st.subheader(f"Transcript for {st.session_state.call_selector}")
-            for entry in transcript['transcript']:
+            for entry in st.session_state.selected_transcript:
                 if entry['role'] == 'user':
                     st.chat_message("user").write(entry['content'])
                 elif entry['role'] == 'assistant':
                     st.chat_message("assistant").write(entry['content'])
 
-if st.session_state.call_active:
-    def update_call_info():
+def render_transcript(placeholder, transcript):
+    with placeholder.container():
+        for entry in transcript:
+            if entry['role'] == 'user':
+                st.chat_message("user").write(entry['content'])
+            elif entry['role'] == 'assistant':
+                st.chat_message("assistant").write(entry['content'])
+
+LIVE_CALL_STATUSES = ['queued', 'initiated', 'ringing', 'in-progress']
+
+def follow_call_events(call_sid, placeholder):
+    """Render the live transcript from the server's event stream until the call ends, returning its final status.
+
+    Returns None if the stream is not available, e.g. it was served by a worker that does not handle the
+    call, or if it ended before the call did.
+    """
+    transcript = st.session_state.transcript
+    status = None
+    try:
+        with requests.get(f"https://{os.getenv('SERVER')}/events/{call_sid}", stream=True, timeout=(10, 60)) as response:
+            if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                return None
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                    continue
+                if line.startswith(":"):
+                    # Keepalive; touching the page lets Streamlit handle button clicks meanwhile
+                    render_transcript(placeholder, transcript)
+                    continue
+                if not line.startswith("data:"):
+                    continue
+
+                data = json.loads(line[len("data:"):])
+                if event == "snapshot":
+                    transcript = data.get('transcript', [])
+                    status = data.get('status')
+                elif event == "transcript":
+                    transcript = transcript[:data['start']] + data['entries']
+                elif event == "status":
+                    status = data['status']
+                elif event == "end":
+                    status = data.get('status', status)
+                    break
+
+                st.session_state.transcript = transcript
+                render_transcript(placeholder, transcript)
+                if status is not None and status not in LIVE_CALL_STATUSES:
+                    break
+    except requests.RequestException as e:
+        st.sidebar.error(f"Error following call: {str(e)}")
+    st.session_state.transcript = transcript
+    return status if status not in LIVE_CALL_STATUSES else None
+
+def poll_call(call_sid, placeholder):
+    """Render the live transcript by polling the server every second until the call ends, returning its final status."""
+    while True:
         try:
-            status = requests.get(f"https://{os.getenv('SERVER')}/call_status/{st.session_state.call_sid}").json().get('status')
-            if status not in ['in-progress', 'ringing']:
-                st.session_state.call_active = False
-                st.warning(f"Call ended: {status}")
-                return False
-            
-            transcript_data = requests.get(f"https://{os.getenv('SERVER')}/transcript/{st.session_state.call_sid}").json()
-            if transcript_data.get('call_ended', False):
-                st.session_state.call_active = False
-                st.info(f"Call ended. Status: {transcript_data.get('final_status', 'Unknown')}")
-                return False
-            
-            st.session_state.transcript = transcript_data.get('transcript', [])
-            return True
+            status = requests.get(f"https://{os.getenv('SERVER')}/call_status/{call_sid}").json().get('status')
+            # Only the worker handling the call has its live transcript, keep the last one otherwise
+            transcript = requests.get(f"https://{os.getenv('SERVER')}/transcript/{call_sid}").json().get('transcript')
         except requests.RequestException as e:
             st.sidebar.error(f"Error updating call info: {str(e)}")
-            return False
-
-    if update_call_info():
+            return None
+        if transcript is not None:
+            st.session_state.transcript = transcript
+        render_transcript(placeholder, st.session_state.transcript)
+        if status not in LIVE_CALL_STATUSES:
+            return status
         time.sleep(1)
-        st.rerun()
-    else:
-        st.session_state.call_active = False
-        st.session_state.call_sid = None
-        st.sidebar.info("Call has ended. You can start a new call if needed.")
-        st.rerun()
\ No newline at end of file
+
+if st.session_state.call_active:
+    # Updates are pushed by the server, or polled when the event stream is not available
+    status = follow_call_events(st.session_state.call_sid, live_transcript)
+    if status is None:
+        status = poll_call(st.session_state.call_sid, live_transcript)
+    st.session_state.call_active = False
+    st.session_state.call_sid = None
+    st.sidebar.info(f"Call has ended ({status or 'unknown status'}). You can start a new call if needed.")
+    st.rerun()